@@ -23,7 +23,7 @@ from tournament.diplomacy.models.supply_centre import SupplyCentre
 from tournament.models import Tournament, Round, Game, TournamentPlayer, GamePlayer
 from tournament.models import CentreCount, DrawProposal, GameImage, SupplyCentreOwnership
 from tournament.models import PowerBid, RoundPlayer
-from tournament.models import SeederBias
+from tournament.models import SeederBias, SeedingRecord
 from tournament.players import Player, PlayerTournamentRanking, PlayerGameResult
 from tournament.players import PlayerAward, PlayerRanking
 
@@ -126,6 +126,9 @@ class PowerBidAdmin(admin.ModelAdmin):
 class SeederBiasAdmin(admin.ModelAdmin):
     list_filter = ('player1__tournament', )
 
+class SeedingRecordAdmin(admin.ModelAdmin):
+    list_filter = ('the_round__tournament', )
+
 class PlayerTournamentRankingAdmin(admin.ModelAdmin):
     list_filter = ('player', 'tournament', 'position', 'year', 'title')
 
@@ -159,3 +162,4 @@ admin.site.register(Round, RoundAdmin)
 admin.site.register(RoundPlayer, RoundPlayerAdmin)
 admin.site.register(GamePlayer, GamePlayerAdmin)
 admin.site.register(SeederBias, SeederBiasAdmin)
+admin.site.register(SeedingRecord, SeedingRecordAdmin)
@@ -0,0 +1,105 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Solve the assignment problem (e.g. matching players to powers).
+"""
+
+import random
+
+
+class NotSquare(Exception):
+    """The cost matrix doesn't have the same number of rows and columns."""
+    pass
+
+
+def min_cost_assignment(costs):
+    """
+    Finds the assignment of rows to columns with the lowest total cost,
+    using the Hungarian algorithm, which takes O(n^3) time.
+    costs is a square matrix (a sequence of sequences) of numbers.
+    Returns a list, indexed by row, of the column assigned to that row.
+    Raises NotSquare if costs isn't square.
+    """
+    n = len(costs)
+    for row in costs:
+        if len(row) != n:
+            raise NotSquare('%d rows but a row with %d columns' % (n, len(row)))
+    inf = float('inf')
+    # Potentials for rows and columns.
+    # Everything here is indexed from 1, with 0 used as a dummy
+    u = [0] * (n + 1)
+    v = [0] * (n + 1)
+    # Row matched to each column
+    match = [0] * (n + 1)
+    # Previous column on the augmenting path
+    way = [0] * (n + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_v = [inf] * (n + 1)
+        used = [False] * (n + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = costs[i0 - 1]
+            delta = inf
+            j1 = 0
+            for j in range(1, n + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < min_v[j]:
+                        min_v[j] = cur
+                        way[j] = j0
+                    if min_v[j] < delta:
+                        delta = min_v[j]
+                        j1 = j
+            for j in range(n + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_v[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    result = [0] * n
+    for j in range(1, n + 1):
+        result[match[j] - 1] = j - 1
+    return result
+
+
+def random_min_cost_assignment(costs, rng=random):
+    """
+    As min_cost_assignment(), but picks at random between
+    equally good assignments (at least, to the extent that shuffling the
+    rows and columns does so).
+    rng is the random number generator to use.
+    """
+    rows = list(range(len(costs)))
+    cols = list(range(len(costs)))
+    rng.shuffle(rows)
+    rng.shuffle(cols)
+    shuffled = [[costs[r][c] for c in cols] for r in rows]
+    result = [0] * len(costs)
+    for i, j in enumerate(min_cost_assignment(shuffled)):
+        result[rows[i]] = cols[j]
+    return result
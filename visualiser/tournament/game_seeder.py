@@ -18,9 +18,15 @@
 Assign players to Diplomacy games in a tournament setting.
 """
 
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import copy
+import functools
 import itertools
+import math
+import multiprocessing
 import random
+import time
 #No auto until python 3.6
 #from enum import Enum, auto
 from enum import Enum
@@ -28,6 +34,8 @@ from operator import itemgetter
 
 from django.utils.translation import gettext as _
 
+from tournament.assignment import min_cost_assignment, random_min_cost_assignment
+
 
 class InvalidPlayer(Exception):
     """A player is invalid in some way (unknown, already present, etc)."""
@@ -72,68 +80,805 @@ class _AssignmentFailed(Exception):
     pass
 
 
+class _SwapSearch:
+    """
+    A seeding that is being modified by swapping players between games.
+    Keeps track of the fitness score of the seeding as it changes, only
+    looking at the two games involved in each swap rather than
+    re-calculating the fitness of the whole seeding.
+    Rather than copying the best seeding found so far, keeps a log of the
+    swaps made since then, so they can be undone.
+    """
+    def __init__(self, seeder, games, include_these_games=False):
+        """
+        seeder is the GameSeeder.
+        games is a list of sets of player indices. It will be modified in place.
+        If include_these_games is True, pairs of players who are in more
+        than one of the games count towards the fitness score
+        (as for GameSeeder._seeding_fitness()).
+        """
+        self.seeder = seeder
+        self.games = games
+        self.include_these_games = include_these_games
+        # Dict, keyed by player, of dicts, keyed by (other) player,
+        # of integer counts of games shared in this seeding
+        self.pair_counts = {}
+        if include_these_games:
+            for g in games:
+                for p in g:
+                    for q in g:
+                        if p != q:
+                            self._add_to_pair_count(p, q, 1)
+        # List, indexed by game index, of the cost of the best power
+        # assignment for each game, if powers are part of the fitness score
+        self.power_costs = None
+        if seeder._with_powers:
+            self.power_costs = [seeder._power_cost(g) for g in games]
+        # Last swap passed to swap_delta(), and the power costs it would give
+        self._pending = None
+        self.fitness = seeder._seeding_fitness(games, include_these_games)
+        self.best_fitness = self.fitness
+        # List of swaps made since the best seeding was current
+        self._log = []
+
+    def _add_to_pair_count(self, p, q, n):
+        """Add n to the count of games shared by p and q in the seeding"""
+        counts = self.pair_counts.setdefault(p, {})
+        counts[q] = counts.get(q, 0) + n
+
+    def _history_score(self, player, others):
+        """
+        Fitness score contribution (from previously-played games) of player
+        playing with each of others.
+        """
+        row = self.seeder.games_played_matrix[player]
+        # Each pair is counted once from each side
+        return 2 * sum([row[q] ** 2 for q in others])
+
+    @staticmethod
+    def _repeat_score(count):
+        """
+        Fitness score contribution of a pair of players sharing count games
+        in the seeding.
+        """
+        # Each game after the first scores the square of the number of
+        # earlier shared games, for each player of the pair
+        return 2 * sum(n ** 2 for n in range(count))
+
+    def _repeat_delta(self, player, leaving, joining):
+        """
+        Change in the fitness score from pairs within the seeding when player
+        stops playing with leaving and starts playing with joining.
+        """
+        counts = self.pair_counts.get(player, {})
+        delta = 0
+        for q in leaving | joining:
+            n = counts.get(q, 0)
+            new_n = n + (q in joining) - (q in leaving)
+            delta += self._repeat_score(new_n) - self._repeat_score(n)
+        return delta
+
+    def swap_delta(self, g1, p1, g2, p2):
+        """
+        Returns the change in fitness score if player p1 in game index g1 were
+        swapped with player p2 in game index g2.
+        """
+        others1 = self.games[g1] - {p1}
+        others2 = self.games[g2] - {p2}
+        delta = self._history_score(p1, others2) - self._history_score(p1, others1)
+        delta += self._history_score(p2, others1) - self._history_score(p2, others2)
+        if self.include_these_games:
+            delta += self._repeat_delta(p1, others1, others2)
+            delta += self._repeat_delta(p2, others2, others1)
+        if self.power_costs is not None:
+            # Only the two games involved need their powers re-assigned
+            cost1 = self.seeder._power_cost(others1 | {p2})
+            cost2 = self.seeder._power_cost(others2 | {p1})
+            self._pending = ((g1, p1, g2, p2), cost1, cost2)
+            delta += self.seeder.power_weight * (cost1 + cost2
+                                                 - self.power_costs[g1]
+                                                 - self.power_costs[g2])
+        return delta
+
+    def random_swap(self):
+        """
+        Pick a random player from each of two random games.
+        Returns a (g1, p1, g2, p2) 4-tuple, where g1 and g2 are indices into
+        games, or None if swapping the players would leave a player in the
+        same game twice.
+        """
+        rng = self.seeder.rng
+        g1 = rng.randrange(len(self.games))
+        g2 = rng.randrange(len(self.games))
+        if g1 == g2:
+            return None
+        p1 = rng.choice(tuple(self.games[g1]))
+        p2 = rng.choice(tuple(self.games[g2]))
+        if (p1 in self.games[g2]) or (p2 in self.games[g1]):
+            return None
+        return g1, p1, g2, p2
+
+    def _do_swap(self, g1, p1, g2, p2):
+        """Move p1 from game g1 to game g2 and p2 from game g2 to game g1"""
+        game1 = self.games[g1]
+        game2 = self.games[g2]
+        game1.remove(p1)
+        game2.remove(p2)
+        if self.include_these_games:
+            for q in game1:
+                self._add_to_pair_count(p1, q, -1)
+                self._add_to_pair_count(q, p1, -1)
+                self._add_to_pair_count(p2, q, 1)
+                self._add_to_pair_count(q, p2, 1)
+            for q in game2:
+                self._add_to_pair_count(p2, q, -1)
+                self._add_to_pair_count(q, p2, -1)
+                self._add_to_pair_count(p1, q, 1)
+                self._add_to_pair_count(q, p1, 1)
+        game1.add(p2)
+        game2.add(p1)
+        if self.power_costs is not None:
+            pending = self._pending
+            if (pending is not None) and (pending[0] == (g1, p1, g2, p2)):
+                _, cost1, cost2 = pending
+            else:
+                cost1 = self.seeder._power_cost(game1)
+                cost2 = self.seeder._power_cost(game2)
+            self.power_costs[g1] = cost1
+            self.power_costs[g2] = cost2
+            self._pending = None
+
+    def swap(self, g1, p1, g2, p2, delta=None):
+        """
+        Swap player p1 in game index g1 with player p2 in game index g2.
+        delta is the change in fitness score, if already known.
+        Returns the new fitness score.
+        """
+        if delta is None:
+            delta = self.swap_delta(g1, p1, g2, p2)
+        self._do_swap(g1, p1, g2, p2)
+        self.fitness += delta
+        if self.fitness < self.best_fitness:
+            self.best_fitness = self.fitness
+            self._log.clear()
+        else:
+            self._log.append((g1, p1, g2, p2, delta))
+        return self.fitness
+
+    def best(self):
+        """
+        Undo any swaps made since the best seeding was found.
+        Returns a 2-tuple containing the best list of games and its fitness score.
+        """
+        while self._log:
+            g1, p1, g2, p2, delta = self._log.pop()
+            # p1 is now in g2 and p2 in g1
+            self._do_swap(g1, p2, g2, p1)
+            self.fitness -= delta
+        return self.games, self.fitness
+
+
+class _PlanSearch:
+    """
+    Seedings for several rounds that are being modified by swapping players
+    between games within a round.
+    The fitness score of the plan is the total of the fitness scores that
+    its rounds would have if they were played in order, which doesn't
+    actually depend on the order. Like _SwapSearch, the fitness score is kept
+    up to date as the plan changes, only looking at the players involved in
+    each swap. Only powers in the first round count towards the fitness
+    score, because the powers for later rounds depend on the earlier ones.
+    """
+    def __init__(self, seeder, rounds):
+        """
+        seeder is the GameSeeder.
+        rounds is a list, one per round, of lists of sets of player indices.
+        It will be modified in place.
+        """
+        self.seeder = seeder
+        self.rounds = rounds
+        # List, indexed by player index, of lists, indexed by (other) player
+        # index, of integer counts of shared games, including the planned ones
+        self.counts = [row.tolist() for row in seeder.games_played_matrix]
+        for games in rounds:
+            for g in games:
+                for p in g:
+                    row = self.counts[p]
+                    for q in g:
+                        if p != q:
+                            row[q] += 1
+        # List, indexed by game index, of the cost of the best power
+        # assignment for each game in the first round,
+        # if powers are part of the fitness score
+        self.power_costs = None
+        if seeder._with_powers:
+            self.power_costs = [seeder._power_cost(g) for g in rounds[0]]
+        # Last swap passed to swap_delta(), and the power costs it would give
+        self._pending = None
+        self.fitness = 0
+        for played, planned in zip(seeder.games_played_matrix, self.counts):
+            for n, m in zip(played, planned):
+                self.fitness += self._pair_score(m) - self._pair_score(n)
+        if self.power_costs is not None:
+            self.fitness += seeder.power_weight * sum(self.power_costs)
+        self.best_fitness = self.fitness
+        # List of swaps made since the best plan was current
+        self._log = []
+
+    @staticmethod
+    def _pair_score(count):
+        """
+        Fitness score contribution from one player of a pair of players
+        sharing count games, if each game scores the square of the number
+        of earlier shared games.
+        """
+        return (count - 1) * count * (2 * count - 1) // 6
+
+    def _move_delta(self, player, leaving, joining):
+        """
+        Change in the fitness score when player stops playing with leaving
+        and starts playing with joining.
+        """
+        row = self.counts[player]
+        delta = 0
+        for q in leaving - joining:
+            n = row[q]
+            delta += self._pair_score(n - 1) - self._pair_score(n)
+        for q in joining - leaving:
+            n = row[q]
+            delta += self._pair_score(n + 1) - self._pair_score(n)
+        # Each pair is counted once from each side
+        return 2 * delta
+
+    def swap_delta(self, r, g1, p1, g2, p2):
+        """
+        Returns the change in fitness score if player p1 in game index g1 were
+        swapped with player p2 in game index g2, in round index r.
+        """
+        games = self.rounds[r]
+        others1 = games[g1] - {p1}
+        others2 = games[g2] - {p2}
+        delta = self._move_delta(p1, others1, others2) + self._move_delta(p2, others2, others1)
+        if (r == 0) and (self.power_costs is not None):
+            # Only the two games involved need their powers re-assigned
+            cost1 = self.seeder._power_cost(others1 | {p2})
+            cost2 = self.seeder._power_cost(others2 | {p1})
+            self._pending = ((g1, p1, g2, p2), cost1, cost2)
+            delta += self.seeder.power_weight * (cost1 + cost2
+                                                 - self.power_costs[g1]
+                                                 - self.power_costs[g2])
+        return delta
+
+    def random_swap(self):
+        """
+        Pick a random round, then a random player from each of two random
+        games in that round.
+        Returns a (r, g1, p1, g2, p2) 5-tuple, where r is an index into rounds
+        and g1 and g2 are indices into the games for that round, or None if
+        swapping the players would leave a player in the same game twice.
+        """
+        rng = self.seeder.rng
+        r = rng.randrange(len(self.rounds))
+        games = self.rounds[r]
+        g1 = rng.randrange(len(games))
+        g2 = rng.randrange(len(games))
+        if g1 == g2:
+            return None
+        p1 = rng.choice(tuple(games[g1]))
+        p2 = rng.choice(tuple(games[g2]))
+        if (p1 in games[g2]) or (p2 in games[g1]):
+            return None
+        return r, g1, p1, g2, p2
+
+    def _add_to_counts(self, p, q, n):
+        """Add n to the count of games shared by p and q"""
+        self.counts[p][q] += n
+        self.counts[q][p] += n
+
+    def _do_swap(self, r, g1, p1, g2, p2):
+        """
+        Move p1 from game g1 to game g2 and p2 from game g2 to game g1,
+        in round r.
+        """
+        game1 = self.rounds[r][g1]
+        game2 = self.rounds[r][g2]
+        game1.remove(p1)
+        game2.remove(p2)
+        for q in game1:
+            self._add_to_counts(p1, q, -1)
+            self._add_to_counts(p2, q, 1)
+        for q in game2:
+            self._add_to_counts(p2, q, -1)
+            self._add_to_counts(p1, q, 1)
+        game1.add(p2)
+        game2.add(p1)
+        if (r == 0) and (self.power_costs is not None):
+            pending = self._pending
+            if (pending is not None) and (pending[0] == (g1, p1, g2, p2)):
+                _, cost1, cost2 = pending
+            else:
+                cost1 = self.seeder._power_cost(game1)
+                cost2 = self.seeder._power_cost(game2)
+            self.power_costs[g1] = cost1
+            self.power_costs[g2] = cost2
+            self._pending = None
+
+    def swap(self, r, g1, p1, g2, p2, delta=None):
+        """
+        Swap player p1 in game index g1 with player p2 in game index g2,
+        in round index r.
+        delta is the change in fitness score, if already known.
+        Returns the new fitness score.
+        """
+        if delta is None:
+            delta = self.swap_delta(r, g1, p1, g2, p2)
+        self._do_swap(r, g1, p1, g2, p2)
+        self.fitness += delta
+        if self.fitness < self.best_fitness:
+            self.best_fitness = self.fitness
+            self._log.clear()
+        else:
+            self._log.append((r, g1, p1, g2, p2, delta))
+        return self.fitness
+
+    def first_round(self):
+        """Returns a copy of the seeding currently planned for the first round."""
+        return [set(g) for g in self.rounds[0]]
+
+    def best(self):
+        """
+        Undo any swaps made since the best plan was found.
+        Returns a 2-tuple containing the best plan and its fitness score.
+        """
+        while self._log:
+            r, g1, p1, g2, p2, delta = self._log.pop()
+            # p1 is now in g2 and p2 in g1
+            self._do_swap(r, g1, p2, g2, p1)
+            self.fitness -= delta
+        return self.rounds, self.fitness
+
+
+def _expired(end):
+    """
+    Has the deadline passed?
+    end is a time.monotonic() value, or None for no deadline.
+    """
+    return (end is not None) and (time.monotonic() >= end)
+
+
+# How many iterations to do between checks of the deadline
+_CHECK_EVERY = 64
+
+
+def _pairs_when_spread(players, games):
+    """
+    Returns the minimum number of pairs of players sharing a game when
+    players players are spread between games games.
+    """
+    if not games:
+        return 0 if not players else math.inf
+    n, extra = divmod(players, games)
+    return extra * (n + 1) * n // 2 + (games - extra) * n * (n - 1) // 2
+
+
+@functools.lru_cache(maxsize=None)
+def _min_new_pairs(in_game, left, free, games):
+    """
+    Returns the minimum number of new pairs of players sharing a game
+    when left more players from a group that has in_game players in the
+    current game are spread between the free places in the current game
+    and the other games-1 games.
+    """
+    return min([x * in_game + x * (x - 1) // 2 + _pairs_when_spread(left - x, games - 1)
+                for x in range(min(left, free) + 1)])
+
+
+class _ExhaustiveSearch:
+    """
+    A branch-and-bound search through every possible seeding.
+    Each seeding is only generated once - players within a game are
+    added in index order, and each game starts with the lowest-index
+    player not yet in a game, so the same games in a different order
+    are never considered.
+    The partial fitness score of a seeding can only increase as players
+    are added, so any partial seeding that is already no better than the
+    best seeding found so far is abandoned.
+    """
+    def __init__(self, seeder, players, include_these_games=False, end=None):
+        """
+        seeder is the GameSeeder.
+        players is a list of player indices, in which a player playing two
+        games appears twice.
+        If include_these_games is True, pairs of players who are in more
+        than one of the games count towards the fitness score
+        (as for GameSeeder._seeding_fitness()).
+        end is an optional time.monotonic() value. Once it has passed
+        (or seeder.stop() is called), the search stops as soon as it has
+        found a seeding.
+        """
+        self.seeder = seeder
+        self.end = end
+        self.matrix = seeder.games_played_matrix
+        self.played_games = seeder.played_games
+        self.game_size = seeder.num_powers
+        self.include_these_games = include_these_games
+        # Dict, keyed by player index, of the number of games that player
+        # still needs to be added to
+        self.remaining = {}
+        for p in players:
+            self.remaining[p] = self.remaining.get(p, 0) + 1
+        self.pool = sorted(self.remaining)
+        self.games_left = len(players) // self.game_size
+        # Dict, keyed by (player index, player index) 2-tuple with the lower
+        # index first, of integer counts of games shared in this seeding
+        self.shared = {}
+        # Complete games in the current partial seeding
+        self.games = []
+        # Players in the game being built, in index order
+        self.game = []
+        self.best_fitness = None
+        # Number of complete seedings found
+        self.seedings = 0
+        # Number of partial seedings examined
+        self.iterations = 0
+        # Did we give up before trying every seeding?
+        self.timed_out = False
+        self._find_cliques()
+
+    def _find_cliques(self):
+        """
+        Finds groups of players in which every player has played every
+        other - each earlier game, plus groups covering any other pairs
+        of players with a non-zero fitness score (from bias).
+        Each group gets a weight such that, for every pair of players,
+        the weights of the groups containing both add up to no more than
+        the fitness score of that pair sharing a game.
+        These are used to find a lower bound for the fitness score of
+        the players not yet added to games.
+        """
+        matrix = self.matrix
+
+        def pair_score(p, q):
+            return matrix[p][q] ** 2 + matrix[q][p] ** 2
+
+        # List of the weight of each group
+        self.clique_weights = []
+        # Dict, keyed by player index, of lists of indices of the groups
+        # containing that player
+        self.cliques_of = {p: [] for p in self.pool}
+        # List, indexed by group index, of the number of players in that
+        # group still to be added to games
+        self.clique_left = []
+
+        def add_clique(clique, weight):
+            if (len(clique) < 2) or (weight <= 0):
+                return
+            c = len(self.clique_weights)
+            self.clique_weights.append(weight)
+            self.clique_left.append(sum([self.remaining[m] for m in clique]))
+            for m in clique:
+                self.cliques_of[m].append(c)
+
+        # A pair of players who have played together n times
+        # are in n of the games, so they share out their score
+        games = [sorted([p for p in g if p in self.remaining]) for g in self.played_games]
+        games_shared = {}
+        for g in games:
+            for pair in itertools.combinations(g, 2):
+                games_shared[pair] = games_shared.get(pair, 0) + 1
+        for g in games:
+            if len(g) > 1:
+                add_clique(g, min([pair_score(p, q) // games_shared[(p, q)]
+                                   for p, q in itertools.combinations(g, 2)]))
+        # Then cover any other pairs
+        covered = set(games_shared)
+
+        def linked(p, q):
+            return (matrix[p][q] or matrix[q][p]) and ((p, q) not in covered)
+
+        for p in self.pool:
+            for q in self.pool:
+                if (q <= p) or not linked(p, q):
+                    continue
+                clique = [p, q]
+                for r in self.pool:
+                    if (r > q) and all(linked(m, r) for m in clique):
+                        clique.append(r)
+                covered.update(itertools.combinations(clique, 2))
+                add_clique(clique, min([pair_score(a, b)
+                                        for a, b in itertools.combinations(clique, 2)]))
+
+    def _lower_bound(self, costs):
+        """
+        Returns a lower bound for the increase in fitness score from
+        completing the current partial seeding.
+        costs is a sorted list of the increase in fitness score from adding
+        each player who could still be added to the current game.
+        Players from each group found by _find_cliques() have to be spread
+        across the remaining games, and every pair that ends up in the same
+        game adds to the fitness score. Alternatively, we can count pairs
+        including a player already in the current game exactly, but then only
+        use the groups for pairs of players who are yet to be added.
+        """
+        in_game = {}
+        for p in self.game:
+            for c in self.cliques_of[p]:
+                in_game[c] = in_game.get(c, 0) + 1
+        free = self.game_size - len(self.game)
+        bound = 0
+        new_bound = sum(costs[:free])
+        for c, weight in enumerate(self.clique_weights):
+            left = self.clique_left[c]
+            if left:
+                bound += weight * _min_new_pairs(in_game.get(c, 0), left, free, self.games_left)
+                new_bound += weight * _min_new_pairs(0, left, free, self.games_left)
+        return max(bound, new_bound)
+
+    def feasible(self):
+        """
+        Can the remaining players be formed into valid games?
+        """
+        return max(self.remaining.values()) <= self.games_left
+
+    def _cost(self, player):
+        """
+        Increase in fitness score from adding player to the current game.
+        """
+        row = self.matrix[player]
+        cost = 2 * sum([row[q] ** 2 for q in self.game])
+        if self.include_these_games:
+            shared = self.shared
+            cost += 2 * sum([shared.get((min(player, q), max(player, q)), 0) ** 2 for q in self.game])
+        return cost
+
+    def _add(self, player, n):
+        """
+        Adds n (1 or -1) to the count of games shared by player
+        and each player already in the current game.
+        """
+        if self.include_these_games:
+            for q in self.game:
+                pair = (min(player, q), max(player, q))
+                self.shared[pair] = self.shared.get(pair, 0) + n
+        self.remaining[player] -= n
+        for c in self.cliques_of[player]:
+            self.clique_left[c] -= n
+
+    def _candidates(self):
+        """
+        Returns a list of the players that could be added to the current game,
+        in index order, and the number of them that could be added next.
+        """
+        remaining = self.remaining
+        if not self.game:
+            # Each game starts with the lowest-index player left
+            for p in self.pool:
+                if remaining[p]:
+                    return [p], 1
+        last = self.game[-1]
+        candidates = [p for p in self.pool if (p > last) and remaining[p]]
+        # Players are added in index order, so leave enough
+        # higher-index players to fill the game
+        return candidates, len(candidates) - (self.game_size - len(self.game)) + 1
+
+    def _search(self, fitness):
+        """
+        Generator that extends the current partial seeding, which has a
+        fitness score of fitness, yielding each complete seeding that is
+        better than any found before.
+        """
+        if len(self.game) == self.game_size:
+            self.games.append(self.game)
+            self.game = []
+            self.games_left -= 1
+            if not self.games_left:
+                self.seedings += 1
+                self.best_fitness = fitness
+                yield [set(g) for g in self.games], fitness
+            elif self.feasible():
+                yield from self._search(fitness)
+            self.games_left += 1
+            self.game = self.games.pop()
+            return
+        self.iterations += 1
+        if self.best_fitness is not None:
+            if (self.iterations % _CHECK_EVERY == 0) and self.seeder._time_up(self.end):
+                self.timed_out = True
+                return
+        candidates, n = self._candidates()
+        costs = [self._cost(p) for p in candidates]
+        if self.best_fitness is not None:
+            if fitness + self._lower_bound(sorted(costs)) >= self.best_fitness:
+                return
+        # Try the cheapest players first, to find good seedings early
+        for cost, p in sorted(zip(costs[:n], candidates[:n])):
+            if (self.best_fitness is not None) and (fitness + cost >= self.best_fitness):
+                # This, and every more expensive player, can't lead to a better seeding
+                break
+            self._add(p, 1)
+            self.game.append(p)
+            yield from self._search(fitness + cost)
+            self.game.pop()
+            self._add(p, -1)
+            if (self.best_fitness == 0) or self.timed_out:
+                # Can't do better than that, or out of time
+                break
+
+    def improvements(self):
+        """
+        Generator for successively better (seeding, fitness) 2-tuples,
+        where a seeding is a list of sets of player indices.
+        The last one is the best possible seeding, unless timed_out is set
+        afterwards.
+        Raises _AssignmentFailed if there is no valid seeding.
+        """
+        if not self.remaining:
+            yield [], 0
+            return
+        if not self.feasible():
+            raise _AssignmentFailed
+        yield from self._search(0)
+        if self.best_fitness is None:
+            raise _AssignmentFailed
+
+
+# The GameSeeder used by this worker process
+_worker_seeder = None
+
+
+def _init_worker(seeder, stop_event):
+    """
+    Initialiser for worker processes.
+    Stores the GameSeeder state to use for all seeding done by the process.
+    stop_event is the multiprocessing Event that is set when the parent
+    process's GameSeeder is asked to stop.
+    """
+    global _worker_seeder
+    seeder._stop_event = stop_event
+    _worker_seeder = seeder
+
+
+def _seed_in_worker(players, starts, include_these_games, rng_seed, end):
+    """
+    Seed games in a worker process.
+    Returns the best (seeding, fitness) 2-tuple from starts seedings
+    (or from as many seedings as can be done before time end, if starts
+    is None), and the number of iterations done.
+    """
+    _worker_seeder.rng = random.Random(rng_seed)
+    _worker_seeder._iterations_done = 0
+    best = _worker_seeder._best_seeding(players, starts, include_these_games, True, end)
+    return best, _worker_seeder._iterations_done
+
+
 class SeedMethod(Enum):
     """
     Method to use to seed games
     RANDOM - try a number of random seedings plus modifications
              and pick the best
     EXHAUSTIVE - try every possible seeding and pick the best (slow)
+    ANNEALING - try a number of random seedings plus modifications,
+                sometimes accepting modifications that make things worse,
+                and pick the best
     """
     #RANDOM = auto()
     #EXHAUSTIVE = auto()
     RANDOM = 1
     EXHAUSTIVE = 2
+    ANNEALING = 3
 
 
 class GameSeeder:
     """
     Assigns Diplomacy players to games to minimise the number of people they
     play again.
-    Two algorithms are supported:
+    Three algorithms are supported:
     EXHAUSTIVE
-        Try every possible seeding. This will take a long time with many
-        players.
-        It may also exhaust memory. Definitely not recommended for 28 players,
-        and may well not work with 21.
+        Find the best possible seeding, using a branch-and-bound search
+        through every possible seeding. Partial seedings that can't beat
+        the best seeding found so far are abandoned, but this will still
+        take a long time with many players. Not recommended for more than
+        28 players.
     RANDOM
         Initially assigns players at random to games, then tries swapping
         players at random between games.
         The number of candidate seedings and the number of iterations can both
         be specified.
-    In both cases, a fitness measure is used to determine the best candidate
+    ANNEALING
+        Like RANDOM, but swaps that make the seeding worse are only accepted
+        with a probability that reduces as the "temperature" falls
+        over the iterations (simulated annealing). This lets the search
+        escape from seedings that no single swap can improve.
+        The temperatures at the start and end can be specified.
+    In all cases, a fitness measure is used to determine the best candidate
     seeding.
     """
     def __init__(self,
                  powers,
                  starts=1,
                  iterations=1000,
-                 seed_method=SeedMethod.RANDOM):
+                 seed_method=SeedMethod.RANDOM,
+                 initial_temperature=5.0,
+                 final_temperature=0.1,
+                 processes=1,
+                 seed=None,
+                 power_weight=0):
         """
         powers is a list of powers that can be played. Anything unique can be
         used to identify a power.
         seed_method specifies the algorithm used to find a candidate seeding:
             RANDOM - pick sets of players at random
             EXHAUSTIVE - try every possible seeding
+            ANNEALING - pick sets of players at random, then anneal
         starts is the number of initial seedings to generate. Not used with
         EXHAUSTIVE seed_method.
         iterations is the number of times to modify each initial seeding in an
         attempt to improve it. Not used with EXHAUSTIVE seed_method.
+        initial_temperature and final_temperature give the temperature
+        for the first and last iterations. The temperature falls
+        geometrically in between. Only used with ANNEALING seed_method.
+        processes is the number of worker processes to spread the starts
+        between. Not used with EXHAUSTIVE seed_method.
+        seed is used to seed the random number generator used for seeding,
+        so that a seeding can be reproduced. If it is None, a seed is picked
+        at random. Either way, it is available as the seed attribute.
+        power_weight is an integer saying how much a player playing a power
+        they have already played counts against a seeding from
+        seed_games_and_powers(), compared to a pair of players meeting
+        again. If it is zero, games
+        are seeded without regard to powers, then the powers are assigned.
+        Otherwise, the powers for each game are re-assigned as players are
+        swapped between games. Not used with EXHAUSTIVE seed_method.
         """
+        if power_weight < 0:
+            raise ValueError('Invalid power weight %s' % power_weight)
+        self.power_weight = power_weight
+        # Whether the fitness score currently includes repeated powers
+        self._with_powers = False
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.games_played = False
         self.seed_method = seed_method
-        if seed_method == SeedMethod.RANDOM:
+        self.processes = processes
+        if seed_method in (SeedMethod.RANDOM, SeedMethod.ANNEALING):
             self.starts = starts
             self.iterations = iterations
-        # List of players to use to seed games
+        if seed_method == SeedMethod.ANNEALING:
+            if (final_temperature <= 0.0) or (initial_temperature < final_temperature):
+                raise ValueError('Invalid temperatures %f and %f' % (initial_temperature,
+                                                                     final_temperature))
+            self.initial_temperature = initial_temperature
+            self.final_temperature = final_temperature
+        # List of players to use to seed games.
+        # Internally, players are identified by their index in this list
         self.players = []
-        # Dict, keyed by player, of dicts, keyed by (other) player,
-        # of integer counts of shared games
-        self.games_played_matrix = {}
-        self.powers = powers
-        self.num_powers = len(powers)
-        # Dict, keyed by player, of dicts, keyed by power,
+        # Dict, keyed by player, of indices into players
+        self._player_index = {}
+        # List, indexed by player index, of arrays, indexed by (other) player
+        # index, of integer counts of shared games
+        self.games_played_matrix = []
+        self.powers = list(powers)
+        self.num_powers = len(self.powers)
+        # Dict, keyed by power, of indices into powers
+        self._power_index = {p: i for i, p in enumerate(self.powers)}
+        # List, indexed by player index, of arrays, indexed by power index,
         # of integer counts of games the player has played that power
-        self.powers_played = {}
+        self.powers_played = []
+        # List of tuples of the indices of the players in each played game
+        self.played_games = []
+        # Number of iterations done by the current seed_games() call
+        self._iterations_done = 0
+        # Best (seeding, fitness) 2-tuple found by the current seed_games() call
+        self._best = None
+        # Fitness score of the seeding returned by the last seed_games() call
+        self.last_fitness = None
+        # Set by stop() to end the current seed_games() call early
+        self._stop_requested = False
+        # multiprocessing Event to pass stop() on to worker processes,
+        # while there are any
+        self._stop_event = None
 
     def add_player(self, player):
         """
@@ -141,46 +886,32 @@ class GameSeeder:
         Player is assumed to have played no games.
         Can raise InvalidPlayer if the player is already present.
         """
-        if player in self.games_played_matrix:
+        if player in self._player_index:
             raise InvalidPlayer(str(player))
+        self._player_index[player] = len(self.players)
         self.players.append(player)
-        self.games_played_matrix[player] = {}
-        self.powers_played[player] = {}
-        for p in self.powers:
-            self.powers_played[player][p] = 0
+        for row in self.games_played_matrix:
+            row.append(0)
+        self.games_played_matrix.append(array('i', [0] * len(self.players)))
+        self.powers_played.append(array('i', [0] * self.num_powers))
 
-    def _add_played_game(self, game, matrix):
+    def _index(self, player):
         """
-        Add a previously-played game to take into account.
-        game is either a set of (player, power) 2-tuples, or a set of players
-        (player can be any type as long as it's the same in all calls to this object).
-        Can raise InvalidPlayer if any player is unknown.
-        Raises InvalidPlayerCount if the game doesn't have seven players.
+        Returns the index of the specified player.
+        Raises InvalidPlayer if the player is unknown.
         """
-        with_powers = False
-        for x in game:
-            if with_powers or isinstance(x, tuple):
-                with_powers = True
-                player1, power1 = x
-            else:
-                player1 = x
-            if player1 not in matrix:
-                raise InvalidPlayer(str(player1))
-            for x in game:
-                if with_powers:
-                    player2, _ = x
-                else:
-                    player2 = x
-                if player1 != player2:
-                    try:
-                        matrix[player1][player2] += 1
-                    except KeyError:
-                        if player2 not in matrix:
-                            raise InvalidPlayer(str(player2))
-                        matrix[player1][player2] = 1
-            if with_powers:
-                self.powers_played[player1][power1] += 1
-        self.games_played = True
+        try:
+            return self._player_index[player]
+        except KeyError:
+            raise InvalidPlayer(str(player)) from None
+
+    def _indices(self, players):
+        """Returns a list of the indices of the specified players."""
+        return [self._index(p) for p in players]
+
+    def _players(self, indices):
+        """Returns a set of the players with the specified indices."""
+        return {self.players[i] for i in indices}
 
     def add_played_game(self, game):
         """
@@ -196,7 +927,15 @@ class GameSeeder:
         # Check that each power is only present once
         if len(set([power for player, power in game])) != self.num_powers:
             raise PowersNotUnique()
-        self._add_played_game(game, self.games_played_matrix)
+        game = [(self._index(player), self._power_index[power]) for player, power in game]
+        for i, power in game:
+            row = self.games_played_matrix[i]
+            for j, _ in game:
+                if i != j:
+                    row[j] += 1
+            self.powers_played[i][power] += 1
+        self.played_games.append(tuple(i for i, _ in game))
+        self.games_played = True
 
     def _add_bias(self, player1, player2, weight):
         """
@@ -216,18 +955,10 @@ class GameSeeder:
             raise InvalidPlayerPairing(str(player1))
         if weight == 0:
             raise InvalidWeight(str(weight))
-        if player1 not in self.games_played_matrix:
-            raise InvalidPlayer(str(player1))
-        if player2 not in self.games_played_matrix:
-            raise InvalidPlayer(str(player2))
-        try:
-            self.games_played_matrix[player1][player2] += weight
-        except KeyError:
-            self.games_played_matrix[player1][player2] = weight
-        try:
-            self.games_played_matrix[player2][player1] += weight
-        except KeyError:
-            self.games_played_matrix[player2][player1] = weight
+        i = self._index(player1)
+        j = self._index(player2)
+        self.games_played_matrix[i][j] += weight
+        self.games_played_matrix[j][i] += weight
         # fitness is now meaningful
         self.games_played = True
 
@@ -257,35 +988,18 @@ class GameSeeder:
         The value returned is the sum of the number of times each player has
         previously played the specified power.
         """
-        f = 0
-        for player, power in game:
-            f += self.powers_played[player][power]
-        return f
-
-    def _assign_some_powers(self, players, powers):
-        """
-        Returns a list of sets of (player, power) 2- tuples.
-        This is the set of all possible games with that player and power list.
-        """
-        assert len(players) == len(powers)
-        # If there's just one player left, there's only one possible game
-        if len(players) == 1:
-            pair = (players[0], powers[0])
-            game = set()
-            game.add(pair)
-            result = list()
-            result.append(game)
-            return result
-        result = list()
-        player = players.pop(0)
-        for power in powers:
-            pair = (player, power)
-            powers2 = powers.copy()
-            powers2.remove(power)
-            for game in self._assign_some_powers(players.copy(), powers2):
-                game.add(pair)
-                result.append(game)
-        return result
+        return sum([self.powers_played[self._index(player)][self._power_index[power]]
+                    for player, power in game])
+
+    def _power_cost(self, game):
+        """
+        Returns the lowest possible total number of times that the players
+        in game (a list or set of player indices) have already played the
+        powers they are assigned.
+        """
+        costs = [self.powers_played[i] for i in game]
+        assignment = min_cost_assignment(costs)
+        return sum([row[j] for row, j in zip(costs, assignment)])
 
     def _assign_powers(self, game):
         """
@@ -293,24 +1007,34 @@ class GameSeeder:
         a list of "issues".
         game is a set of players.
         """
-        # Try every combination of power assignments in a random order,
-        # and keep the best
-        best_fitness = 99999
+        # Find the assignment with the fewest repeated powers,
+        # picking randomly between equally good assignments
         player_list = list(game)
-        power_list = list(self.powers)
-        random.shuffle(player_list)
-        games = self._assign_some_powers(player_list, power_list)
-        for g in games:
-            score = self._power_fitness(g)
-            if score < best_fitness:
-                best_fitness = score
-                best_result = g
+        costs = [self.powers_played[i] for i in self._indices(player_list)]
+        assignment = random_min_cost_assignment(costs, self.rng)
+        best_result = set()
+        best_fitness = 0
+        for i, player in enumerate(player_list):
+            best_result.add((player, self.powers[assignment[i]]))
+            best_fitness += costs[i][assignment[i]]
         issues = []
         if best_fitness > 0:
             issues.append(_('Game has %(num)d player(s) who have already played their power') % {'num': best_fitness})
         return best_result, issues
 
-    def _fitness_score(self, game, games_played_matrix=None):
+    def _game_fitness(self, game):
+        """
+        Returns a fitness score (0-??) for a game. Lower is better.
+        In this case, a game is a list or set of player indices.
+        The value returned is twice the square of the number of times each pair
+        of players has played together already.
+        """
+        matrix = self.games_played_matrix
+        # Sum the number of times each pair of players has played together
+        # (players have never played themselves, so we can include those)
+        return sum([matrix[p][q] ** 2 for p in game for q in game])
+
+    def _fitness_score(self, game):
         """
         Returns a fitness score (0-??) for a game. Lower is better.
         In this case, a game is just a set of seven players.
@@ -319,25 +1043,14 @@ class GameSeeder:
         game is a set of players (player can be any type as long as it's the
         same in all calls to this object).
         """
-        if games_played_matrix is None:
-            games_played_matrix = self.games_played_matrix
-        f = 0
-        # Sum the number of times each pair of players has played together
-        for p in game:
-            for q in game:
-                if p != q:
-                    try:
-                        f += (games_played_matrix[p][q] ** 2)
-                    except KeyError:
-                        # These players have not played each other
-                        pass
-        return f
+        return self._game_fitness(self._indices(game))
 
     def _assign_players_to_games_randomly(self, players):
         """
         Assign all the players provided to games completely at random, with no
         weighting.
-        Returns a list of sets of players.
+        players is a list of player indices.
+        Returns a list of sets of player indices.
         len(players) must be a multiple of the number of powers.
         Raises _AssignmentFailed if the algorithm messes up.
         """
@@ -349,7 +1062,7 @@ class GameSeeder:
                 # We have just seven players left, but not seven unique players
                 raise _AssignmentFailed
             # Pick a random player to add to the current game
-            p = random.choice(list(players))
+            p = self.rng.choice(list(players))
             if p in game:
                 # This player is no good
                 continue
@@ -361,60 +1074,108 @@ class GameSeeder:
                 game = set()
         return res
 
-    def _set_fitness(self, games, include_these_games=False):
+    def _seeding_fitness(self, games, include_these_games=False):
         """
         Calculate a total fitness score for this set of games.
+        games is a list of sets of player indices.
         Range is 0-(42 * len(games)). Lower is better.
         If include_these_games is True, add in a fitness score
         for the games in this set. This helps keeps players
         playing two games apart but is more work
+        While seed_games_and_powers() is taking powers into account, the cost
+        of the best power assignment for each game, times power_weight,
+        is added too.
         """
         fitness = 0
-        matrix = {}
+        # Dict, keyed by (player index, player index) 2-tuple,
+        # of integer counts of earlier games in this set
+        shared = {}
         for g in games:
+            fitness += self._game_fitness(g)
+            if self._with_powers:
+                fitness += self.power_weight * self._power_cost(g)
             if include_these_games:
-                for player in g:
-                    if player not in matrix:
-                        matrix[player] = {}
-            fitness += self._fitness_score(g, self.games_played_matrix)
-            if include_these_games:
-                fitness += self._fitness_score(g, matrix)
-                self._add_played_game(g, matrix)
+                for pair in itertools.permutations(g, 2):
+                    n = shared.get(pair, 0)
+                    fitness += n ** 2
+                    shared[pair] = n + 1
         return fitness
 
-    def _improve_fitness(self, games, include_these_games=False):
+    def _set_fitness(self, games, include_these_games=False):
+        """
+        Calculate a total fitness score for this set of games.
+        games is a list of sets of players.
+        Range is 0-(42 * len(games)). Lower is better.
+        If include_these_games is True, add in a fitness score
+        for the games in this set. This helps keeps players
+        playing two games apart but is more work
+        """
+        return self._seeding_fitness([self._indices(g) for g in games],
+                                     include_these_games)
+
+    def _improve_fitness(self, games, include_these_games=False, end=None):
         """
         Try swapping random players between games to see if we can improve the
         overall fitness score.
+        games is a list of sets of player indices.
         Returns the best set of games it finds and the fitness score
         for that set.
         If include_these_games is True, add in a fitness score
         for the games in this set. This helps keeps players
         playing two games apart but is more work
+        end is an optional time.monotonic() value at which to stop early.
         """
-        best_set = copy.deepcopy(games)
-        best_fitness = self._set_fitness(games, include_these_games)
+        search = _SwapSearch(self, games, include_these_games)
         # The more iterations, the better the result, but the longer it takes
-        for _ in range(self.iterations):
+        for i in range(self.iterations):
+            if (i % _CHECK_EVERY == 0) and self._time_up(end):
+                break
+            self._iterations_done += 1
             # Try swapping a random player between two random games
-            g1 = random.choice(games)
-            g2 = random.choice(games)
-            p1 = g1.pop()
-            p2 = g2.pop()
-            if (p1 in g2) or (p2 in g1):
+            swap = search.random_swap()
+            if swap is None:
                 # Don't try to create games with players playing themselves
-                g1.add(p1)
-                g2.add(p2)
                 continue
-            g1.add(p2)
-            g2.add(p1)
-            fitness = self._set_fitness(games, include_these_games)
-            if fitness < best_fitness:
-                #print("Improving fitness from %d to %d" % (best_fitness, fitness))
-                #print(games)
-                best_fitness = fitness
-                best_set = copy.deepcopy(games)
-        return best_set, best_fitness
+            search.swap(*swap)
+        return search.best()
+
+    def _temperatures(self):
+        """
+        Generator for the annealing temperature for each iteration.
+        """
+        if self.iterations < 2:
+            cooling = 1.0
+        else:
+            cooling = (self.final_temperature / self.initial_temperature) ** (1.0 / (self.iterations - 1))
+        t = self.initial_temperature
+        for _ in range(self.iterations):
+            yield t
+            t *= cooling
+
+    def _anneal(self, games, include_these_games=False, end=None):
+        """
+        Try swapping random players between games, accepting swaps that make
+        the overall fitness worse with a probability that falls as the
+        temperature drops.
+        games is a list of sets of player indices.
+        Returns the best set of games it finds and the fitness score
+        for that set.
+        If include_these_games is True, add in a fitness score
+        for the games in this set.
+        end is an optional time.monotonic() value at which to stop early.
+        """
+        search = _SwapSearch(self, games, include_these_games)
+        for i, t in enumerate(self._temperatures()):
+            if (i % _CHECK_EVERY == 0) and self._time_up(end):
+                break
+            self._iterations_done += 1
+            swap = search.random_swap()
+            if swap is None:
+                continue
+            delta = search.swap_delta(*swap)
+            if (delta <= 0) or (self.rng.random() < math.exp(-delta / t)):
+                search.swap(*swap, delta=delta)
+        return search.best()
 
     def _assign_players_wrapper(self, players):
         """
@@ -431,70 +1192,47 @@ class GameSeeder:
                 pass
         return res
 
-    def _all_possible_seedings(self, players):
+    def _exhaustive_seeding(self, players, include_these_games, end=None, progress=None):
         """
-        Returns a list of all possible seedings (each being a list of sets of
-        players).
-        It will also include seedings with the same games in different orders.
-        Note that this will take a long time for large numbers of players.
+        Returns the best possible (seeding, fitness) 2-tuple for players,
+        the number of complete seedings that were scored, and whether
+        time ran out before the search was complete.
+        players is a list of player indices.
+        end is an optional time.monotonic() value. Once it has passed,
+        the best seeding found so far is returned.
+        progress is an optional callable, called with the fitness score and
+        the number of iterations so far each time a better seeding is found.
         Raises _AssignmentFailed if no valid games can be formed from the
         specified players.
         """
         if len(players) % self.num_powers != 0:
             raise InvalidPlayerCount("%d is not an exact multiple of %d"
                                      % (len(players), self.num_powers))
-        if len(set(players)) < self.num_powers:
-            # We've ended up with a group of players that we can't make a valid game from
-            raise _AssignmentFailed
-        if len(players) == self.num_powers:
-            # With this number of players, there is exactly one possible game,
-            # and therefore exactly one possible seeding
-            return [[set(players)]]
-        res = []
-        # Go through all possible combinations for the first game:
-        for t in itertools.combinations(players, self.num_powers):
-            game = set(t)
-            if len(game) != self.num_powers:
-                # Can't have any players playing themselves
-                continue
-            # Make a copy of players, and remove the players in game
-            p2 = players.copy()
-            for p in game:
-                p2.remove(p)
-            # Now we can create each possible set that includes this game
-            try:
-                for s in self._all_possible_seedings(p2):
-                    s.append(game)
-                    res.append(s)
-            except _AssignmentFailed:
-                # No possible valid games with the remaining players
-                continue
-        return res
+        search = _ExhaustiveSearch(self, players, include_these_games, end)
+        best = None
+        # Each seeding is better than the last
+        for best in search.improvements():
+            self._report(best, search.iterations, progress)
+        return best, search.seedings, search.timed_out
 
     def _player_pool(self, omitting_players, players_doubling_up):
         """
-        Returns a list of players containing every known player and every
+        Returns a list of player indices containing every known player and every
         player doubling up, but excluding any players in omitting_players.
         """
         # Come up with a list of players to draw from
-        players = list(self.games_played_matrix.keys())
-        # Check the players_doubling_up list
-        for p in players_doubling_up:
-            if p not in players:
-                raise InvalidPlayer(str(p))
+        players = list(range(len(self.players)))
         # Add in any duplicate players
-        players += list(players_doubling_up)
+        players += self._indices(players_doubling_up)
         # And omit any who aren't playing this round
-        for p in omitting_players:
-            if p not in players:
-                raise InvalidPlayer(str(p))
-            players.remove(p)
+        for i in self._indices(omitting_players):
+            players.remove(i)
         return players
 
-    def _seed_games(self, omitting_players, players_doubling_up):
+    def _playing_pool(self, omitting_players, players_doubling_up):
         """
-        Returns a list of games, where each game is a set of players, and the
-        fitness score for the set.
+        Returns the list of player indices to seed into games, as for
+        _player_pool(), having checked that it can be seeded.
         omitting_players is a set of previously-added players not to assign
         to games.
         players_doubling_up is an optional set of previously-added players to
@@ -503,40 +1241,277 @@ class GameSeeder:
         players_doubling_up is unknown.
         Can raise InvalidPlayerCount if the resulting number of players isn't
         an exact multiple of the number of powers.
+        Can raise ImpossibleToSeed if players are doubling up but there
+        aren't enough players for two games.
         """
         players = self._player_pool(omitting_players, players_doubling_up)
         if not players:
-            return [], 0
+            return players
         # Check that we have a multiple of seven players
         if len(players) % self.num_powers != 0:
             raise InvalidPlayerCount("%d total plus %d duplicated minus %d omitted"
-                                     % (len(self.games_played_matrix),
+                                     % (len(self.players),
                                         len(players_doubling_up),
                                         len(omitting_players)))
         # If any players are playing two games, there must be at least two games
         if players_doubling_up:
             if len(players) < 2 * self.num_powers:
                 raise ImpossibleToSeed("%d total plus %d duplicated minus %d omitted"
-                                       % (len(self.games_played_matrix),
+                                       % (len(self.players),
                                           len(players_doubling_up),
                                           len(omitting_players)))
+        return players
+
+    def _seed_games(self, players, include_these_games, improve, end=None):
+        """
+        Returns a list of games, where each game is a set of player indices,
+        and the fitness score for the set.
+        players is a list of player indices, as returned by _playing_pool().
+        If include_these_games is True, players sharing more than one of the
+        games count against the fitness score.
+        If improve is False, any seeding is as good as any other, so a random
+        seeding is returned.
+        end is an optional time.monotonic() value at which to stop improving
+        the seeding.
+        """
+        if not players:
+            return [], 0
         res = self._assign_players_wrapper(players)
         # There's no point iterating if all solutions have a fitness of zero
-        if self.games_played or (len(players_doubling_up) > 1):
-            res, fitness = self._improve_fitness(res, include_these_games=(len(players_doubling_up) > 1))
+        if improve:
+            if self.seed_method == SeedMethod.ANNEALING:
+                res, fitness = self._anneal(res, include_these_games, end)
+            else:
+                res, fitness = self._improve_fitness(res, include_these_games, end)
         else:
             fitness = 0
         # Return the resulting list of games
         return res, fitness
 
-    def seed_games_and_powers(self, omitting_players=(), players_doubling_up=()):
+    def _best_seeding(self, players, starts, include_these_games, improve, end=None, progress=None):
+        """
+        Calls _seed_games() starts times, and returns the best
+        (seeding, fitness) 2-tuple.
+        If starts is None, keeps calling _seed_games() until time end
+        (a time.monotonic() value) instead.
+        progress is an optional callable, called with the best fitness score
+        so far and the number of iterations done after each call.
+        """
+        best = None
+        n = 0
+        while (starts is None) or (n < starts):
+            seeding = self._seed_games(players, include_these_games, improve, end)
+            n += 1
+            if (best is None) or (seeding[1] < best[1]):
+                best = seeding
+            self._report(best, self._iterations_done, progress)
+            if (best[1] == 0) or self._time_up(end):
+                # Can't do better, or out of time
+                break
+        return best
+
+    def _plan_rounds(self, players, rounds, include_these_games, end=None, progress=None):
+        """
+        Plans the seeding of rounds rounds together, assuming that the same
+        players play in each of them.
+        Returns the (seeding, fitness) 2-tuple for the first round, where
+        the fitness score is for the whole plan.
+        Each round is first seeded in turn as if the earlier rounds had been
+        played, then players are swapped between games within randomly-chosen
+        rounds, keeping swaps that don't make the plan worse. This is done
+        starts times iterations times rounds times (the same amount of
+        searching as seeding each round in turn), or until time end (a
+        time.monotonic() value) if that isn't None.
+        progress is an optional callable, called with the best fitness score
+        so far and the number of iterations done.
+        """
+        plan = []
+        with_powers = self._with_powers
+        saved = [array('i', row) for row in self.games_played_matrix]
+        try:
+            for r in range(rounds):
+                games, fitness = self._seed_games(players, include_these_games, True, end)
+                plan.append([set(g) for g in games])
+                # Later rounds are seeded as if this one had been played
+                for g in games:
+                    for p1, p2 in itertools.permutations(g, 2):
+                        self.games_played_matrix[p1][p2] += 1
+                # Powers in later rounds depend on the earlier rounds
+                self._with_powers = False
+        finally:
+            self.games_played_matrix = saved
+            self._with_powers = with_powers
+        search = _PlanSearch(self, plan)
+        self._report((search.first_round(), search.fitness), self._iterations_done, progress)
+        reported = search.fitness
+        swaps = None if end is not None else self.starts * self.iterations * rounds
+        i = 0
+        while ((swaps is None) or (i < swaps)) and (search.fitness > 0):
+            if i % _CHECK_EVERY == 0:
+                if self._time_up(end):
+                    break
+                if search.fitness < reported:
+                    self._report((search.first_round(), search.fitness),
+                                 self._iterations_done,
+                                 progress)
+                    reported = search.fitness
+            i += 1
+            self._iterations_done += 1
+            swap = search.random_swap()
+            if swap is None:
+                continue
+            delta = search.swap_delta(*swap)
+            if delta <= 0:
+                search.swap(*swap, delta=delta)
+        plan, fitness = search.best()
+        best = (plan[0], fitness)
+        self._report(best, self._iterations_done, progress)
+        return best
+
+    def _report(self, best, iterations, progress):
+        """
+        Records best, the best (seeding, fitness) 2-tuple found so far,
+        for best_so_far(), and calls progress (if any) with its fitness score
+        and iterations.
+        """
+        self._best = best
+        if progress:
+            progress(best[1], iterations)
+
+    def _time_up(self, end):
+        """
+        Should the search stop now?
+        True if stop() has been called or end (a time.monotonic() value,
+        or None for no deadline) has passed.
+        """
+        if self._stop_requested:
+            return True
+        if (self._stop_event is not None) and self._stop_event.is_set():
+            return True
+        return _expired(end)
+
+    def stop(self):
+        """
+        Asks the seed_games() call in progress (or the next one, if none is
+        in progress) to finish as soon as it can, returning the best seeding
+        found so far.
+        Intended to be called from another thread.
+        """
+        self._stop_requested = True
+        stop_event = self._stop_event
+        if stop_event is not None:
+            # Let any worker processes know, too
+            stop_event.set()
+
+    def best_so_far(self, with_powers=False):
+        """
+        Returns the best seeding found so far by the seed_games() call in
+        progress (or the last one), or None if there isn't one yet.
+        The seeding is returned in the same form as from seed_games(), or from
+        seed_games_and_powers() if with_powers is True.
+        Intended to be called from another thread, but with_powers should
+        only be True once the seeding has finished, because assigning powers
+        uses the same random number generator as the seeding.
+        """
+        best = self._best
+        if best is None:
+            return None
+        games = [self._players(g) for g in best[0]]
+        if with_powers:
+            return [self._assign_powers(g) for g in games]
+        return games
+
+    def _worker_copy(self):
+        """
+        Returns a copy of the GameSeeder with just the state needed to
+        seed games in a worker process.
+        """
+        seeder = copy.copy(self)
+        # Workers only deal with player indices,
+        # so don't send them the players (or powers) themselves
+        seeder.players = []
+        seeder._player_index = {}
+        seeder.powers = []
+        seeder._power_index = {}
+        seeder.played_games = []
+        seeder._best = None
+        # The workers are given the Event in _init_worker()
+        seeder._stop_event = None
+        return seeder
+
+    def _parallel_seedings(self, players, starts, include_these_games, end=None, progress=None):
+        """
+        Spreads starts calls to _seed_games() between processes worker
+        processes.
+        If starts is None, each worker instead keeps going until time end
+        (a time.monotonic() value).
+        progress is an optional callable, called with the best fitness score
+        so far and the number of iterations done as each worker finishes.
+        Returns a list of (seeding, fitness) 2-tuples, being the best
+        seeding from each process.
+        """
+        if starts is None:
+            chunks = [None] * self.processes
+        else:
+            workers = min(self.processes, starts)
+            # Spread the starts as evenly as possible
+            chunks = [starts // workers + (1 if n < starts % workers else 0) for n in range(workers)]
+        self._stop_event = multiprocessing.Event()
+        if self._stop_requested:
+            # stop() was called before there was an Event to set
+            self._stop_event.set()
+        try:
+            return self._run_workers(chunks, players, include_these_games, end, progress)
+        finally:
+            self._stop_event = None
+
+    def _run_workers(self, chunks, players, include_these_games, end, progress):
+        """
+        Does the work for _parallel_seedings(), with one worker process for
+        each entry in chunks, which is the starts for that worker
+        (or None to keep going until time end).
+        """
+        # Each worker gets a copy of the seeder state when it starts up
+        with ProcessPoolExecutor(max_workers=len(chunks),
+                                 initializer=_init_worker,
+                                 initargs=(self._worker_copy(), self._stop_event)) as executor:
+            # Give each worker its own random number sequence
+            futures = [executor.submit(_seed_in_worker,
+                                       players,
+                                       n,
+                                       include_these_games,
+                                       self.rng.getrandbits(64),
+                                       end) for n in chunks]
+            results = []
+            for f in as_completed(futures):
+                seeding, iterations = f.result()
+                results.append(seeding)
+                self._iterations_done += iterations
+                self._report(min(results, key=itemgetter(1)), self._iterations_done, progress)
+            # In the order the workers were started, so that the choice
+            # between equally good seedings doesn't depend on timing
+            return [f.result()[0] for f in futures]
+
+    def seed_games_and_powers(self,
+                              omitting_players=(),
+                              players_doubling_up=(),
+                              deadline=None,
+                              progress=None,
+                              rounds=1):
         """
         Returns a list of games, where each game is a 2-tuple containing a set of
         (player, power) 2-tuples and a list of issues.
+        If the GameSeeder has a power_weight, players playing powers they have
+        already played count against each seeding, as well as players
+        meeting again.
         Parameters and exceptions are the same as seed_games()
         """
         result = list()
-        games = self.seed_games(omitting_players, players_doubling_up)
+        self._with_powers = (self.power_weight > 0) and (self.seed_method != SeedMethod.EXHAUSTIVE)
+        try:
+            games = self.seed_games(omitting_players, players_doubling_up, deadline, progress, rounds)
+        finally:
+            self._with_powers = False
         for game in games:
             result.append(self._assign_powers(game))
         return result
@@ -554,7 +1529,12 @@ class GameSeeder:
         for (p1, p2) in itertools.combinations(players_doubling_up, 2):
             self._add_bias(p1, p2, w)
 
-    def seed_games(self, omitting_players=(), players_doubling_up=()):
+    def seed_games(self,
+                   omitting_players=(),
+                   players_doubling_up=(),
+                   deadline=None,
+                   progress=None,
+                   rounds=1):
         """
         Returns a list of games, where each game is a set of players.
         omitting_players is an optional set of previously-added players not to
@@ -563,50 +1543,106 @@ class GameSeeder:
         assign to two games each.
         Internally, this will generate the number of sets specified when the
         class was instantiated, and return the best one.
+        deadline is an optional time limit in seconds. If provided, new sets
+        are generated until the time is up (rather than the number specified
+        when the class was instantiated), and the best found so far is
+        returned. With EXHAUSTIVE seed_method, the best seeding found so far
+        is returned when the time is up.
+        progress is an optional callable that will be called with the best
+        fitness score found so far and the number of iterations done so far,
+        as the search progresses.
+        rounds is the number of rounds still to be played, including this one.
+        If it is more than one, the seeding of all those rounds is planned
+        together, assuming that the same players play in each of them, so
+        that this round doesn't leave repeat meetings that later rounds can't
+        avoid. Only this round's seeding is returned, and the fitness score is
+        then for the whole plan. The planning isn't spread between worker
+        processes, and rounds is ignored with EXHAUSTIVE seed_method.
         Can raise InvalidPlayer if any player in omitting_players is unknown.
         Can raise InvalidPlayerCount if the resulting number of players isn't
         an exact multiple of the number of powers.
         Can raise ImpossibleToSeed if no valid seeding is possible.
         """
+        end = None
+        if deadline is not None:
+            end = time.monotonic() + deadline
+        self._iterations_done = 0
+        self._best = None
         # Add temporary bias to keep players_doubling_up apart
         self._add_bias_for_doublers(players_doubling_up, add=True)
         try:
             # Generate the specified number of seedings
             # Use the random method if no games have been played yet and at most
             # one player is playing two games, because any seeding is fine
-            if ((not self.games_played) and (len(players_doubling_up) < 2)) or (self.seed_method == SeedMethod.RANDOM):
-                seedings = []
+            if (((not self.games_played) and (len(players_doubling_up) < 2))
+                    or (self.seed_method in (SeedMethod.RANDOM, SeedMethod.ANNEALING))):
+                players = self._playing_pool(omitting_players, players_doubling_up)
+                include_these_games = len(players_doubling_up) > 1
                 # No point generating multiples if they're all equally good
+                improve = self.games_played or include_these_games
                 starts = 1
-                if self.games_played or (len(players_doubling_up) > 1):
-                    starts = self.starts
-                for _ in range(starts):
-                    # This gives us a list of 2-tuples with (seeding, fitness)
-                    seedings.append(self._seed_games(omitting_players,
-                                                     players_doubling_up))
+                if improve:
+                    # None means "until the deadline"
+                    starts = self.starts if end is None else None
+                # Plan the remaining rounds together, if there's any point
+                planning = (bool(improve and players) and (rounds > 1)
+                            and (self.seed_method != SeedMethod.EXHAUSTIVE))
+                # This gives us a list of 2-tuples with (seeding, fitness)
+                if planning:
+                    seedings = [self._plan_rounds(players,
+                                                  rounds,
+                                                  include_these_games,
+                                                  end,
+                                                  progress)]
+                elif (self.processes > 1) and ((starts is None) or (starts > 1)) and players:
+                    seedings = self._parallel_seedings(players,
+                                                       starts,
+                                                       include_these_games,
+                                                       end,
+                                                       progress)
+                else:
+                    seedings = [self._best_seeding(players,
+                                                   starts,
+                                                   include_these_games,
+                                                   improve,
+                                                   end,
+                                                   progress)]
+                if planning:
+                    count_str = "%d iterations, planning %d rounds" % (self._iterations_done, rounds)
+                elif starts is None:
+                    count_str = "%d iterations" % self._iterations_done
+                else:
+                    count_str = "%d seedings" % starts
             elif self.seed_method == SeedMethod.EXHAUSTIVE:
                 players = self._player_pool(omitting_players, players_doubling_up)
-                seedings = []
                 try:
-                    for s in self._all_possible_seedings(players):
-                        fitness = self._set_fitness(s, include_these_games=(len(players_doubling_up) > 1))
-                        seedings.append((s, fitness))
+                    best, count, timed_out = self._exhaustive_seeding(players,
+                                                                      (len(players_doubling_up) > 1),
+                                                                      end,
+                                                                      progress)
                 except _AssignmentFailed as e:
-                    # Remove temporary bias
-                    self._add_bias_for_doublers(players_doubling_up, add=False)
                     raise ImpossibleToSeed from e
+                seedings = [best]
+                count_str = "%d seedings" % count
+                if timed_out:
+                    count_str += " (stopped at deadline)"
             # Sort them by fitness
             seedings.sort(key=itemgetter(1))
             if self.seed_method == SeedMethod.RANDOM:
                 bg_str = "With starts=%d and iterations=%d" % (self.starts,
                                                                self.iterations)
+            elif self.seed_method == SeedMethod.ANNEALING:
+                bg_str = "With annealing, starts=%d and iterations=%d" % (self.starts,
+                                                                          self.iterations)
             else:
                 bg_str = "With Exhaustive seeding"
-            print("%s, best fitness score is %d in %d seedings" % (bg_str,
-                                                                   seedings[0][1],
-                                                                   len(seedings)))
+            print("%s, best fitness score is %d in %s" % (bg_str,
+                                                          seedings[0][1],
+                                                          count_str))
+            self.last_fitness = seedings[0][1]
         finally:
+            self._stop_requested = False
             # Remove temporary bias
             self._add_bias_for_doublers(players_doubling_up, add=False)
         # Return the best (we don't care if multiple seedings are equally good)
-        return seedings[0][0]
+        return [self._players(g) for g in seedings[0][0]]
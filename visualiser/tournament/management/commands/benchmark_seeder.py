@@ -0,0 +1,146 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Report how fast the game seeder is, and how good its seedings are,
+for synthetic tournaments of various sizes.
+"""
+
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.game_seeder import SeedMethod
+from tournament.seeder_benchmark import DEFAULT_CONFIGS, MIXED, MODES
+from tournament.seeder_benchmark import SyntheticTournament, run_benchmark
+
+
+def _config(value):
+    """
+    Parse a METHOD[:STARTS:ITERATIONS] command-line value into a
+    (seed method, starts, iterations) 3-tuple.
+    """
+    parts = value.split(':')
+    try:
+        method = SeedMethod[parts[0].upper()]
+        if method == SeedMethod.EXHAUSTIVE:
+            if len(parts) != 1:
+                raise ValueError
+            return method, None, None
+        starts, iterations = [int(p) for p in parts[1:]]
+    except (KeyError, ValueError):
+        raise CommandError('Invalid config %s - expected METHOD[:STARTS:ITERATIONS]' % value)
+    return method, starts, iterations
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the game seeder against synthetic tournaments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players',
+                            type=int,
+                            nargs='+',
+                            default=[14, 21, 28, 49, 105, 196, 350],
+                            help='Numbers of players to try')
+        parser.add_argument('--rounds',
+                            type=int,
+                            nargs='+',
+                            default=[3, 7],
+                            help='Numbers of rounds to try (1-7)')
+        parser.add_argument('--config',
+                            type=_config,
+                            action='append',
+                            help='Seeding to try, as RANDOM:STARTS:ITERATIONS, ANNEALING:STARTS:ITERATIONS or EXHAUSTIVE. May be repeated')
+        parser.add_argument('--mode',
+                            choices=MODES,
+                            default=MIXED,
+                            help='Whether to make up the numbers with players sitting out, playing two games, or a mix')
+        parser.add_argument('--biases',
+                            type=int,
+                            default=None,
+                            help='Number of pairs of players to keep apart (default one per 14 players)')
+        parser.add_argument('--absent',
+                            type=int,
+                            default=0,
+                            help='Maximum number of extra players to sit out each round')
+        parser.add_argument('--deadline',
+                            type=float,
+                            help='Time limit in seconds for seeding each round')
+        parser.add_argument('--processes',
+                            type=int,
+                            default=1,
+                            help='Number of worker processes for the seeder to use')
+        parser.add_argument('--lookahead',
+                            action='store_true',
+                            help='Also try planning all the remaining rounds when seeding each round')
+        parser.add_argument('--power-weight',
+                            type=int,
+                            default=0,
+                            help='How much repeated powers count against a seeding, compared to repeated pairings')
+        parser.add_argument('--exhaustive-limit',
+                            type=int,
+                            default=28,
+                            help='Largest number of players to try EXHAUSTIVE seeding with')
+        parser.add_argument('--seed',
+                            type=int,
+                            default=0,
+                            help='Seed for the random number generators')
+
+    def handle(self, *args, **options):
+        configs = options['config'] or DEFAULT_CONFIGS
+        for r in options['rounds']:
+            if not 1 <= r <= 7:
+                raise CommandError('Rounds must be between 1 and 7')
+        lookaheads = [False, True] if options['lookahead'] else [False]
+        self.stdout.write('%7s %6s %10s %6s %10s %9s %9s %9s %8s %7s %6s %5s'
+                          % ('Players', 'Rounds', 'Method', 'Starts', 'Iterations', 'Lookahead',
+                             'Time (s)', 'Max (s)', 'Fitness', 'Repeats', 'Powers', 'Bias'))
+        for num_players in options['players']:
+            biases = options['biases']
+            if biases is None:
+                biases = num_players // 14
+            for num_rounds in options['rounds']:
+                tournament = SyntheticTournament(num_players,
+                                                 num_rounds,
+                                                 options['mode'],
+                                                 biases,
+                                                 options['absent'],
+                                                 options['seed'])
+                for (method, starts, iterations), lookahead in itertools.product(configs, lookaheads):
+                    if (method == SeedMethod.EXHAUSTIVE) and (num_players > options['exhaustive_limit']):
+                        continue
+                    result = run_benchmark(tournament,
+                                           method,
+                                           starts,
+                                           iterations,
+                                           options['deadline'],
+                                           options['processes'],
+                                           options['seed'],
+                                           lookahead,
+                                           options['power_weight'])
+                    self.stdout.write('%7d %6d %10s %6s %10s %9s %9.3f %9.3f %8d %7d %6d %5d'
+                                      % (num_players,
+                                         num_rounds,
+                                         method.name,
+                                         '-' if starts is None else starts,
+                                         '-' if iterations is None else iterations,
+                                         'Yes' if lookahead else 'No',
+                                         result['time'],
+                                         result['max_round_time'],
+                                         result['fitness'],
+                                         result['repeats'],
+                                         result['power_repeats'],
+                                         result['bias_meetings']))
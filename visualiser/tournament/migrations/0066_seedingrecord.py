@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 05:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0065_merge_20220916_1809'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedingRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('seed', models.BigIntegerField(help_text='Random number generator seed')),
+                ('seed_method', models.CharField(max_length=20)),
+                ('starts', models.PositiveIntegerField(blank=True, null=True)),
+                ('iterations', models.PositiveIntegerField(blank=True, null=True)),
+                ('processes', models.PositiveSmallIntegerField(default=1)),
+                ('deadline', models.FloatField(blank=True, help_text='Time limit in seconds', null=True)),
+                ('fitness', models.IntegerField(blank=True, help_text='Lower is better', null=True)),
+                ('seeding', models.TextField(help_text='The players in each game, one game per line')),
+                ('the_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.Round', verbose_name='round')),
+            ],
+            options={
+                'ordering': ['the_round', 'created'],
+            },
+        ),
+    ]
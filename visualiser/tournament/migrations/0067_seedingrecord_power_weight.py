@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0066_seedingrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seedingrecord',
+            name='power_weight',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
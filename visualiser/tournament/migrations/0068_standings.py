@@ -0,0 +1,50 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0067_seedingrecord_power_weight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='standings_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='standings_stale',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.CreateModel(
+            name='TournamentStanding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('position', models.PositiveIntegerField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.Player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.Tournament')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('tournament', 'player')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RoundStanding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.Player')),
+                ('the_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.Round', verbose_name='round')),
+            ],
+            options={
+                'unique_together': {('the_round', 'player')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+
+def number_rounds(apps, schema_editor):
+    Round = apps.get_model('tournament', 'Round')
+    Tournament = apps.get_model('tournament', 'Tournament')
+    for t in Tournament.objects.all():
+        for n, r in enumerate(Round.objects.filter(tournament=t).order_by('start'), 1):
+            r.ordinal = n
+            r.save(update_fields=['ordinal'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0068_standings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='round',
+            index=models.Index(fields=['tournament', 'ordinal'], name='tournament__tournam_d30a96_idx'),
+        ),
+        migrations.RunPython(number_rounds, migrations.RunPython.noop),
+    ]
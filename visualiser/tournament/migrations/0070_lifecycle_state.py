@@ -0,0 +1,52 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+def set_states(apps, schema_editor):
+    Tournament = apps.get_model('tournament', 'Tournament')
+    Round = apps.get_model('tournament', 'Round')
+    Game = apps.get_model('tournament', 'Game')
+    RoundPlayer = apps.get_model('tournament', 'RoundPlayer')
+    for t in Tournament.objects.all():
+        states = []
+        for r in Round.objects.filter(tournament=t).order_by('start'):
+            finished = list(Game.objects.filter(the_round=r).values_list('is_finished', flat=True))
+            if finished and all(finished):
+                r.state = 'F'
+            elif finished or RoundPlayer.objects.filter(the_round=r).exists():
+                r.state = 'P'
+            else:
+                r.state = 'N'
+            r.save(update_fields=['state'])
+            states.append(r.state)
+        if not states:
+            t.state = 'N'
+        elif all(state == 'F' for state in states):
+            t.state = 'F'
+        elif ('P' in states) or (states[0] == 'F'):
+            t.state = 'P'
+        else:
+            t.state = 'N'
+        t.save(update_fields=['state'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0069_round_ordinal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='round',
+            name='state',
+            field=models.CharField(choices=[('N', 'Not started'), ('P', 'In progress'), ('F', 'Finished')], default='N', editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='state',
+            field=models.CharField(choices=[('N', 'Not started'), ('P', 'In progress'), ('F', 'Finished')], default='N', editable=False, max_length=1),
+        ),
+        migrations.RunPython(set_states, migrations.RunPython.noop),
+    ]
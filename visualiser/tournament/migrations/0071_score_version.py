@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 07:05
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0070_lifecycle_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='score_version',
+            field=models.UUIDField(default=uuid.uuid4, editable=False),
+        ),
+    ]
@@ -19,6 +19,8 @@ Django models file for the Diplomacy Tournament Visualiser.
 """
 
 from abc import ABC, abstractmethod
+from collections import defaultdict
+import heapq
 import inspect
 from operator import itemgetter
 import os
@@ -29,13 +31,16 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models import Sum, Max
+from django.db.models import Sum, Max, Q, Subquery
+from django.db.models.signals import post_save, post_delete
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.utils.translation import ngettext
 
 from tournament import backstabbr
+from tournament import score_cache
+from tournament.assignment import random_min_cost_assignment
 
 from tournament.backstabbr import InvalidGameUrl
 from tournament.background import WDD_BASE_URL
@@ -53,7 +58,7 @@ from tournament.game_scoring import G_SCORING_SYSTEMS, GameScoringSystem
 from tournament.players import Player, add_player_bg
 from tournament.players import MASK_ALL_BG, MASK_ROUND_ENDPOINTS
 from tournament.players import validate_wdd_tournament_id
-from tournament.tournament_game_state import TournamentGameState
+from tournament.tournament_game_state import TournamentGameState, game_states
 
 SPRING = 'S'
 FALL = 'F'
@@ -62,6 +67,16 @@ SEASONS = (
     (FALL, _('fall')),
 )
 
+# Lifecycle states of Tournaments and Rounds
+NOT_STARTED = 'N'
+IN_PROGRESS = 'P'
+FINISHED = 'F'
+STATES = (
+    (NOT_STARTED, _('Not started')),
+    (IN_PROGRESS, _('In progress')),
+    (FINISHED, _('Finished')),
+)
+
 
 class InvalidScoringSystem(Exception):
     """The specified scoring systm name is not recognised"""
@@ -95,6 +110,117 @@ class InvalidPowerAssignmentMethod(Exception):
     pass
 
 
+def game_scores(games, force_recalculation=False):
+    """
+    Returns the scores for all the Games.
+    Equivalent to calling Game.scores(force_recalculation) for each Game,
+    but reads everything from the database with a handful of queries,
+    rather than several queries per Game.
+    Return value is a dict, keyed by Game, of dicts, keyed by GreatPower, of scores.
+    """
+    games = list(games)
+    retval = {}
+    to_score = []
+    for g in games:
+        if not force_recalculation and g.is_finished:
+            retval[g] = {}
+        else:
+            to_score.append(g)
+    if len(to_score) < len(games):
+        # Dict, keyed by Game pk, of Game
+        finished = {g.pk: g for g in games if g in retval}
+        for gp in GamePlayer.objects.filter(game__in=finished.keys()).select_related('power'):
+            retval[finished[gp.game_id]][gp.power] = gp.score
+    # Calculate the scores using the ScoringSystem for each Round
+    # Dict, keyed by Round pk, of GameScoringSystem
+    systems = {}
+    for r in Round.objects.filter(game__in=to_score).distinct():
+        systems[r.pk] = r.game_scoring_system_obj()
+    for g, tgs in game_states(to_score).items():
+        retval[g] = systems[g.the_round_id].scores(tgs)
+    return retval
+
+
+def positions_from_scores(t_scores, unranked=()):
+    """
+    Rank the players.
+    t_scores is a dict, keyed by player, of float tournament scores.
+    unranked is an iterable of the players who are flagged as unranked
+    in the tournament. They get the special place Tournament.UNRANKED.
+    Returns a dict, keyed by player, of 2-tuples containing integer
+    rankings (1 for first place, etc) and float tournament scores.
+    """
+    result = {}
+    t_scores = t_scores.copy()
+    # First, deal with any unranked players
+    for p in unranked:
+        # Take it out of scores and add it to result
+        result[p] = (Tournament.UNRANKED, t_scores.pop(p))
+    last_score = None
+    for i, (k, v) in enumerate(sorted([(k, v) for k, v in t_scores.items()],
+                                      key=itemgetter(1),
+                                      reverse=True),
+                               start=1):
+        if v != last_score:
+            place, last_score = i, v
+        result[k] = (place, v)
+    return result
+
+
+def _player_game_scores(game_players):
+    """
+    Returns the game scores of each player in game_players.
+    game_players is a QuerySet of GamePlayers.
+    Reads everything with a fixed number of queries, however many
+    players and games are involved.
+    Return value is a dict, keyed by Player, of lists of scores,
+    one for each game where they were assigned a power.
+    """
+    gps = list(game_players.select_related('player', 'game', 'power'))
+    # Retrieve all the scores of all the games that are involved
+    # This will give us the "if the game ended now" score for in-progress games
+    all_scores = game_scores({gp.game_id: gp.game for gp in gps}.values())
+    retval = {}
+    for gp in gps:
+        p_scores = retval.setdefault(gp.player, [])
+        # Ignore games where they haven't been assigned a power
+        if gp.power is not None:
+            p_scores.append(all_scores[gp.game][gp.power])
+    return retval
+
+
+def _earlier_sit_outs(non_players):
+    """
+    Returns the set of RoundPlayers from non_players whose player also
+    sat out an earlier round of the same tournament.
+    non_players is a list of RoundPlayers.
+    Uses two queries, however many RoundPlayers there are.
+    """
+    if not non_players:
+        return set()
+    t_ids = set(rp.the_round.tournament_id for rp in non_players)
+    p_ids = set(rp.player_id for rp in non_players)
+    # Set of (Player pk, Round pk) 2-tuples where the player played a game
+    played = set(GamePlayer.objects.filter(game__the_round__tournament__in=t_ids,
+                                           player__in=p_ids).values_list('player',
+                                                                         'game__the_round'))
+    # Dict, keyed by (Player pk, Tournament pk), of start times of rounds they sat out
+    sat_out = {}
+    for p_id, r_id, t_id, start in RoundPlayer.objects.filter(the_round__tournament__in=t_ids,
+                                                              player__in=p_ids).values_list('player',
+                                                                                            'the_round',
+                                                                                            'the_round__tournament',
+                                                                                            'the_round__start'):
+        if (p_id, r_id) not in played:
+            sat_out.setdefault((p_id, t_id), []).append(start)
+    retval = set()
+    for rp in non_players:
+        starts = sat_out.get((rp.player_id, rp.the_round.tournament_id), [])
+        if any(start < rp.the_round.start for start in starts):
+            retval.add(rp)
+    return retval
+
+
 class RoundScoringSystem(ABC):
     """
     A scoring system for a Round.
@@ -113,6 +239,22 @@ class RoundScoringSystem(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def scores_from_data(self, game_scores, non_players, repeat_non_players):
+        """
+        Calculate the scores from data that has already been retrieved,
+        without accessing the database.
+        game_scores is a dict, indexed by player key, of lists of the
+            scores of the games they played (empty if they weren't assigned
+            a power in any game).
+        non_players is an iterable of the keys of players who were present
+            but agreed not to play.
+        repeat_non_players is a set of the keys of the players in non_players
+            who also sat out an earlier round of the tournament.
+        Returns a dict, indexed by player key, of scores.
+        """
+        raise NotImplementedError
+
     def __str__(self):
         ret = self.name
         return ret
@@ -147,40 +289,33 @@ class RScoringBest(RoundScoringSystem):
             not to play.
         Return a dict, indexed by player key, of scores.
         """
+        non_players = list(non_players.select_related('player', 'the_round'))
+        repeat_non_players = set()
+        if self.non_player_score_once:
+            repeat_non_players = set(rp.player for rp in _earlier_sit_outs(non_players))
+        return self.scores_from_data(_player_game_scores(game_players),
+                                     [rp.player for rp in non_players],
+                                     repeat_non_players)
+
+    def scores_from_data(self, game_scores, non_players, repeat_non_players):
+        """
+        Take the best game score of each player, as for scores(),
+        from data that has already been retrieved.
+        """
         retval = {}
-        # First retrieve all the scores of all the games that are involved
-        # This will give us the "if the game ended now" score for in-progress games
-        game_scores = {}
-        for g in Game.objects.filter(gameplayer__in=game_players).distinct():
-            game_scores[g] = g.scores()
-        # for each player who played any of the specified games
-        for p in Player.objects.filter(gameplayer__in=game_players).distinct():
-            # Find just their games
-            # filter out games where they haven't been assigned a power
-            player_games = game_players.filter(player=p).filter(power__isnull=False)
+        for p, p_scores in game_scores.items():
             # Find the highest score
-            if player_games.exists():
-                retval[p] = max(game_scores[g.game][g.power] for g in player_games)
+            if p_scores:
+                retval[p] = max(p_scores)
             else:
                 retval[p] = 0.0
         # Give the appropriate points to anyone who agreed to sit out
         for p in non_players:
             # If the "sitting out" bonus is only allowed once and they've sat out multiple rounds, they get zero
-            bonus_already_given = False
-            if self.non_player_score_once:
-                for r in p.the_round.tournament.round_set.all():
-                    if r == p.the_round:
-                        break
-                    rps = RoundPlayer.objects.filter(the_round=r).filter(player=p.player)
-                    gps = GamePlayer.objects.filter(game__the_round=r).distinct().filter(player=p.player)
-                    if rps.exists() and not gps.exists():
-                        # Player also didn't play in this earlier round
-                        bonus_already_given = True
-                        break
-                if bonus_already_given:
-                    retval[p.player] = 0.0
-                    continue
-            retval[p.player] = self.non_player_score
+            if self.non_player_score_once and p in repeat_non_players:
+                retval[p] = 0.0
+                continue
+            retval[p] = self.non_player_score
         return retval
 
     def __str__(self):
@@ -208,25 +343,22 @@ class RScoringAll(RoundScoringSystem):
             not to play.
         Returns a dict, indexed by player key, of scores.
         """
+        return self.scores_from_data(_player_game_scores(game_players),
+                                     [rp.player for rp in non_players.select_related('player')],
+                                     set())
+
+    def scores_from_data(self, game_scores, non_players, repeat_non_players):
+        """
+        Total the game scores of each player, as for scores(),
+        from data that has already been retrieved.
+        """
         retval = {}
-        # First retrieve all the scores of all the games that are involved
-        # This will give us the "if the game ended now" score for in-progress games
-        game_scores = {}
-        for g in Game.objects.filter(gameplayer__in=game_players).distinct():
-            game_scores[g] = g.scores()
-        # for each player who played any of the specified games
-        for p in Player.objects.filter(gameplayer__in=game_players).distinct():
-            # Find just their games
-            # filter out games where they haven't been assigned a power
-            player_games = game_players.filter(player=p).filter(power__isnull=False)
+        for p, p_scores in game_scores.items():
             # Add all game scores
-            if player_games.exists():
-                retval[p] = sum(game_scores[g.game][g.power] for g in player_games)
-            else:
-                retval[p] = 0.0
+            retval[p] = sum(p_scores, 0.0)
         # Give zero to anyone who didn't play
         for p in non_players:
-            retval[p.player] = 0.0
+            retval[p] = 0.0
         return retval
 
 
@@ -248,10 +380,13 @@ class TournamentScoringSystem(ABC):
     name = u''
 
     @abstractmethod
-    def scores_detail(self, round_players):
+    def scores_detail(self, round_players, round_scores=None):
         """
         This is the same as scores(), excpet that it also returns the Round
         scores.
+        round_scores, if provided, is a dict, keyed by round, of dicts,
+        keyed by player, of round scores already calculated for some or
+        all of the rounds.
         Returns a 2-tuple:
         - a dict, indexed by player key, of tournament scores
         - a list, indexed by round, of dicts, indexed by player key,
@@ -259,6 +394,17 @@ class TournamentScoringSystem(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def scores_from_data(self, round_scores):
+        """
+        Calculate the tournament scores from round scores that have
+        already been calculated, without accessing the database.
+        round_scores is a dict, indexed by player key, of lists of the
+            scores of the rounds they played.
+        Returns a dict, indexed by player key, of tournament scores.
+        """
+        raise NotImplementedError
+
     def __str__(self):
         ret = self.name
         return ret
@@ -274,33 +420,43 @@ class TScoringSum(TournamentScoringSystem):
         self.name = name
         self.scored_rounds = scored_rounds
 
-    def scores_detail(self, round_players):
+    def scores_detail(self, round_players, round_scores=None):
         """
         If a player played more than N rounds, sum the best N round scores.
         Otherwise, sum all their round scores.
+        round_scores, if provided, is a dict, keyed by round, of dicts,
+        keyed by player, of round scores to use rather than calculating them.
         Return a 2-tuple:
         - a dict, indexed by player key, of tournament scores
         - a dict, indexed by round, of dicts, indexed by player key,
           of round scores
         """
+        precalculated = round_scores or {}
+        rps = list(round_players.select_related('the_round', 'player'))
         # Retrieve all the scores for all the rounds involved.
         # This will give us "if the round ended now" scores for in-progress round(s)
         round_scores = {}
-        for r in Round.objects.filter(roundplayer__in=round_players).distinct():
-            round_scores[r] = r.scores()
+        for r in {rp.the_round_id: rp.the_round for rp in rps}.values():
+            if r in precalculated:
+                round_scores[r] = precalculated[r]
+            else:
+                round_scores[r] = r.scores()
+        # Dict, keyed by player, of lists of round scores
+        player_scores = {}
+        for rp in rps:
+            player_scores.setdefault(rp.player, []).append(round_scores[rp.the_round][rp.player])
+        return (self.scores_from_data(player_scores), round_scores)
+
+    def scores_from_data(self, round_scores):
+        """
+        Sum the best N round scores of each player, as for scores_detail(),
+        from round scores that have already been calculated.
+        """
         t_scores = {}
-        # for each player who played any of the specified rounds
-        for p in Player.objects.filter(roundplayer__in=round_players).distinct():
-            # Find just their rounds
-            player_rounds = round_players.filter(player=p)
-            # Extract the scores into a sorted list, highest first
-            player_scores = []
-            for r in player_rounds:
-                player_scores.append(round_scores[r.the_round][r.player])
-            player_scores.sort(reverse=True)
-            # Add up the first N
-            t_scores[p] = sum(player_scores[:self.scored_rounds])
-        return (t_scores, round_scores)
+        for p, scores in round_scores.items():
+            # Add up the best N
+            t_scores[p] = sum(heapq.nlargest(self.scored_rounds, scores))
+        return t_scores
 
 
 # All the tournament scoring systems we support
@@ -492,11 +648,50 @@ class Tournament(models.Model):
                               default=FTF)
     no_email = models.BooleanField(default=False,
                                    help_text=_('Check to only generate email to tournament managers'))
+    # Whether the TournamentStandings need to be recalculated
+    standings_stale = models.BooleanField(default=True, editable=False)
+    # Changed whenever anything the scores are calculated from changes. See score_cache
+    score_version = models.UUIDField(default=uuid.uuid4, editable=False)
+    # Derived from the states of the Rounds, maintained by _update_state()
+    state = models.CharField(max_length=1,
+                             choices=STATES,
+                             default=NOT_STARTED,
+                             editable=False)
 
     class Meta:
         ordering = ['-start_date']
         unique_together = ('name', 'start_date')
 
+    def save(self, *args, **kwargs):
+        """
+        Save the object to the database.
+        Ensures that the stored state is correct.
+        """
+        super().save(*args, **kwargs)
+        self._update_state()
+
+    def _update_state(self):
+        """
+        Work out the state of the Tournament from the states of its Rounds,
+        and store it.
+        Must be called whenever a Round is added, removed or changes state.
+        """
+        # Rely on the default ordering
+        states = list(self.round_set.values_list('state', flat=True))
+        # If there are no rounds, the tournament can't have started
+        if not states:
+            self.state = NOT_STARTED
+        elif all(state == FINISHED for state in states):
+            self.state = FINISHED
+        elif IN_PROGRESS in states:
+            self.state = IN_PROGRESS
+        elif states[0] == FINISHED:
+            # First round is finished
+            self.state = IN_PROGRESS
+        else:
+            self.state = NOT_STARTED
+        Tournament.objects.filter(pk=self.pk).update(state=self.state)
+
     def powers_assigned_from_prefs(self):
         """
         Returns True is power_assignment is PREFERENCES.
@@ -540,18 +735,20 @@ class Tournament(models.Model):
             raise InvalidScoringSystem(self.round_scoring_system)
         return system
 
-    def _scores_detail_calculated(self):
+    def _scores_detail_calculated(self, round_scores=None):
         """
         Calculate the scores.
+        round_scores is passed to TournamentScoringSystem.scores_detail().
         Return a 2-tuple:
         - Dict, keyed by player, of float tournament scores.
         - Dict, keyed by round, of dicts, keyed by player,
           of float round scores
         """
         system = self.tournament_scoring_system_obj()
-        t_scores, r_scores = system.scores_detail(RoundPlayer.objects.filter(the_round__tournament=self).distinct())
+        t_scores, r_scores = system.scores_detail(RoundPlayer.objects.filter(the_round__tournament=self).distinct(),
+                                                  round_scores)
         # Now add in anyone who has yet to attend a round
-        for tp in self.tournamentplayer_set.all():
+        for tp in self.tournamentplayer_set.select_related('player'):
             if tp.player not in t_scores:
                 t_scores[tp.player] = 0.0
                 # TODO Do we need to tweak r_scores here, too?
@@ -575,6 +772,12 @@ class Tournament(models.Model):
         - Dict, keyed by round, of dicts, keyed by player,
           of float round scores
         """
+        return score_cache.cached(self.pk, 'tournament-%d' % self.pk, self._scores_detail)
+
+    def _scores_detail(self):
+        """Calculate the return value for scores_detail()."""
+        # Another object may have changed our state since we were loaded
+        self.refresh_from_db(fields=['state'])
         # If the tournament is over, report the stored scores
         if self.is_finished():
             t_scores = {}
@@ -595,22 +798,74 @@ class Tournament(models.Model):
           Players who are flagged as unranked in the tournament get the special
           place UNRANKED.
         - Dict, keyed by round, of dicts, keyed by player, of float round scores
+        Reads the TournamentStandings and RoundStandings, after bringing them
+        up to date.
         """
+        self.update_standings()
         result = {}
-        t_scores, r_scores = self.scores_detail()
-        # First, deal with any unranked players
-        for tp in self.tournamentplayer_set.filter(unranked=True):
-            # Take it out of scores and add it to result
-            result[tp.player] = (Tournament.UNRANKED, t_scores.pop(tp.player))
-        last_score = None
-        for i, (k, v) in enumerate(sorted([(k, v) for k, v in t_scores.items()],
-                                          key=itemgetter(1),
-                                          reverse=True),
-                                   start=1):
-            if v != last_score:
-                place, last_score = i, v
-            result[k] = (place, v)
-        return result, r_scores
+        for ts in self.tournamentstanding_set.select_related('player'):
+            result[ts.player] = (ts.position, ts.score)
+        return result, self._standings_round_scores()
+
+    def _positions(self, t_scores):
+        """
+        Rank the players.
+        t_scores is a dict, keyed by player, of float tournament scores.
+        Returns a dict, keyed by player, of 2-tuples containing integer
+        rankings (1 for first place, etc) and float tournament scores.
+        Players who are flagged as unranked in the tournament get the special
+        place UNRANKED.
+        """
+        unranked = [tp.player for tp in self.tournamentplayer_set.filter(unranked=True).select_related('player')]
+        return positions_from_scores(t_scores, unranked)
+
+    def _standings_round_scores(self):
+        """
+        Returns the round scores from the RoundStandings.
+        Dict, keyed by round, of dicts, keyed by player, of float round scores.
+        """
+        r_scores = {}
+        for rs in RoundStanding.objects.filter(the_round__tournament=self).select_related('the_round', 'player'):
+            r_scores.setdefault(rs.the_round, {})[rs.player] = rs.score
+        return r_scores
+
+    def update_standings(self):
+        """
+        Bring the TournamentStandings and RoundStandings up to date.
+        Only the Rounds whose scores may have changed since the last update
+        are rescored, and nothing is done if nothing has changed.
+        """
+        stale = Q(standings_stale=True) | Q(round__standings_stale=True)
+        if not Tournament.objects.filter(stale, pk=self.pk).exists():
+            return
+        with transaction.atomic():
+            # Lock the Tournament and the stale Rounds, so that concurrent updates
+            # are done one after another, and anything that marks them stale again
+            # while we work waits until we're done, rather than being lost
+            if not Tournament.objects.select_for_update().filter(pk=self.pk).exists():
+                return
+            stale_rounds = list(self.round_set.select_for_update().filter(standings_stale=True))
+            Round.objects.filter(pk__in=[r.pk for r in stale_rounds]).update(standings_stale=False)
+            Tournament.objects.filter(pk=self.pk).update(standings_stale=False)
+            for r in stale_rounds:
+                RoundStanding.objects.filter(the_round=r).delete()
+                RoundStanding.objects.bulk_create([RoundStanding(the_round=r, player=p, score=score)
+                                                   for p, score in r.scores().items()])
+            # If the tournament is over, use the stored scores, as scores_detail() does
+            # Another object may have changed our state since we were loaded
+            self.refresh_from_db(fields=['state'])
+            if self.is_finished():
+                t_scores = {}
+                for tp in self.tournamentplayer_set.all():
+                    t_scores[tp.player] = tp.score
+            else:
+                t_scores = self._scores_detail_calculated(self._standings_round_scores())[0]
+            TournamentStanding.objects.filter(tournament=self).delete()
+            TournamentStanding.objects.bulk_create([TournamentStanding(tournament=self,
+                                                                       player=p,
+                                                                       position=position,
+                                                                       score=score)
+                                                    for p, (position, score) in self._positions(t_scores).items()])
 
     def store_scores(self):
         """
@@ -626,11 +881,8 @@ class Tournament(models.Model):
         """
         Return the Round (if any) of the tournament with the specified number.
         """
-        for r in self.round_set.all():
-            if r.number() == int(number):
-                return r
-        # This allows this function to be used like QuerySet.get()
-        raise Round.DoesNotExist
+        # This raises Round.DoesNotExist if there isn't one
+        return self.round_set.get(ordinal=int(number))
 
     def _sort_best_country_list(self, gp_list):
         """
@@ -656,41 +908,67 @@ class Tournament(models.Model):
         If whole_list is True, returns every player of each power, in order.
         If whole_list is False, returns just the winners (still a list, though).
         """
+        retval = {}
+        for power, tuples in self.best_countries_detail(whole_list).items():
+            retval[power] = [gp for gp, _, _, _ in tuples]
+        return retval
+
+    def best_countries_detail(self, whole_list=False):
+        """
+        Returns a dict, indexed by GreatPower,
+          of lists of (GamePlayer, score, dots, unranked) 4-tuples
+          for the GamePlayers doing best with each GreatPower.
+        score is the "if the game ended now" score, dots the latest centre count,
+          and unranked whether the player is excluded from the rankings.
+        If whole_list is True, returns every player of each power, in order.
+        If whole_list is False, returns just the winners (still a list, though).
+        Reads everything with a handful of queries, however many games there are.
+        """
         tuples = {}
-        # We're going to need to "if all games ended now" score for every GamePlayer
-        all_games = Game.objects.filter(the_round__tournament=self)
-        # If no Games exist, return a dict of empty lists
-        if not all_games:
-            for power in GreatPower.objects.all():
-                tuples[power] = []
+        # Same order as going through the rounds, then the games of each round
+        gps = GamePlayer.objects.filter(game__the_round__tournament=self)
+        gps = list(gps.select_related('game__the_round',
+                                      'player',
+                                      'power').order_by('game__the_round__start', 'game', 'power'))
+        if not gps:
+            # If no Games exist, return a dict of empty lists
+            if not Game.objects.filter(the_round__tournament=self).exists():
+                for power in GreatPower.objects.all():
+                    tuples[power] = []
             return tuples
-        all_scores = {}
-        for g in all_games:
-            all_scores[g] = g.scores()
+        # We're going to need to "if all games ended now" score for every GamePlayer
+        all_scores = game_scores({gp.game_id: gp.game for gp in gps}.values())
+        # Dict, keyed by (Game pk, GreatPower pk), of latest centre count
+        final_counts = {}
+        ccs = CentreCount.objects.filter(game__the_round__tournament=self).order_by('year')
+        for game_id, power_id, count in ccs.values_list('game', 'power', 'count'):
+            final_counts[(game_id, power_id)] = count
+        # Dict, keyed by Player pk, of whether they're unranked
+        unranked = dict(self.tournamentplayer_set.values_list('player', 'unranked'))
         # Populate tuples. Dict, keyed by GreatPower,
         # of lists of (GamePlayer, score, dots, unranked) 4-tuples
-        for r in self.round_set.all().prefetch_related('game_set'):
-            for g in r.game_set.all().prefetch_related('gameplayer_set'):
-                for gp in g.gameplayer_set.all():
-                    score = all_scores[gp.game][gp.power]
-                    tuple_ = (gp, score, gp.final_sc_count(), gp.tournamentplayer().unranked)
-                    tuples.setdefault(gp.power, []).append(tuple_)
+        for gp in gps:
+            score = all_scores[gp.game][gp.power]
+            dots = final_counts.get((gp.game_id, gp.power_id))
+            if dots is None:
+                # Games created without Game.save() may have no CentreCounts
+                dots = gp.power.starting_centres
+            tuple_ = (gp, score, dots, unranked[gp.player_id])
+            tuples.setdefault(gp.power, []).append(tuple_)
         for power in tuples:
             self._sort_best_country_list(tuples[power])
-        retval = {}
         # If the caller wants the whole list, that's easy
         if whole_list:
-            for power in tuples:
-                retval[power] = [gp for gp, _, _, _ in tuples[power]]
-            return retval
+            return tuples
+        retval = {}
         # Filter out all except the best for each country
         for power in tuples:
-            best_gp, best_score, best_dots, best_unranked = tuples[power].pop(0)
-            list_ = [best_gp]
-            for gp, score, dots, unranked in tuples[power]:
+            best = tuples[power][0]
+            list_ = [best]
+            for tuple_ in tuples[power][1:]:
                 # It's only a tie if all three criteria match
-                if (score == best_score) and (dots == best_dots) and (unranked == best_unranked):
-                    list_.append(gp)
+                if tuple_[1:] == best[1:]:
+                    list_.append(tuple_)
             retval[power] = list_
         return retval
 
@@ -709,16 +987,16 @@ class Tournament(models.Model):
         """
         Returns the Round in progress, or None
         """
+        if self.state == FINISHED:
+            return None
         # Rely on the default ordering
-        rds = self.round_set.reverse()
-        for r in rds:
+        rds = list(self.round_set.exclude(state=FINISHED))
+        for r in reversed(rds):
             if r.in_progress():
                 return r
         # If no round is in progress, return the first unfinished round
-        rds = self.round_set.all()
-        for r in rds:
-            if not r.is_finished():
-                return r
+        if rds:
+            return rds[0]
         return None
 
     def is_finished(self):
@@ -726,15 +1004,7 @@ class Tournament(models.Model):
         Returns True if the tournament has rounds, and they are all finished.
         Returns False otherwise.
         """
-        rds = self.round_set.all()
-        # If there are no rounds, the tournament can't have started
-        if not rds:
-            return False
-        # Look for any unfinished round
-        for r in rds:
-            if not r.is_finished():
-                return False
-        return True
+        return self.state == FINISHED
 
     def in_progress(self):
         """
@@ -742,15 +1012,7 @@ class Tournament(models.Model):
         and not all have finished.
         Returns False otherwise.
         """
-        r = self.current_round()
-        if r is None:
-            # Either no rounds, or all are finished
-            return False
-        if r.number() != 1:
-            # First round is finished
-            return True
-        # r is round 1, so the tournament is in_progress if the round is
-        return r.in_progress()
+        return self.state == IN_PROGRESS
 
     def wdd_url(self):
         """
@@ -796,7 +1058,8 @@ class TournamentPlayer(models.Model):
         Where is the player (currently) ranked overall in the tournament?
         Returns Tournament.UNRANKED if self.unranked is True.
         """
-        return self.tournament.positions_and_scores()[0][self.player][0]
+        self.tournament.update_standings()
+        return self.tournament.tournamentstanding_set.get(player=self.player).position
 
     def roundplayers(self):
         """
@@ -960,6 +1223,152 @@ class Preference(models.Model):
                                                               'rank': self.ranking}
 
 
+def _number_rounds(tournament_id):
+    """
+    Store the number of each Round of the Tournament within the Tournament,
+    in start order.
+    Must be called whenever a Round is added or deleted or its start changes.
+    Returns a dict, keyed by Round pk, of round numbers.
+    """
+    changed = []
+    retval = {}
+    for n, r in enumerate(Round.objects.filter(tournament=tournament_id), 1):
+        retval[r.pk] = n
+        if r.ordinal != n:
+            r.ordinal = n
+            changed.append(r)
+    if changed:
+        Round.objects.bulk_update(changed, ['ordinal'])
+    return retval
+
+
+def _assign_powers_from_prefs(tournament, gps):
+    """
+    Assigns powers to the GamePlayers in gps, which can be from any number
+    of Games in tournament, from the players' Preferences.
+    Within each Game, the player with the lowest tournament score gets first
+    choice, the player with the highest score gets whatever power nobody else wants.
+    If players have the same score, they are ordered randomly.
+    A player with no Preferences left gets a random power from those left.
+    Works out the tournament positions and reads all the Preferences just once,
+    and saves all the powers with a single bulk update.
+    Raises PowerAlreadyAssigned if any GamePlayers already have assigned
+    powers.
+    """
+    for gp in gps:
+        if gp.power_id is not None:
+            raise PowerAlreadyAssigned(str(gp) + ' is already assigned ' + str(gp.power))
+    if not gps:
+        return
+    # Find current tournament positions (and scores)
+    # Dict, keyed by Player pk, of tournament position
+    positions = {p.pk: pos for p, (pos, _) in tournament.positions_and_scores()[0].items()}
+    # Dict, keyed by GreatPower pk, of GreatPower
+    powers = {p.pk: p for p in GreatPower.objects.all()}
+    # Dict, keyed by Player pk, of list of GreatPower pks, highest-ranked first
+    prefs = {}
+    for player_id, power_id in Preference.objects.filter(player__tournament=tournament,
+                                                         player__player__in=[gp.player_id for gp in gps]
+                                                         ).order_by('ranking').values_list('player__player',
+                                                                                           'power'):
+        prefs.setdefault(player_id, []).append(power_id)
+    # Dict, keyed by Game pk, of dict, keyed by position, of lists of GamePlayers
+    games = {}
+    for gp in gps:
+        games.setdefault(gp.game_id, {}).setdefault(positions[gp.player_id], []).append(gp)
+    for position_to_gps in games.values():
+        free_powers = set(powers.keys())
+        # Starting from the lowest rank, work through the whole list
+        for pos in sorted(position_to_gps.keys(), reverse=True):
+            # At each rank, order players randomly
+            random.shuffle(position_to_gps[pos])
+            for gp in position_to_gps[pos]:
+                for power_id in prefs.get(gp.player_id, []):
+                    if power_id in free_powers:
+                        break
+                else:
+                    # No preferences left, so pick a power at random from the unassigned ones
+                    power_id = random.choice(sorted(free_powers))
+                free_powers.remove(power_id)
+                gp.power = powers[power_id]
+    GamePlayer.objects.bulk_update(gps, ['power'])
+    # bulk_update() doesn't send post_save
+    score_cache.invalidate(tournament.pk)
+    Round.objects.filter(game__in=set(gp.game_id for gp in gps)).update(standings_stale=True)
+
+
+def _auction_funds(the_round):
+    """
+    Returns the funds each player has available to bid with in the_round.
+    Returns a dict, keyed by Player pk, of ints, with a default for players
+    who have not yet bid.
+    For AUCTION_TOTAL tournaments, everything bid in earlier rounds has
+    been spent, and enough must be kept back to bid in each later round.
+    """
+    t = the_round.tournament
+    if t.power_assignment != Tournament.AUCTION_TOTAL:
+        return defaultdict(lambda: PowerBid.BID_TOTAL_PER_ROUND)
+    rounds = list(t.round_set.all())
+    earlier = [r for r in rounds if r.start < the_round.start]
+    later = [r for r in rounds if r.start > the_round.start]
+    # Bids for each power have to be different, so the least that
+    # can be bid in a round is 0 + 1 + 2 + ...
+    min_spend = sum(range(GreatPower.objects.count()))
+    funds = PowerBid.BID_TOTAL_PER_ROUND * len(rounds) - min_spend * len(later)
+    retval = defaultdict(lambda: funds)
+    # Clear the ordering, because it would be added to the GROUP BY
+    spends = PowerBid.objects.filter(the_round__in=earlier).order_by().values('player__player')
+    for row in spends.annotate(spent=Sum('bid')):
+        retval[row['player__player']] = funds - row['spent']
+    return retval
+
+
+def _assign_powers_from_bids(the_round, gps):
+    """
+    Assigns powers to the GamePlayers in gps, which can be from any number
+    of Games in the_round, from the players' PowerBids for the_round.
+    In each Game, powers are assigned to maximise the total of the winning bids.
+    Where several assignments have the same total, one is picked at random.
+    Players with no bid for a power are treated as bidding zero for it,
+    as are players who have bid more in total than they have funds for.
+    Reads all the bids just once, and saves all the powers with a single
+    bulk update.
+    Raises PowerAlreadyAssigned if any GamePlayers already have assigned
+    powers.
+    """
+    for gp in gps:
+        if gp.power_id is not None:
+            raise PowerAlreadyAssigned(str(gp) + ' is already assigned ' + str(gp.power))
+    if not gps:
+        return
+    powers = list(GreatPower.objects.all())
+    # Dict, keyed by Player pk, of dict, keyed by GreatPower pk, of bid
+    bids = {}
+    for player_id, power_id, bid in PowerBid.objects.filter(the_round=the_round).values_list('player__player',
+                                                                                            'power',
+                                                                                            'bid'):
+        bids.setdefault(player_id, {})[power_id] = bid
+    funds = _auction_funds(the_round)
+    for player_id, player_bids in bids.items():
+        if sum(player_bids.values()) > funds[player_id]:
+            bids[player_id] = {}
+    # Dict, keyed by Game pk, of lists of GamePlayers
+    games = {}
+    for gp in gps:
+        games.setdefault(gp.game_id, []).append(gp)
+    for game_gps in games.values():
+        # Costs are negative bids, so the cheapest assignment has the highest total bid
+        costs = [[-bids.get(gp.player_id, {}).get(p.pk, 0) for p in powers] for gp in game_gps]
+        # If the Game is short of players, pad with players who bid nothing
+        costs += [[0] * len(powers) for _ in range(len(powers) - len(game_gps))]
+        for gp, col in zip(game_gps, random_min_cost_assignment(costs)):
+            gp.power = powers[col]
+    GamePlayer.objects.bulk_update(gps, ['power'])
+    # bulk_update() doesn't send post_save
+    score_cache.invalidate(the_round.tournament_id)
+    Round.objects.filter(game__in=set(gp.game_id for gp in gps)).update(standings_stale=True)
+
+
 class Round(models.Model):
     """
     A single round of a Tournament
@@ -982,10 +1391,57 @@ class Round(models.Model):
     enable_check_in = models.BooleanField(default=False,
                                           verbose_name=_(u'Enable self-check-ins'))
     email_sent = models.BooleanField(default=False)
+    # Whether the RoundStandings need to be recalculated
+    standings_stale = models.BooleanField(default=True, editable=False)
+    # Which round within the tournament this is, maintained by save()
+    ordinal = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Derived from the Games and RoundPlayers, maintained by _update_state()
+    state = models.CharField(max_length=1,
+                             choices=STATES,
+                             default=NOT_STARTED,
+                             editable=False)
 
     class Meta:
         ordering = ['start']
         unique_together = ('tournament', 'start')
+        indexes = [models.Index(fields=['tournament', 'ordinal'])]
+
+    def save(self, *args, **kwargs):
+        """
+        Save the object to the database.
+        Updates the numbers of all the Rounds of the Tournament.
+        Ensures that the stored states of the Round and Tournament are correct.
+        """
+        super().save(*args, **kwargs)
+        self.ordinal = _number_rounds(self.tournament_id)[self.pk]
+        if not self._update_state():
+            # The order of the rounds may have changed, even if their states haven't
+            self.tournament._update_state()
+
+    def _update_state(self):
+        """
+        Work out the state of the Round from its Games and RoundPlayers,
+        and store it. If it has changed, update the state of the Tournament.
+        Must be called whenever a Game or RoundPlayer is added or removed,
+        or a Game finishes.
+        Returns True if the state changed.
+        """
+        finished = list(self.game_set.values_list('is_finished', flat=True))
+        if finished and all(finished):
+            self.state = FINISHED
+        elif finished or self.roundplayer_set.exists():
+            # Roll call has happened or games have been created
+            self.state = IN_PROGRESS
+        else:
+            self.state = NOT_STARTED
+        # Compare with what's stored rather than with self.state,
+        # which may have been out of date
+        if not Round.objects.filter(pk=self.pk).exclude(state=self.state).update(state=self.state):
+            return False
+        t = _cached_or_fetched(self, Round.tournament, Tournament)
+        if t is not None:
+            t._update_state()
+        return True
 
     def game_scoring_system_obj(self):
         """
@@ -1003,17 +1459,26 @@ class Round(models.Model):
         Returns the scores for everyone who played in the round.
         Returns a dict, keyed by Player, of floats.
         """
+        if force_recalculation:
+            return self._scores(True)
+        return score_cache.cached(self.tournament_id, 'round-%d' % self.pk, lambda: self._scores(False))
+
+    def _scores(self, force_recalculation):
+        """Calculate the return value for scores()."""
         # If the round is over, report the stored scores unless we're told to recalculate
-        if not force_recalculation and self.is_finished():
-            retval = {}
-            for p in self.roundplayer_set.all():
-                retval[p.player] = p.score
-            return retval
+        if not force_recalculation:
+            # Another object may have changed our state since we were loaded
+            self.refresh_from_db(fields=['state'])
+            if self.is_finished():
+                retval = {}
+                for p in self.roundplayer_set.select_related('player'):
+                    retval[p.player] = p.score
+                return retval
 
         system = self.tournament.round_scoring_system_obj()
         # Identify any players who were checked in but didn't play
-        gps = GamePlayer.objects.filter(game__the_round=self).distinct()
-        non_players = self.roundplayer_set.exclude(player__in=[gp.player for gp in gps])
+        gps = GamePlayer.objects.filter(game__the_round=self)
+        non_players = self.roundplayer_set.exclude(player__in=gps.values('player'))
         return system.scores(gps, non_players)
 
     def store_scores(self):
@@ -1026,40 +1491,46 @@ class Round(models.Model):
             p.score = scores[p.player]
             p.save()
 
+    def assign_powers_from_prefs(self):
+        """
+        Assigns powers to the GamePlayers in all the Games in the Round.
+        Equivalent to calling Game.assign_powers_from_prefs() for each Game,
+        but much faster for a big Round.
+        Raises PowerAlreadyAssigned if any GamePlayers already have assigned
+        powers.
+        """
+        _assign_powers_from_prefs(self.tournament,
+                                  list(GamePlayer.objects.filter(game__the_round=self)))
+
+    def assign_powers_from_bids(self):
+        """
+        Assigns powers to the GamePlayers in all the Games in the Round,
+        from the blind auction bids for the Round.
+        Raises PowerAlreadyAssigned if any GamePlayers already have assigned
+        powers.
+        """
+        _assign_powers_from_bids(self,
+                                 list(GamePlayer.objects.filter(game__the_round=self)))
+
     def is_finished(self):
         """
         Returns True if the Round has games, and they have all finished.
         Returns False otherwise.
         """
-        gs = self.game_set.all()
-        if not gs:
-            # Rounds with no games can't have started
-            return False
-        for g in gs:
-            if not g.is_finished:
-                return False
-        return True
+        return self.state == FINISHED
 
     def in_progress(self):
         """
         Returns True if the Round has RoundPlayers (i.e. roll call has happened)
         or Games, and it hasn't finished.
         """
-        if not self.roundplayer_set.exists() and not self.game_set.exists():
-            # Not yet started
-            return False
-        # Started, so in_progress unless already finished
-        return not self.is_finished()
+        return self.state == IN_PROGRESS
 
     def number(self):
         """
         Which round within the tournament is this one ?
         """
-        rounds = self.tournament.round_set.all()
-        for count, r in enumerate(rounds, 1):
-            if r == self:
-                return count
-        assert 0, u"Round doesn't exist within its own tournament"
+        return self.ordinal
 
     def background(self, mask=MASK_ALL_BG):
         """
@@ -1128,6 +1599,37 @@ class PowerBid(models.Model):
                                                                          'round': self.the_round}
 
 
+class SeedingRecord(models.Model):
+    """
+    What the game seeder did for a Round.
+    Records everything needed to reproduce the seeding.
+    """
+    the_round = models.ForeignKey(Round, verbose_name=_(u'round'), on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    # Parameters used for the GameSeeder
+    seed = models.BigIntegerField(help_text=_(u'Random number generator seed'))
+    seed_method = models.CharField(max_length=20)
+    starts = models.PositiveIntegerField(blank=True, null=True)
+    iterations = models.PositiveIntegerField(blank=True, null=True)
+    processes = models.PositiveSmallIntegerField(default=1)
+    power_weight = models.PositiveIntegerField(default=0)
+    deadline = models.FloatField(blank=True,
+                                 null=True,
+                                 help_text=_(u'Time limit in seconds'))
+    # Results
+    fitness = models.IntegerField(blank=True,
+                                  null=True,
+                                  help_text=_(u'Lower is better'))
+    seeding = models.TextField(help_text=_(u'The players in each game, one game per line'))
+
+    class Meta:
+        ordering = ['the_round', 'created']
+
+    def __str__(self):
+        return _(u'Seeding for %(round)s at %(time)s') % {'round': self.the_round,
+                                                          'time': self.created}
+
+
 class Game(models.Model):
     """
     A single game of Diplomacy, within a Round
@@ -1171,23 +1673,8 @@ class Game(models.Model):
         Raises PowerAlreadyAssigned if any GamePlayers already have assigned
         powers.
         """
-        position_to_gps = {}
-        gps = self.gameplayer_set.all()
-        # Find current tournament positions (and scores)
-        ranks = self.the_round.tournament.positions_and_scores()[0]
-        # Check for any GamePlayer that already has a power assigned
-        # and find the interesting player positions
-        for gp in gps:
-            if gp.power:
-                raise PowerAlreadyAssigned(str(gp) + ' is already assigned ' + str(gp.power))
-            pos = ranks[gp.player][0]
-            position_to_gps.setdefault(pos, []).append(gp)
-        # Starting from the lowest rank, work through the whole list
-        for pos in sorted(position_to_gps.keys(), reverse=True):
-            # At each rank, order players randomly
-            random.shuffle(position_to_gps[pos])
-            for gp in position_to_gps[pos]:
-                gp.set_power_from_prefs()
+        _assign_powers_from_prefs(self.the_round.tournament,
+                                  list(self.gameplayer_set.all()))
 
     def check_whether_finished(self, year=None):
         """
@@ -1260,6 +1747,14 @@ class Game(models.Model):
         calculate the scores if the game were to end now.
         Return value is a dict, indexed by power id, of scores.
         """
+        if force_recalculation:
+            return self._scores(True)
+        return score_cache.cached(self.the_round.tournament_id,
+                                  'game-%d' % self.pk,
+                                  lambda: self._scores(False))
+
+    def _scores(self, force_recalculation):
+        """Calculate the return value for scores()."""
         if not force_recalculation and self.is_finished:
             # Return the stored scores for the game
             retval = {}
@@ -1270,7 +1765,7 @@ class Game(models.Model):
 
         # Calculate the scores for the game using the specified ScoringSystem
         system = self.the_round.game_scoring_system_obj()
-        tgs = TournamentGameState(self.centrecount_set.all())
+        tgs = TournamentGameState(self.centrecount_set.all(), self)
         return system.scores(tgs)
 
     def positions(self):
@@ -1473,11 +1968,13 @@ class Game(models.Model):
 
             # If the round is (now) finished, store the player scores
             r = self.the_round
+            r.refresh_from_db(fields=['state'])
             if r.is_finished():
                 r.store_scores()
 
             # if the tournament is (now) finished, store the player scores
             t = self.the_round.tournament
+            t.refresh_from_db(fields=['state'])
             if t.is_finished():
                 t.store_scores()
 
@@ -1747,6 +2244,44 @@ class RoundPlayer(models.Model):
                                                 'round': self.the_round}
 
 
+class RoundStanding(models.Model):
+    """
+    A player's score in a round, as it would be if all the games ended now.
+    Maintained by Tournament.update_standings().
+    """
+    the_round = models.ForeignKey(Round, verbose_name=_(u'round'), on_delete=models.CASCADE)
+    player = models.ForeignKey(Player, on_delete=models.CASCADE)
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('the_round', 'player')
+
+    def __str__(self):
+        return _(u'%(player)s in %(round)s') % {'player': self.player,
+                                                'round': self.the_round}
+
+
+class TournamentStanding(models.Model):
+    """
+    A player's score and position in a tournament,
+    as they would be if all the games ended now.
+    Maintained by Tournament.update_standings().
+    """
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
+    player = models.ForeignKey(Player, on_delete=models.CASCADE)
+    score = models.FloatField()
+    # Tournament.UNRANKED for unranked players
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ('tournament', 'player')
+
+    def __str__(self):
+        return _(u'%(player)s in %(tournament)s') % {'player': self.player,
+                                                     'tournament': self.tournament}
+
+
 class GamePlayer(models.Model):
     """
     A person who played a Great Power in a Game
@@ -2074,3 +2609,104 @@ class CentreCount(models.Model):
         return u'%(game)s %(year)d %(power)s' % {'game': self.game,
                                                  'year': self.year,
                                                  'power': _(self.power.abbreviation)}
+
+
+# Keep track of which standings need to be recalculated,
+# and of the numbers and states of Rounds.
+# These use QuerySet.update() so that they don't trigger each other
+
+
+def _cached_or_fetched(instance, descriptor, model):
+    """
+    Returns the object that instance refers to through the ForeignKey
+    descriptor, or None if it no longer exists.
+    Uses the object already loaded, if any, so that its state is kept up to date.
+    """
+    if descriptor.is_cached(instance):
+        return getattr(instance, descriptor.field.name)
+    return model.objects.filter(pk=getattr(instance, descriptor.field.attname)).first()
+
+
+def _mark_rounds_stale(rounds):
+    """
+    Mark the Round in the QuerySet rounds, and every later Round of the
+    same Tournament, as needing their standings updated.
+    Some round scoring systems score a Round differently depending on who
+    played in earlier Rounds, so a change to who played affects later Rounds too.
+    """
+    Round.objects.filter(tournament=Subquery(rounds.values('tournament')[:1]),
+                         ordinal__gte=Subquery(rounds.values('ordinal')[:1])).update(standings_stale=True)
+
+
+def _game_standings_changed(sender, instance, **kwargs):
+    """Something that affects the scores of a Game has changed."""
+    Round.objects.filter(game=instance.game_id).update(standings_stale=True)
+
+
+def _game_players_changed(sender, instance, **kwargs):
+    """Someone has been added to or removed from a Game."""
+    _mark_rounds_stale(Round.objects.filter(game=instance.game_id))
+
+
+def _round_players_changed(sender, instance, **kwargs):
+    """Someone has been added to or removed from a Round, or a Game has changed."""
+    _mark_rounds_stale(Round.objects.filter(pk=instance.the_round_id))
+
+
+def _round_saved(sender, instance, **kwargs):
+    """A Round has been saved. The order of the Rounds may have changed."""
+    Round.objects.filter(tournament=instance.tournament_id).update(standings_stale=True)
+
+
+def _tournament_standings_changed(sender, instance, **kwargs):
+    """Something that affects the totals or ranking of a Tournament has changed."""
+    Tournament.objects.filter(pk=instance.tournament_id).update(standings_stale=True)
+
+
+def _round_deleted(sender, instance, **kwargs):
+    """
+    A Round has been deleted, so the later Rounds need renumbering
+    and the Tournament may have changed state.
+    """
+    _number_rounds(instance.tournament_id)
+    # The later Rounds may score differently without this one
+    Round.objects.filter(tournament=instance.tournament_id,
+                         ordinal__gte=instance.ordinal).update(standings_stale=True)
+    t = _cached_or_fetched(instance, Round.tournament, Tournament)
+    if t is not None:
+        t._update_state()
+
+
+def _round_state_changed(sender, instance, **kwargs):
+    """A Game or RoundPlayer has changed, so the Round may have changed state."""
+    # Only the existence of RoundPlayers matters, so ignore them being updated
+    if (sender == RoundPlayer) and (kwargs.get('created') is False):
+        return
+    r = _cached_or_fetched(instance, sender.the_round, Round)
+    if r is not None:
+        r._update_state()
+
+
+def _tournament_saved(sender, instance, **kwargs):
+    """A Tournament has been saved. The scoring systems may have changed."""
+    Tournament.objects.filter(pk=instance.pk).update(standings_stale=True)
+    Round.objects.filter(tournament=instance).update(standings_stale=True)
+
+
+for model in [CentreCount, DrawProposal]:
+    post_save.connect(_game_standings_changed, sender=model)
+    post_delete.connect(_game_standings_changed, sender=model)
+post_save.connect(_game_players_changed, sender=GamePlayer)
+post_delete.connect(_game_players_changed, sender=GamePlayer)
+for model in [Game, RoundPlayer]:
+    post_save.connect(_round_players_changed, sender=model)
+    post_delete.connect(_round_players_changed, sender=model)
+post_save.connect(_round_saved, sender=Round)
+post_delete.connect(_tournament_standings_changed, sender=Round)
+post_delete.connect(_round_deleted, sender=Round)
+for model in [Game, RoundPlayer]:
+    post_save.connect(_round_state_changed, sender=model)
+    post_delete.connect(_round_state_changed, sender=model)
+post_save.connect(_tournament_standings_changed, sender=TournamentPlayer)
+post_delete.connect(_tournament_standings_changed, sender=TournamentPlayer)
+post_save.connect(_tournament_saved, sender=Tournament)
@@ -20,6 +20,7 @@ Round Views for the Diplomacy Tournament Visualiser.
 
 import csv
 
+from django.conf import settings
 from django.contrib.auth.decorators import permission_required
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
@@ -47,9 +48,15 @@ from tournament.email import send_board_call
 from tournament.game_seeder import GameSeeder
 from tournament.models import Tournament, Round, Game
 from tournament.models import TournamentPlayer, RoundPlayer, GamePlayer
+from tournament.models import SeederBias, SeedingRecord
+from tournament import score_cache
+from tournament.seeding_jobs import SeedingJob, start_job, get_job, remove_job
 
 # Round views
 
+# Seconds between refreshes of the seeding status page
+SEEDING_REFRESH_TIME = 5
+
 
 def get_round_or_404(tournament, round_num):
     """
@@ -296,49 +303,114 @@ def _sitters_and_two_gamers(tournament, the_round):
 
 def _create_game_seeder(tournament, round_number):
     """Return a GameSeeder that knows about the tournament so far"""
-    tourney_players = tournament.tournamentplayer_set.all()
+    # This uses a fixed number of queries, however big the tournament is
+    powers = list(GreatPower.objects.all())
+    # Dict, keyed by GreatPower pk, of GreatPowers
+    powers_by_pk = {p.pk: p for p in powers}
+    tourney_players = list(tournament.tournamentplayer_set.all())
+    # Dict, keyed by Player pk, of TournamentPlayers
+    tps_by_player = {tp.player_id: tp for tp in tourney_players}
+    # Dict, keyed by TournamentPlayer pk, of TournamentPlayers
+    tps_by_pk = {tp.pk: tp for tp in tourney_players}
     # Create the game seeder
-    seeder = GameSeeder(GreatPower.objects.all(),
+    seeder = GameSeeder(powers,
                         starts=100,
-                        iterations=10)
+                        iterations=10,
+                        processes=getattr(settings, 'SEEDER_PROCESSES', 1),
+                        seed=getattr(settings, 'SEEDER_SEED', None),
+                        power_weight=getattr(settings, 'SEEDER_POWER_WEIGHT', 0))
     # Tell the seeder about every player in the tournament
     # (regardless of whether they're playing this round - they may have played already)
     for tp in tourney_players:
         seeder.add_player(tp)
     # Provide details of games already played this tournament
-    for n in range(1, round_number):
-        rnd = tournament.round_numbered(n)
-        for g in rnd.game_set.all():
-            game = set()
-            for gp in g.gameplayer_set.all():
-                game.add((gp.tournamentplayer(), gp.power))
-            assert len(game) == 7
-            seeder.add_played_game(game)
+    earlier_rounds = list(tournament.round_set.all())[:round_number - 1]
+    # Dict, keyed by Game pk, of sets of (TournamentPlayer, GreatPower) 2-tuples
+    games = {}
+    gps = GamePlayer.objects.filter(game__the_round__in=earlier_rounds)
+    for game_pk, player_pk, power_pk in gps.values_list('game', 'player', 'power'):
+        games.setdefault(game_pk, set()).add((tps_by_player[player_pk],
+                                              powers_by_pk[power_pk]))
+    for game in games.values():
+        assert len(game) == 7
+        seeder.add_played_game(game)
     # Add in any biases now that all players have been added
-    for tp in tourney_players:
-        # Just use seederbias_set so we only get each SeederBias once
-        # because we only look at their player1
-        for sb in tp.seederbias_set.all():
-            seeder.add_bias(sb.player1, sb.player2)
+    biases = SeederBias.objects.filter(player1__tournament=tournament)
+    for p1_pk, p2_pk in biases.values_list('player1', 'player2'):
+        seeder.add_bias(tps_by_pk[p1_pk], tps_by_pk[p2_pk])
     return seeder
 
 
+def _rounds_to_seed(tournament, the_round):
+    """
+    Return the number of rounds to plan the seeding for, including the_round
+    """
+    if not getattr(settings, 'SEEDER_LOOKAHEAD', False):
+        return 1
+    return tournament.round_set.count() - the_round.number() + 1
+
+
+def _record_seeding(the_round, seeder, games, deadline, fitness, with_powers):
+    """
+    Add a SeedingRecord for the_round.
+    games is as returned from GameSeeder.seed_games_and_powers() if with_powers
+    is True, or from GameSeeder.seed_games() otherwise.
+    """
+    lines = []
+    for g in games:
+        if with_powers:
+            g, _ = g
+            players = sorted(['%s: %s' % (power, tp.player) for tp, power in g])
+        else:
+            players = sorted([str(tp.player) for tp in g])
+        lines.append(', '.join(players))
+    SeedingRecord.objects.create(the_round=the_round,
+                                 seed=seeder.seed,
+                                 seed_method=seeder.seed_method.name,
+                                 starts=getattr(seeder, 'starts', None),
+                                 iterations=getattr(seeder, 'iterations', None),
+                                 processes=seeder.processes,
+                                 power_weight=seeder.power_weight if with_powers else 0,
+                                 deadline=deadline,
+                                 fitness=fitness,
+                                 seeding='\n'.join(lines))
+
+
 def _seed_games(tournament, the_round):
     """Wrapper round GameSeeder to do the actual seeding for a round"""
     seeder = _create_game_seeder(tournament, the_round.number())
     sitters, two_gamers = _sitters_and_two_gamers(tournament, the_round)
+    deadline = getattr(settings, 'SEEDER_DEADLINE', None)
+    rounds = _rounds_to_seed(tournament, the_round)
     # Generate the games
-    return seeder.seed_games(omitting_players=sitters,
-                             players_doubling_up=two_gamers)
+    games = seeder.seed_games(omitting_players=sitters,
+                              players_doubling_up=two_gamers,
+                              deadline=deadline,
+                              rounds=rounds)
+    _record_seeding(the_round, seeder, games, deadline, seeder.last_fitness, False)
+    return games
 
 
 def _seed_games_and_powers(tournament, the_round):
     """Wrapper round GameSeeder to do the actual seeding for a round"""
     seeder = _create_game_seeder(tournament, the_round.number())
     sitters, two_gamers = _sitters_and_two_gamers(tournament, the_round)
+    deadline = getattr(settings, 'SEEDER_DEADLINE', None)
+    rounds = _rounds_to_seed(tournament, the_round)
     # Generate the games
-    return seeder.seed_games_and_powers(omitting_players=sitters,
-                                        players_doubling_up=two_gamers)
+    games = seeder.seed_games_and_powers(omitting_players=sitters,
+                                         players_doubling_up=two_gamers,
+                                         deadline=deadline,
+                                         rounds=rounds)
+    _record_seeding(the_round, seeder, games, deadline, seeder.last_fitness, True)
+    return games
+
+
+def _seed_games_or_games_and_powers(tournament, the_round):
+    """Generate a seeding for the_round, and assign powers if required"""
+    if tournament.power_assignment == Tournament.AUTO:
+        return _seed_games_and_powers(tournament, the_round)
+    return _seed_games(tournament, the_round)
 
 
 def _generate_game_name(round_num, i):
@@ -376,6 +448,7 @@ def seed_games(request, tournament_id, round_num):
                 # Unassign all GreatPowers first,
                 # so we never have two players for one power
                 g.gameplayer_set.all().update(power=None)
+                score_cache.invalidate(t.pk)
                 # Assign the powers to the players
                 for gp_id, field in f.cleaned_data.items():
                     if gp_id in ['the_set', 'name', 'notes', 'issues']:
@@ -399,56 +472,145 @@ def seed_games(request, tournament_id, round_num):
                                                       r.number())))
         # Delete any existing Games and GamePlayers for this round
         r.game_set.all().delete()
-        # TODO It's a bit hokey to have a fixed default GameSet here
-        if t.is_virtual():
-            default_set = GameSet.objects.get(name='Backstabbr')
-        else:
-            default_set = GameSet.objects.get(pk=1)
-        data = []
-        # Generate a seeding, and assign powers if required
-        if t.power_assignment == Tournament.AUTO:
-            games = _seed_games_and_powers(t, r)
-            # Add the Games and GamePlayers to the database
-            for n, (g, i) in enumerate(games, start=1):
-                new_game = Game.objects.create(name=_generate_game_name(round_num, n),
-                                               the_round=r,
-                                               the_set=default_set)
-                current = {'name': new_game.name,
-                           'the_set': new_game.the_set,
-                           'issues': '\n'.join(i)}
-                for tp, power in g:
-                    gp = GamePlayer.objects.create(player=tp.player,
-                                                   game=new_game,
-                                                   power=power)
-                    current[gp.id] = power
-                data.append(current)
-        else:
-            games = _seed_games(t, r)
-            # Add the Games and GamePlayers to the database
-            for n, g in enumerate(games, start=1):
-                new_game = Game.objects.create(name=_generate_game_name(round_num, n),
-                                               the_round=r,
-                                               the_set=default_set)
-                current = {'name': new_game.name,
-                           'the_set': new_game.the_set,
-                           'issues': ''}
-                for tp in g:
-                    gp = GamePlayer.objects.create(player=tp.player,
-                                                   game=new_game)
-                # If we're assigning powers from preferences, do so now
-                if t.power_assignment == Tournament.PREFERENCES:
-                    new_game.assign_powers_from_prefs()
-                for tp in g:
-                    gp = GamePlayer.objects.get(player=tp.player,
-                                                game=new_game)
-                    current[gp.id] = gp.power
-                data.append(current)
-        # Create a form for each of the resulting games
-        PowerAssignFormset = formset_factory(PowerAssignForm,
-                                             formset=BasePowerAssignFormset,
-                                             extra=0)
-        formset = PowerAssignFormset(the_round=r, initial=data)
+        if getattr(settings, 'SEEDER_BACKGROUND', False):
+            # Seed in the background, and let the TD see how it's going
+            _start_seeding_job(t, r)
+            return HttpResponseRedirect(reverse('seeding_status',
+                                                args=(tournament_id, round_num)))
+        games = _seed_games_or_games_and_powers(t, r)
+        formset = _create_seeded_games(t, r, round_num, games)
+
+    context = {'tournament': t, 'round': r, 'formset': formset}
+    return render(request, 'rounds/seeded_games.html', context)
+
+
+def _create_seeded_games(tournament, the_round, round_num, games):
+    """
+    Add the Games and GamePlayers for a seeding to the database.
+    games is as returned from _seed_games_and_powers() if the tournament
+    uses AUTO power assignment, or from _seed_games() otherwise.
+    Returns a PowerAssignFormset for the new Games.
+    """
+    t = tournament
+    r = the_round
+    # TODO It's a bit hokey to have a fixed default GameSet here
+    if t.is_virtual():
+        default_set = GameSet.objects.get(name='Backstabbr')
+    else:
+        default_set = GameSet.objects.get(pk=1)
+    data = []
+    if t.power_assignment == Tournament.AUTO:
+        # Add the Games and GamePlayers to the database
+        for n, (g, i) in enumerate(games, start=1):
+            new_game = Game.objects.create(name=_generate_game_name(round_num, n),
+                                           the_round=r,
+                                           the_set=default_set)
+            current = {'name': new_game.name,
+                       'the_set': new_game.the_set,
+                       'issues': '\n'.join(i)}
+            for tp, power in g:
+                gp = GamePlayer.objects.create(player=tp.player,
+                                               game=new_game,
+                                               power=power)
+                current[gp.id] = power
+            data.append(current)
+    else:
+        # Add the Games and GamePlayers to the database
+        all_gps = []
+        for n, g in enumerate(games, start=1):
+            new_game = Game.objects.create(name=_generate_game_name(round_num, n),
+                                           the_round=r,
+                                           the_set=default_set)
+            gps = [GamePlayer.objects.create(player=tp.player,
+                                             game=new_game)
+                   for tp in g]
+            all_gps.append(gps)
+            data.append({'name': new_game.name,
+                         'the_set': new_game.the_set,
+                         'issues': ''})
+        # If we're assigning powers from preferences or bids, do so now, for the whole round at once
+        if t.power_assignment == Tournament.PREFERENCES:
+            r.assign_powers_from_prefs()
+        elif t.powers_assigned_from_bids():
+            r.assign_powers_from_bids()
+        # Dict, keyed by GamePlayer pk, of GreatPower
+        powers = {gp.pk: gp.power for gp in GamePlayer.objects.filter(game__the_round=r).select_related('power')}
+        for current, gps in zip(data, all_gps):
+            for gp in gps:
+                current[gp.id] = powers[gp.id]
+    # Create a form for each of the resulting games
+    PowerAssignFormset = formset_factory(PowerAssignForm,
+                                         formset=BasePowerAssignFormset,
+                                         extra=0)
+    return PowerAssignFormset(the_round=r, initial=data)
+
+
+def _start_seeding_job(tournament, the_round):
+    """Start seeding the_round in the background"""
+    seeder = _create_game_seeder(tournament, the_round.number())
+    sitters, two_gamers = _sitters_and_two_gamers(tournament, the_round)
+    job = SeedingJob(seeder,
+                     omitting_players=sitters,
+                     players_doubling_up=two_gamers,
+                     with_powers=(tournament.power_assignment == Tournament.AUTO),
+                     deadline=getattr(settings, 'SEEDER_DEADLINE', None),
+                     rounds=_rounds_to_seed(tournament, the_round))
+    start_job((tournament.pk, the_round.pk), job)
+
 
+@permission_required('tournament.add_game')
+def seeding_status(request, tournament_id, round_num):
+    """Show how a background seeding job for a round is getting on"""
+    t = get_modifiable_tournament_or_404(tournament_id, request.user)
+    r = get_round_or_404(t, round_num)
+    job = get_job((t.pk, r.pk))
+    context = {'tournament': t, 'round': r, 'job': job}
+    # If there's no job, it was either already accepted or started by a
+    # different server process, and the page offers to seed the round again
+    if job is not None:
+        if job.state == SeedingJob.FINISHED:
+            # Go straight to the result
+            context['redirect_time'] = 0
+            context['redirect_url'] = reverse('accept_seeding', args=(tournament_id, round_num))
+        elif job.is_running():
+            context['redirect_time'] = SEEDING_REFRESH_TIME
+            context['redirect_url'] = reverse('seeding_status', args=(tournament_id, round_num))
+    return render(request, 'rounds/seeding_status.html', context)
+
+
+@permission_required('tournament.add_game')
+def accept_seeding(request, tournament_id, round_num):
+    """Use the best seeding so far from the background seeding job for a round"""
+    t = get_modifiable_tournament_or_404(tournament_id, request.user)
+    r = get_round_or_404(t, round_num)
+    key = (t.pk, r.pk)
+    job = get_job(key)
+    if job is None:
+        # Either the seeding was already accepted (e.g. the page was
+        # refreshed), or the job was in a different server process.
+        # Never throw away games the TD may already have accepted
+        if r.game_set.exists():
+            return HttpResponseRedirect(reverse('game_index',
+                                                args=(tournament_id, round_num)))
+        return HttpResponseRedirect(reverse('seeding_status',
+                                            args=(tournament_id, round_num)))
+    if (job.fitness is None) or (job.state == SeedingJob.FAILED):
+        # Nothing to accept
+        return HttpResponseRedirect(reverse('seeding_status',
+                                            args=(tournament_id, round_num)))
+    remove_job(key)
+    # Let the job finish with the best seeding so far before using it,
+    # so that nothing else uses the seeder's random number generator meanwhile
+    # and the recorded seed reproduces the seeding
+    job.stop()
+    job.wait()
+    games = job.best()
+    if job.state == SeedingJob.FINISHED:
+        fitness = job.seeder.last_fitness
+    else:
+        fitness = job.fitness
+    _record_seeding(r, job.seeder, games, job.deadline, fitness, job.with_powers)
+    formset = _create_seeded_games(t, r, round_num, games)
     context = {'tournament': t, 'round': r, 'formset': formset}
     return render(request, 'rounds/seeded_games.html', context)
 
@@ -561,6 +723,7 @@ def game_scores(request, tournament_id, round_num):
                 # Find the matching GamePlayer
                 GamePlayer.objects.filter(game=g,
                                           power=p).update(score=field)
+        score_cache.invalidate(t.pk)
         # Update the Round and Tournament scores to reflect the changes
         r.store_scores()
         t.store_scores()
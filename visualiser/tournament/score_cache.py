@@ -0,0 +1,203 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cache the "if it ended now" scores of Games, Rounds and Tournaments,
+so that pages that refresh frequently don't recalculate them every time.
+Everything cached is tagged with the data version of its Tournament,
+which changes whenever anything that could affect that Tournament's scores
+is saved or deleted. The versions are stored in the database, so a change
+made by one server process is seen by all the others, whichever backend is
+used to keep the cached scores themselves.
+Where to keep the cached scores is set by settings.SCORE_CACHE_BACKEND.
+"""
+
+from collections import OrderedDict
+import pickle
+import threading
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+
+_KEY_PREFIX = 'dipvis-scores-'
+
+# Models that scores are calculated from.
+# Dict, keyed by model, of (Tournament field lookup, instance attribute) 2-tuples
+# that find the Tournament that an instance belongs to
+_SCORE_MODELS = {'tournament.Tournament': ('pk', 'pk'),
+                 'tournament.TournamentPlayer': ('pk', 'tournament_id'),
+                 'tournament.Round': ('pk', 'tournament_id'),
+                 'tournament.RoundPlayer': ('round', 'the_round_id'),
+                 'tournament.Game': ('round', 'the_round_id'),
+                 'tournament.GamePlayer': ('round__game', 'game_id'),
+                 'tournament.CentreCount': ('round__game', 'game_id'),
+                 'tournament.DrawProposal': ('round__game', 'game_id')}
+
+
+class LRUBackend():
+    """
+    Keep the cache in memory in this process,
+    discarding the least recently used entries when it fills up.
+    """
+    def __init__(self, size=1000):
+        """size is the maximum number of entries to keep."""
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the value stored for key, or None."""
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key, value):
+        """Store value for key."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class DjangoCacheBackend():
+    """
+    Keep the cache in one of the caches from settings.CACHES,
+    which can be shared between server processes.
+    """
+    def __init__(self, alias='default', timeout=None):
+        """
+        alias is the name of the cache in settings.CACHES.
+        timeout is the number of seconds to keep entries for, or None for
+        as long as the cache will keep them.
+        """
+        self.alias = alias
+        self.timeout = timeout
+
+    def get(self, key):
+        """Returns the value stored for key, or None."""
+        return caches[self.alias].get(key)
+
+    def set(self, key, value):
+        """Store value for key."""
+        caches[self.alias].set(key, value, self.timeout)
+
+
+_backend = None
+_backend_created = False
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    """Returns the backend to use, or None if scores aren't to be cached."""
+    global _backend, _backend_created
+    with _backend_lock:
+        if not _backend_created:
+            path = getattr(settings, 'SCORE_CACHE_BACKEND', None)
+            if path is not None:
+                _backend = import_string(path)(**getattr(settings, 'SCORE_CACHE_OPTIONS', {}))
+            _backend_created = True
+        return _backend
+
+
+def _settings_changed(setting, **kwargs):
+    """Start again with a new backend if the settings change."""
+    global _backend, _backend_created
+    if setting in ['SCORE_CACHE_BACKEND', 'SCORE_CACHE_OPTIONS']:
+        with _backend_lock:
+            _backend = None
+            _backend_created = False
+
+
+setting_changed.connect(_settings_changed)
+
+
+def _version(tournament_id):
+    """Returns the current data version for the Tournament, or None."""
+    tournament = apps.get_model('tournament', 'Tournament')
+    return tournament.objects.filter(pk=tournament_id).values_list('score_version', flat=True).first()
+
+
+def _new_version(**kwargs):
+    """
+    Give the Tournaments that match the filter kwargs a new data version.
+    A new random version is used, rather than the next in sequence,
+    so that saving an out of date Tournament instance can never bring
+    an old version back into use.
+    """
+    tournament = apps.get_model('tournament', 'Tournament')
+    tournament.objects.filter(**kwargs).update(score_version=uuid.uuid4())
+
+
+def invalidate(tournament_id):
+    """
+    Forget everything cached so far for the Tournament with pk tournament_id.
+    Must be called after any change to the data that scores are calculated
+    from that doesn't go through Model.save() or Model.delete(),
+    such as QuerySet.update().
+    """
+    _new_version(pk=tournament_id)
+
+
+def cached(tournament_id, key, calculate):
+    """
+    Returns calculate(), or a copy of what it returned last time if none
+    of the data that the scores of the Tournament with pk tournament_id
+    are calculated from has changed since.
+    key identifies what is being calculated, and should be unique to
+    the object and method.
+    Nothing is cached within a transaction, because the changes made so far
+    may be rolled back, and aren't visible to other processes anyway.
+    """
+    backend = _get_backend()
+    if (backend is None) or transaction.get_connection().in_atomic_block:
+        return calculate()
+    version = _version(tournament_id)
+    if version is None:
+        return calculate()
+    full_key = '%s%d-%s-%s' % (_KEY_PREFIX, tournament_id, version.hex, key)
+    data = backend.get(full_key)
+    if data is not None:
+        # Callers are free to modify what they get, so store a pickle
+        # rather than the object itself
+        return pickle.loads(data)
+    result = calculate()
+    backend.set(full_key, pickle.dumps(result))
+    return result
+
+
+def _data_changed(sender, instance, **kwargs):
+    """
+    Called whenever something that scores are calculated from changes.
+    The new version is written in the same transaction as the change,
+    so other processes see both at the same time.
+    """
+    lookup, attr = _SCORE_MODELS[sender._meta.label]
+    _new_version(**{lookup: getattr(instance, attr)})
+
+
+for model in _SCORE_MODELS:
+    post_save.connect(_data_changed, sender=model)
+    post_delete.connect(_data_changed, sender=model)
@@ -0,0 +1,196 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Work out how the standings of a tournament would look with different
+game, round and tournament scoring systems.
+Everything is read from the database up front, and nothing is written,
+so the tournament itself is left untouched.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+
+from tournament.game_scoring import G_SCORING_SYSTEMS
+from tournament.models import Game, GamePlayer, RoundPlayer
+from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS
+from tournament.models import positions_from_scores
+from tournament.players import Player
+from tournament.tournament_game_state import game_states
+
+
+class TournamentData():
+    """
+    Everything needed to score a Tournament, read from the database
+    with a fixed number of queries.
+    Players are identified by their pk, so that the object is cheap to
+    pass to worker processes.
+    """
+    def __init__(self, tournament):
+        # Round pks, in order
+        self.rounds = list(tournament.round_set.values_list('pk', flat=True))
+        games = list(Game.objects.filter(the_round__tournament=tournament))
+        # Dict, keyed by Game pk, of Round pk
+        self.game_rounds = {g.pk: g.the_round_id for g in games}
+        # Dict, keyed by Game pk, of TournamentGameState
+        self.game_states = {g.pk: tgs for g, tgs in game_states(games).items()}
+        # List of (Player pk, Game pk, GreatPower) 3-tuples
+        gps = GamePlayer.objects.filter(game__the_round__tournament=tournament).select_related('power')
+        self.game_players = [(gp.player_id, gp.game_id, gp.power) for gp in gps]
+        # Dict, keyed by Round pk, of lists of Player pks
+        self.round_players = {r: [] for r in self.rounds}
+        for r, p in RoundPlayer.objects.filter(the_round__tournament=tournament).values_list('the_round', 'player'):
+            self.round_players[r].append(p)
+        # Dict, keyed by Player pk, of whether they're excluded from the rankings
+        self.unranked = dict(tournament.tournamentplayer_set.values_list('player', 'unranked'))
+
+    def game_scores(self, system):
+        """
+        Score every Game with the GameScoringSystem system.
+        Returns a dict, keyed by Game pk, of dicts, keyed by GreatPower, of scores.
+        """
+        return {g: system.scores(tgs) for g, tgs in self.game_states.items()}
+
+    def round_scores(self, game_scores, system):
+        """
+        Score every Round with the RoundScoringSystem system.
+        game_scores is as returned by game_scores().
+        Returns a dict, keyed by Round pk, of dicts, keyed by Player pk, of scores.
+        """
+        # Dict, keyed by Round pk, of dicts, keyed by Player pk, of lists of game scores
+        player_scores = {r: {} for r in self.rounds}
+        for p, g, power in self.game_players:
+            p_scores = player_scores[self.game_rounds[g]].setdefault(p, [])
+            # Ignore games where they haven't been assigned a power
+            if power is not None:
+                p_scores.append(game_scores[g][power])
+        retval = {}
+        # Players who have sat out any earlier round
+        sat_out = set()
+        for r in self.rounds:
+            non_players = [p for p in self.round_players[r] if p not in player_scores[r]]
+            retval[r] = system.scores_from_data(player_scores[r],
+                                                non_players,
+                                                sat_out.intersection(non_players))
+            sat_out.update(non_players)
+        return retval
+
+    def tournament_scores(self, round_scores, system):
+        """
+        Score the Tournament with the TournamentScoringSystem system.
+        round_scores is as returned by round_scores().
+        Returns a dict, keyed by Player pk, of scores.
+        """
+        # Dict, keyed by Player pk, of lists of round scores
+        player_scores = {}
+        for r in self.rounds:
+            for p in self.round_players[r]:
+                player_scores.setdefault(p, []).append(round_scores[r][p])
+        t_scores = system.scores_from_data(player_scores)
+        # Now add in anyone who has yet to attend a round
+        for p in self.unranked:
+            t_scores.setdefault(p, 0.0)
+        return t_scores
+
+    def standings(self, t_scores):
+        """
+        Rank the players.
+        t_scores is as returned by tournament_scores().
+        Returns a dict, keyed by Player pk, of (position, score) 2-tuples.
+        """
+        return positions_from_scores(t_scores,
+                                     [p for p, unranked in self.unranked.items() if unranked])
+
+    def compare(self, g_system, r_and_t_systems):
+        """
+        Work out the standings with the GameScoringSystem g_system and each
+        (RoundScoringSystem, TournamentScoringSystem) 2-tuple in r_and_t_systems.
+        Returns a list of standings, as from standings(),
+        in the same order as r_and_t_systems.
+        """
+        g_scores = self.game_scores(g_system)
+        # Dict, keyed by RoundScoringSystem name, of round scores
+        r_scores = {}
+        retval = []
+        for r_system, t_system in r_and_t_systems:
+            if r_system.name not in r_scores:
+                r_scores[r_system.name] = self.round_scores(g_scores, r_system)
+            t_scores = self.tournament_scores(r_scores[r_system.name], t_system)
+            retval.append(self.standings(t_scores))
+        return retval
+
+
+# The TournamentData used by this worker process
+_worker_data = None
+
+
+def _init_worker(data):
+    """
+    Initialiser for worker processes.
+    Stores the TournamentData to use for all comparisons done by the process.
+    """
+    global _worker_data
+    _worker_data = data
+
+
+def _compare_in_worker(g_system, r_and_t_systems):
+    """Call TournamentData.compare() in a worker process."""
+    return _worker_data.compare(g_system, r_and_t_systems)
+
+
+def compare_scoring_systems(tournament, combinations=None, processes=1):
+    """
+    Work out the standings of the Tournament with each combination of
+    scoring systems, as if every game, round and the tournament were being
+    scored with them now. Stored scores are ignored, and nothing is saved.
+    combinations is an iterable of (GameScoringSystem, RoundScoringSystem,
+    TournamentScoringSystem) 3-tuples. The default is every combination of
+    G_SCORING_SYSTEMS, R_SCORING_SYSTEMS and T_SCORING_SYSTEMS.
+    processes is the number of worker processes to spread the
+    game scoring systems between.
+    Returns a dict, keyed by (game scoring system name, round scoring system
+    name, tournament scoring system name) 3-tuple, of dicts, keyed by Player,
+    of (position, score) 2-tuples.
+    """
+    if combinations is None:
+        combinations = itertools.product(G_SCORING_SYSTEMS, R_SCORING_SYSTEMS, T_SCORING_SYSTEMS)
+    # Group the combinations by game scoring system,
+    # so that each game only gets scored once with each system.
+    # Dict, keyed by GameScoringSystem name, of (GameScoringSystem, list) 2-tuples
+    by_game_system = {}
+    for g_system, r_system, t_system in combinations:
+        by_game_system.setdefault(g_system.name, (g_system, []))[1].append((r_system, t_system))
+    data = TournamentData(tournament)
+    if (processes > 1) and (len(by_game_system) > 1):
+        # Each worker gets a copy of the data when it starts up
+        with ProcessPoolExecutor(max_workers=min(processes, len(by_game_system)),
+                                 initializer=_init_worker,
+                                 initargs=(data,)) as executor:
+            futures = [executor.submit(_compare_in_worker, g_system, r_and_t)
+                       for g_system, r_and_t in by_game_system.values()]
+            results = [f.result() for f in futures]
+    else:
+        results = [data.compare(g_system, r_and_t) for g_system, r_and_t in by_game_system.values()]
+    player_ids = set()
+    for standings in results:
+        for s in standings:
+            player_ids.update(s.keys())
+    players = Player.objects.in_bulk(list(player_ids))
+    retval = {}
+    for (g_system, r_and_t), standings in zip(by_game_system.values(), results):
+        for (r_system, t_system), s in zip(r_and_t, standings):
+            retval[(g_system.name, r_system.name, t_system.name)] = {players[p]: v for p, v in s.items()}
+    return retval
@@ -0,0 +1,165 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the speed and quality of the game seeder on synthetic tournaments.
+"""
+
+import contextlib
+import io
+import itertools
+import random
+import time
+
+from tournament.game_seeder import GameSeeder, SeedMethod
+
+POWERS = ['Austria-Hungary', 'England', 'France', 'Germany', 'Italy', 'Russia', 'Turkey']
+
+# How to make the player count a multiple of seven each round
+SIT = 'sit'
+DOUBLE = 'double'
+MIXED = 'mixed'
+MODES = [SIT, DOUBLE, MIXED]
+
+# (seed method, starts, iterations) to try by default
+DEFAULT_CONFIGS = [
+    # What round_views uses
+    (SeedMethod.RANDOM, 100, 10),
+    (SeedMethod.RANDOM, 10, 1000),
+    (SeedMethod.ANNEALING, 10, 1000),
+    (SeedMethod.ANNEALING, 1, 10000),
+    (SeedMethod.EXHAUSTIVE, None, None),
+]
+
+
+class SyntheticTournament():
+    """
+    A made-up tournament, with players who sit out or play two games
+    in each round, and pairs of players who should be kept apart.
+    Players are just numbered from zero.
+    """
+    def __init__(self, num_players, num_rounds, mode=MIXED, biases=0, absent=0, seed=0):
+        """
+        num_players is the number of players in the tournament.
+        num_rounds is the number of rounds.
+        mode is SIT, DOUBLE or MIXED, to say whether we make up the numbers
+        for each round by having players sit out, by having players play two
+        games, or by picking one at random each round.
+        biases is the number of pairs of players to keep apart.
+        absent is the maximum number of (extra) players to leave out of
+        each round.
+        seed is used to make the tournament reproducible.
+        """
+        if mode not in MODES:
+            raise ValueError('Unknown mode %s' % mode)
+        rng = random.Random(seed)
+        self.num_players = num_players
+        self.players = list(range(num_players))
+        self.bias_pairs = rng.sample(list(itertools.combinations(self.players, 2)), biases)
+        # List of (sitters, doublers) 2-tuples of sets of players, one per round
+        self.rounds = []
+        for _ in range(num_rounds):
+            sitters = set(rng.sample(self.players, rng.randint(0, absent)))
+            present = [p for p in self.players if p not in sitters]
+            doublers = set()
+            extra = len(present) % 7
+            if extra:
+                if (mode == SIT) or ((mode == MIXED) and rng.randrange(2)):
+                    sitters |= set(rng.sample(present, extra))
+                else:
+                    doublers = set(rng.sample(present, 7 - extra))
+            self.rounds.append((sitters, doublers))
+
+
+def repeat_pairings(games):
+    """
+    Returns the number of times that players met someone they had already
+    played with.
+    games is an iterable of sets of players.
+    """
+    met = {}
+    repeats = 0
+    for g in games:
+        for pair in itertools.combinations(sorted(g), 2):
+            repeats += met.get(pair, 0) > 0
+            met[pair] = met.get(pair, 0) + 1
+    return repeats
+
+
+def run_benchmark(tournament,
+                  seed_method,
+                  starts=1,
+                  iterations=1000,
+                  deadline=None,
+                  processes=1,
+                  seed=0,
+                  lookahead=False,
+                  power_weight=0):
+    """
+    Seed every round of tournament with a GameSeeder.
+    If lookahead is True, the seeding of each round is planned along with
+    all the later rounds.
+    power_weight is passed to the GameSeeder.
+    Returns a dict with keys:
+        'time' - total time taken in seconds
+        'max_round_time' - time taken for the slowest round in seconds
+        'fitness' - total of the fitness scores of the seedings for each round
+        'repeats' - number of times players met someone they'd played before
+        'power_repeats' - number of times players played a power they'd played before
+        'bias_meetings' - number of times players who should be kept apart met
+    """
+    kwargs = {'seed_method': seed_method,
+              'processes': processes,
+              'seed': seed,
+              'power_weight': power_weight}
+    if seed_method != SeedMethod.EXHAUSTIVE:
+        kwargs['starts'] = starts
+        kwargs['iterations'] = iterations
+    seeder = GameSeeder(POWERS, **kwargs)
+    for p in tournament.players:
+        seeder.add_player(p)
+    for p1, p2 in tournament.bias_pairs:
+        seeder.add_bias(p1, p2)
+    all_games = []
+    total_time = 0.0
+    max_round_time = 0.0
+    fitness = 0
+    power_repeats = 0
+    for n, (sitters, doublers) in enumerate(tournament.rounds):
+        rounds = len(tournament.rounds) - n if lookahead else 1
+        start = time.perf_counter()
+        # Don't clutter the output with the seeder's own report
+        with contextlib.redirect_stdout(io.StringIO()):
+            games = seeder.seed_games_and_powers(sitters, doublers, deadline, rounds=rounds)
+        elapsed = time.perf_counter() - start
+        total_time += elapsed
+        max_round_time = max(max_round_time, elapsed)
+        games = [g for g, _ in games]
+        player_games = [set(p for p, _ in g) for g in games]
+        fitness += seeder._set_fitness(player_games, len(doublers) > 1)
+        power_repeats += sum([seeder._power_fitness(g) for g in games])
+        for g in games:
+            seeder.add_played_game(g)
+        all_games += player_games
+    bias_pairs = set(tournament.bias_pairs)
+    bias_meetings = sum([len(bias_pairs.intersection(itertools.combinations(sorted(g), 2)))
+                         for g in all_games])
+    return {'time': total_time,
+            'max_round_time': max_round_time,
+            'fitness': fitness,
+            'repeats': repeat_pairings(all_games),
+            'power_repeats': power_repeats,
+            'bias_meetings': bias_meetings}
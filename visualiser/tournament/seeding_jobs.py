@@ -0,0 +1,168 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Run the game seeder in a background thread, so that seeding a big round
+doesn't hold up the web request.
+Jobs are kept in memory, so they are only visible to the server process
+that started them, and are lost if it restarts. Background seeding is
+therefore only reliable with a single server process. If a job can't be
+found, the views show any games already created for the round, or offer
+to seed it again.
+"""
+
+import threading
+import time
+
+
+class SeedingJob():
+    """
+    One run of a GameSeeder, in its own thread.
+    The seeder should already know about the tournament so far, and is
+    only used by the job from then on. Only the seeder is used in the
+    thread, so the database is never accessed there.
+    """
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+
+    def __init__(self,
+                 seeder,
+                 omitting_players=(),
+                 players_doubling_up=(),
+                 with_powers=False,
+                 deadline=None,
+                 rounds=1):
+        """
+        seeder is the GameSeeder to use.
+        If with_powers is True, the seeding includes powers, as from
+        GameSeeder.seed_games_and_powers(), otherwise it is as from
+        GameSeeder.seed_games().
+        The other parameters are passed to GameSeeder.seed_games().
+        """
+        self.seeder = seeder
+        self.omitting_players = omitting_players
+        self.players_doubling_up = players_doubling_up
+        self.with_powers = with_powers
+        self.deadline = deadline
+        self.rounds = rounds
+        self.state = self.RUNNING
+        # Description of what went wrong, if state is FAILED
+        self.error = None
+        # Best fitness score so far, and the number of iterations done
+        self.fitness = None
+        self.iterations = 0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._result = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start seeding in the background."""
+        self._thread.start()
+
+    def _progress(self, fitness, iterations):
+        """Called by the GameSeeder as the seeding improves."""
+        self.fitness = fitness
+        self.iterations = iterations
+
+    def _run(self):
+        """Do the seeding. Runs in the job's thread."""
+        try:
+            if self.with_powers:
+                seed = self.seeder.seed_games_and_powers
+            else:
+                seed = self.seeder.seed_games
+            self._result = seed(self.omitting_players,
+                                self.players_doubling_up,
+                                self.deadline,
+                                self._progress,
+                                self.rounds)
+            self.state = self.FINISHED
+        except Exception as e:
+            self.error = '%s: %s' % (type(e).__name__, e)
+            self.state = self.FAILED
+        self.finished_at = time.monotonic()
+
+    def is_running(self):
+        """Returns True if the seeder is still searching."""
+        return self.state == self.RUNNING
+
+    def elapsed(self):
+        """Returns the number of seconds the job has been running (or ran for)."""
+        end = self.finished_at
+        if end is None:
+            end = time.monotonic()
+        return end - self.started_at
+
+    def stop(self):
+        """Ask the seeder to finish as soon as it can."""
+        self.seeder.stop()
+
+    def wait(self, timeout=None):
+        """
+        Wait until the seeding finishes, or timeout seconds have passed.
+        Returns True if the seeding has finished.
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def best(self):
+        """
+        Returns the best seeding found so far (or the final seeding, if
+        finished), or None if there isn't one yet.
+        If the seeding includes powers, None is returned until the job has
+        stopped, because assigning the powers uses the seeder's random
+        number generator, which the job's thread may still be using.
+        """
+        if self.state == self.FINISHED:
+            return self._result
+        if self.with_powers and self._thread.is_alive():
+            return None
+        return self.seeder.best_so_far(self.with_powers)
+
+
+# Dict, keyed by (Tournament pk, Round pk), of SeedingJobs
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def start_job(key, job):
+    """
+    Start job, as the seeding job for key.
+    Any earlier job for the same key is stopped and forgotten.
+    """
+    with _jobs_lock:
+        old_job = _jobs.get(key)
+        _jobs[key] = job
+    if old_job is not None:
+        old_job.stop()
+    job.start()
+
+
+def get_job(key):
+    """Returns the SeedingJob for key, or None."""
+    with _jobs_lock:
+        return _jobs.get(key)
+
+
+def remove_job(key):
+    """Stop and forget the SeedingJob (if any) for key, and return it."""
+    with _jobs_lock:
+        job = _jobs.pop(key, None)
+    if job is not None:
+        job.stop()
+    return job
@@ -0,0 +1,74 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test the assignment problem solver.
+"""
+
+import itertools
+import random
+import unittest
+
+from tournament.assignment import NotSquare
+from tournament.assignment import min_cost_assignment, random_min_cost_assignment
+
+
+def total_cost(costs, assignment):
+    return sum(costs[i][j] for i, j in enumerate(assignment))
+
+
+def brute_force_cost(costs):
+    return min(total_cost(costs, p) for p in itertools.permutations(range(len(costs))))
+
+
+class AssignmentTests(unittest.TestCase):
+    """
+    Test min_cost_assignment() and random_min_cost_assignment()
+    """
+
+    def test_empty(self):
+        self.assertEqual(min_cost_assignment([]), [])
+
+    def test_not_square(self):
+        self.assertRaises(NotSquare, min_cost_assignment, [[1, 2], [3, 4], [5, 6]])
+        self.assertRaises(NotSquare, min_cost_assignment, [[1, 2], [3]])
+
+    def test_identity(self):
+        costs = [[0 if i == j else 1 for j in range(7)] for i in range(7)]
+        self.assertEqual(min_cost_assignment(costs), list(range(7)))
+
+    def test_is_permutation(self):
+        costs = [[random.randint(0, 3) for _ in range(7)] for _ in range(7)]
+        self.assertEqual(sorted(min_cost_assignment(costs)), list(range(7)))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(42)
+        for n in range(1, 7):
+            for _ in range(20):
+                costs = [[rng.randint(-5, 10) for _ in range(n)] for _ in range(n)]
+                with self.subTest(costs=costs):
+                    self.assertEqual(total_cost(costs, min_cost_assignment(costs)),
+                                     brute_force_cost(costs))
+                    self.assertEqual(total_cost(costs, random_min_cost_assignment(costs, rng)),
+                                     brute_force_cost(costs))
+
+    def test_random_ties(self):
+        # With all costs equal, we should see different assignments
+        costs = [[0] * 7 for _ in range(7)]
+        results = set()
+        for _ in range(20):
+            results.add(tuple(random_min_cost_assignment(costs)))
+        self.assertTrue(len(results) > 1)
@@ -19,13 +19,13 @@ from django.utils import timezone
 
 from tournament.diplomacy.models.game_set import GameSet
 from tournament.diplomacy.models.great_power import GreatPower
-from tournament.diplomacy.values.diplomacy_values import TOTAL_SCS
-from tournament.game_scoring import G_SCORING_SYSTEMS
+from tournament.diplomacy.values.diplomacy_values import FIRST_YEAR, TOTAL_SCS
+from tournament.game_scoring import G_SCORING_SYSTEMS, DotCountUnknown, InvalidYear
 from tournament.game_scoring_system_views import SimpleGameState
 from tournament.models import Tournament, Round, Game, DrawProposal, CentreCount
 from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS
 from tournament.models import find_game_scoring_system
-from tournament.tournament_game_state import TournamentGameState
+from tournament.tournament_game_state import TournamentGameState, game_states
 
 from datetime import timedelta
 
@@ -178,6 +178,62 @@ class GameScoringTests(TestCase):
                 self.assertEqual(s, 0)
         self.assertEqual(sum(scores.values()), 80)
 
+    # TournamentGameState
+    def test_tgs_no_queries(self):
+        t = Tournament.objects.get(name='t1')
+        g = t.round_numbered(1).game_set.get(name='g11')
+        DrawProposal.objects.create(game=g, year=1905, season='S', passed=True, proposer=self.austria,
+                                    power_1=self.england, power_2=self.germany, power_3=self.russia,
+                                    power_4=self.turkey)
+        scs = g.centrecount_set.filter(year__lte=1905)
+        # One query each for the draw, the powers and the CentreCounts
+        with self.assertNumQueries(3):
+            tgs = TournamentGameState(scs, g)
+        with self.assertNumQueries(0):
+            for system in G_SCORING_SYSTEMS:
+                with self.subTest(system=system.name):
+                    system.scores(tgs)
+            self.assertEqual(len(tgs.all_powers()), 7)
+            self.assertEqual(tgs.powers_in_draw(), [self.england, self.germany, self.russia, self.turkey])
+            self.assertIsNone(tgs.soloer())
+
+    def test_game_states_no_centre_counts(self):
+        t = Tournament.objects.get(name='t1')
+        g = t.round_numbered(1).game_set.get(name='g11')
+        # As if the Game was created without using Game.save()
+        CentreCount.objects.filter(game=g).delete()
+        tgs = game_states([g])[g]
+        self.assertEqual(tgs.final_year, FIRST_YEAR - 1)
+        for power in GreatPower.objects.all():
+            with self.subTest(power=power):
+                self.assertEqual(tgs.dot_count(power), power.starting_centres)
+        for system in G_SCORING_SYSTEMS:
+            with self.subTest(system=system.name):
+                self.assertEqual(len(system.scores(tgs)), 7)
+
+    def test_tgs_dot_count(self):
+        t = Tournament.objects.get(name='t1')
+        g = t.round_numbered(1).game_set.get(name='g11')
+        tgs = TournamentGameState(g.centrecount_set.all())
+        self.assertEqual(tgs.dot_count(self.germany), 18)
+        self.assertEqual(tgs.dot_count(self.germany, 1904), 8)
+        self.assertRaises(DotCountUnknown, tgs.dot_count, self.germany, 1903)
+        self.assertRaises(InvalidYear, tgs.dot_count, self.germany, 1898)
+        self.assertRaises(InvalidYear, tgs.dot_count, self.germany, 1908)
+        self.assertEqual(tgs.highest_dot_count(), 18)
+        self.assertEqual(tgs.num_powers_with(0), 3)
+        self.assertEqual(tgs.soloer(), self.germany)
+        self.assertEqual(tgs.solo_year(), 1907)
+        self.assertEqual(tgs.survivors(), [self.germany, self.turkey, self.russia, self.england])
+
+    def test_tgs_year_eliminated(self):
+        t = Tournament.objects.get(name='t1')
+        g = t.round_numbered(1).game_set.get(name='g11')
+        tgs = TournamentGameState(g.centrecount_set.all())
+        self.assertEqual(tgs.year_eliminated(self.austria), 1904)
+        self.assertEqual(tgs.year_eliminated(self.france), 1906)
+        self.assertIsNone(tgs.year_eliminated(self.germany))
+
     # description
     def test_description(self):
         for system in G_SCORING_SYSTEMS:
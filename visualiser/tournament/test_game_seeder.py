@@ -18,6 +18,11 @@
 Assign powers to players in a Diplomacy game.
 """
 
+import copy
+import itertools
+import random
+import threading
+import time
 import unittest
 
 from string import ascii_uppercase
@@ -30,6 +35,7 @@ from tournament.game_seeder import InvalidWeight
 from tournament.game_seeder import PowersNotUnique
 from tournament.game_seeder import ImpossibleToSeed
 from tournament.game_seeder import SeedMethod
+from tournament.game_seeder import _PlanSearch, _SwapSearch
 
 
 class GameSeederSetupTest(unittest.TestCase):
@@ -144,6 +150,21 @@ class GameSeederSetupTest(unittest.TestCase):
                                ('F', '6'),
                                ('G', '7')]))
 
+    def test_add_player_after_played_game(self):
+        seeder = GameSeeder(self.powers)
+        for p in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
+            seeder.add_player(p)
+        seeder.add_played_game(set([('A', '1'),
+                                    ('B', '2'),
+                                    ('C', '3'),
+                                    ('D', '4'),
+                                    ('E', '5'),
+                                    ('F', '6'),
+                                    ('G', '7')]))
+        seeder.add_player('H')
+        self.assertEqual(30, seeder._fitness_score(set(['A', 'B', 'C', 'D', 'E', 'F', 'H'])))
+        self.assertEqual(0, seeder._power_fitness(set([('H', '1')])))
+
     # _add_bias()
     def test_add_bias_invalid_weight(self):
         seeder = GameSeeder(self.powers)
@@ -174,7 +195,9 @@ class GameSeederSetupTest(unittest.TestCase):
         seeder.add_bias('A', 'B')
         seeder.add_bias('B', 'A')
         # Result should be the sum
-        self.assertEqual(seeder.games_played_matrix['A']['B'],
+        a = seeder._player_index['A']
+        b = seeder._player_index['B']
+        self.assertEqual(seeder.games_played_matrix[a][b],
                          2 * seeder._BIAS_WEIGHT)
 
     def test_add_bias(self):
@@ -257,21 +280,6 @@ class GameSeederSetupTest(unittest.TestCase):
                                                        ('F', '6'),
                                                        ('G', '7')])))
 
-    # _assign_some_powers()
-    def test_assign_some_powers(self):
-        seeder = GameSeeder(self.powers)
-        seeder.add_player('A')
-        seeder.add_player('B')
-        seeder.add_player('C')
-        seeder.add_player('D')
-        seeder.add_player('E')
-        seeder.add_player('F')
-        seeder.add_player('G')
-        games = seeder._assign_some_powers(['A', 'B', 'C', 'D', 'E', 'F', 'G'],
-                                           self.powers)
-        self.assertEqual(len(games), 7*6*5*4*3*2)
-        # Ideally, we'd also check for duplicate seedings
-
     # _assign_powers()
     def test_assign_powers(self):
         seeder = GameSeeder(self.powers)
@@ -336,6 +344,15 @@ class GameSeederSetupTest(unittest.TestCase):
         self.assertTrue(('G', '6') in game)
         self.assertEqual(0, len(issues))
 
+    def test_assign_powers_no_games(self):
+        seeder = GameSeeder(self.powers)
+        for p in ['A', 'B', 'C', 'D', 'E', 'F', 'G']:
+            seeder.add_player(p)
+        game, issues = seeder._assign_powers(set(['A', 'B', 'C', 'D', 'E', 'F', 'G']))
+        self.assertEqual(set(self.powers), set([power for _, power in game]))
+        self.assertEqual(set(['A', 'B', 'C', 'D', 'E', 'F', 'G']), set([p for p, _ in game]))
+        self.assertEqual(0, len(issues))
+
     # _fitness_score()
     def test_fitness_score_no_games(self):
         seeder = GameSeeder(self.powers)
@@ -671,8 +688,8 @@ class GameSeederSeedingTest(unittest.TestCase):
             self.assertEqual(count, 2, "Player %s should be playing 2 games but is actually playing %d" % (p, count))
 
     def check_no_games_played(self, seeder):
-        for p1 in seeder.games_played_matrix.values():
-            for p2 in p1.values():
+        for p1 in seeder.games_played_matrix:
+            for p2 in p1:
                 self.assertEqual(p2, 0)
 
     # seed_games()
@@ -712,9 +729,13 @@ class GameSeederSeedingTest(unittest.TestCase):
         # which gives each game a fitness of 2+2+6=10, and the set a fitness of 10*3=30
         self.assertEqual(s._set_fitness(r), 30)
 
-    def seed_bigger_tournament(self, starts, iterations):
+    def seed_bigger_tournament(self, starts, iterations, seed_method=SeedMethod.RANDOM, processes=1):
         # Two rounds of a 49-player tournament
-        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'], starts, iterations)
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            starts,
+                            iterations,
+                            seed_method,
+                            processes=processes)
         for i in range(49):
             seeder.add_player('%dp' % i)
         r = seeder.seed_games()
@@ -740,6 +761,386 @@ class GameSeederSeedingTest(unittest.TestCase):
             with self.subTest(starts=starts, iterations=iterations):
                 self.seed_bigger_tournament(starts, iterations)
 
+    def test_seed_games_bigger_tournament_annealing(self):
+        the_cases = [(1, 1000), (10, 100)]
+        for (starts, iterations) in the_cases:
+            with self.subTest(starts=starts, iterations=iterations):
+                self.seed_bigger_tournament(starts, iterations, SeedMethod.ANNEALING)
+
+    def test_seed_games_bigger_tournament_parallel(self):
+        the_cases = [(SeedMethod.RANDOM, 100, 100), (SeedMethod.ANNEALING, 3, 1000)]
+        for (seed_method, starts, iterations) in the_cases:
+            with self.subTest(seed_method=seed_method):
+                self.seed_bigger_tournament(starts, iterations, seed_method, processes=2)
+
+    def test_seed_games_parallel_separate_dups(self):
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'], 4, 1000, processes=4)
+        for p in range(26):
+            s.add_player(ascii_uppercase[p])
+        dups = set(['A', 'B'])
+        r = s.seed_games(players_doubling_up=dups)
+        self.check_game_set(r, 28, duplicates=dups)
+        # Check that no game has both the players playing two games
+        for g in r:
+            self.assertNotEqual('A' in g, 'B' in g)
+        self.check_no_games_played(s)
+
+    def test_seed_games_annealing_bad_temperatures(self):
+        self.assertRaises(ValueError,
+                          GameSeeder,
+                          ['1', '2', '3', '4', '5', '6', '7'],
+                          seed_method=SeedMethod.ANNEALING,
+                          initial_temperature=1.0,
+                          final_temperature=0.0)
+
+    def test_seed_games_annealing_separate_dups(self):
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                       seed_method=SeedMethod.ANNEALING)
+        for p in range(18):
+            s.add_player(ascii_uppercase[p])
+        dups = set(['A', 'B', 'C'])
+        r = s.seed_games(players_doubling_up=dups)
+        self.check_game_set(r, 21, duplicates=dups)
+        # Check that no game has all the players playing two games
+        for g in r:
+            if ('A' in g) and ('B' in g):
+                self.assertNotIn('C', g)
+        self.check_no_games_played(s)
+
+    def check_deadline(self, seed_method, processes=1):
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            starts=1,
+                            iterations=100,
+                            seed_method=seed_method,
+                            processes=processes)
+        for i in range(49):
+            seeder.add_player('%dp' % i)
+        for g in seeder.seed_games():
+            seeder.add_played_game(with_powers(g))
+        reports = []
+        start = time.monotonic()
+        r = seeder.seed_games(deadline=0.5,
+                              progress=lambda f, i: reports.append((f, i)))
+        self.assertLess(time.monotonic() - start, 5)
+        self.check_game_set(r, 49)
+        # We should have done more than the one start
+        self.assertGreater(reports[-1][1], 100)
+        # Reported fitness should never get worse, and should end up as the best
+        for (f1, i1), (f2, i2) in zip(reports, reports[1:]):
+            self.assertLessEqual(f2, f1)
+            self.assertGreaterEqual(i2, i1)
+        self.assertEqual(seeder._set_fitness(r), reports[-1][0])
+
+    def test_seed_games_deadline(self):
+        self.check_deadline(SeedMethod.RANDOM)
+
+    def test_seed_games_deadline_annealing(self):
+        self.check_deadline(SeedMethod.ANNEALING)
+
+    def test_seed_games_deadline_parallel(self):
+        self.check_deadline(SeedMethod.ANNEALING, processes=2)
+
+    def test_best_so_far(self):
+        seeder = create_seeder(starts=10, num_players=21)
+        self.assertIsNone(seeder.best_so_far())
+        for g in seeder.seed_games():
+            seeder.add_played_game(with_powers(g))
+        seedings = []
+        r = seeder.seed_games(progress=lambda f, i: seedings.append((seeder.best_so_far(), f)))
+        self.assertEqual(len(seedings), 10)
+        for seeding, fitness in seedings:
+            self.check_game_set(seeding, 21)
+            self.assertEqual(seeder._set_fitness(seeding), fitness)
+        self.assertEqual(seeder.best_so_far(), r)
+        for (g, issues), players in zip(seeder.best_so_far(with_powers=True), r):
+            self.assertEqual(set(p for p, _ in g), players)
+            self.assertEqual(len(set(power for _, power in g)), 7)
+
+    def test_stop(self):
+        seeder = create_seeder(starts=1000, iterations=10, num_players=21)
+        for g in seeder.seed_games():
+            seeder.add_played_game(with_powers(g))
+        reports = []
+
+        def progress(fitness, iterations):
+            reports.append(fitness)
+            seeder.stop()
+
+        r = seeder.seed_games(progress=progress)
+        self.check_game_set(r, 21)
+        # Should have stopped after the first start
+        self.assertEqual(len(reports), 1)
+        # The next call shouldn't be affected
+        reports.clear()
+        seeder.seed_games(progress=lambda f, i: reports.append(f))
+        self.assertEqual(len(reports), 1000)
+
+    def test_stop_exhaustive(self):
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            seed_method=SeedMethod.EXHAUSTIVE)
+        for p in range(21):
+            seeder.add_player(ascii_uppercase[p])
+        for _ in range(2):
+            players = list(seeder.players)
+            random.shuffle(players)
+            for i in range(0, 21, 7):
+                seeder.add_played_game(with_powers(set(players[i:i + 7])))
+        seeder.stop()
+        r = seeder.seed_games()
+        self.check_game_set(r, 21)
+        self.assertEqual(seeder.best_so_far(), r)
+
+    def test_stop_parallel(self):
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            starts=1000000,
+                            iterations=10,
+                            processes=2)
+        for p in range(21):
+            seeder.add_player(ascii_uppercase[p])
+        for g in seeder.seed_games(deadline=0):
+            seeder.add_played_game(with_powers(g))
+        # Stop from another thread while the workers are running
+        timer = threading.Timer(0.5, seeder.stop)
+        timer.start()
+        start = time.monotonic()
+        r = seeder.seed_games()
+        timer.join()
+        self.assertLess(time.monotonic() - start, 10)
+        self.check_game_set(r, 21)
+
+    def check_reproducible(self, seed_method, processes=1):
+        results = []
+        for _ in range(2):
+            seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                                starts=4,
+                                iterations=100,
+                                seed_method=seed_method,
+                                processes=processes,
+                                seed=42)
+            self.assertEqual(seeder.seed, 42)
+            for i in range(21):
+                seeder.add_player('%dp' % i)
+            rounds = []
+            for _ in range(3):
+                games = seeder.seed_games_and_powers(players_doubling_up={'1p', '2p', '3p', '4p', '5p', '6p', '7p'})
+                rounds.append(games)
+                for g, _ in games:
+                    seeder.add_played_game(g)
+            results.append(rounds)
+        self.assertEqual(results[0], results[1])
+
+    def test_seed_games_reproducible(self):
+        self.check_reproducible(SeedMethod.RANDOM)
+
+    def test_seed_games_reproducible_annealing(self):
+        self.check_reproducible(SeedMethod.ANNEALING)
+
+    def test_seed_games_reproducible_parallel(self):
+        self.check_reproducible(SeedMethod.RANDOM, processes=2)
+
+    def test_seed_games_random_seed(self):
+        s1 = create_seeder()
+        s2 = create_seeder()
+        self.assertIsNotNone(s1.seed)
+        self.assertNotEqual(s1.seed, s2.seed)
+
+    def test_last_fitness(self):
+        seeder = create_seeder(num_players=21)
+        self.assertIsNone(seeder.last_fitness)
+        for g in seeder.seed_games():
+            seeder.add_played_game(with_powers(g))
+        r = seeder.seed_games()
+        self.assertEqual(seeder.last_fitness, seeder._set_fitness(r))
+
+    def test_power_cost(self):
+        seeder = create_seeder(num_players=14)
+        for _ in range(4):
+            for g, _ in seeder.seed_games_and_powers():
+                seeder.add_played_game(g)
+        for g in seeder.seed_games():
+            game = seeder._indices(g)
+            # Compare with trying every possible assignment
+            best = min(sum([seeder.powers_played[p][i] for p, i in zip(game, perm)])
+                       for perm in itertools.permutations(range(7)))
+            self.assertEqual(seeder._power_cost(game), best)
+
+    def test_power_weight_invalid(self):
+        self.assertRaises(ValueError, GameSeeder, ['1', '2', '3', '4', '5', '6', '7'], power_weight=-1)
+
+    def seed_with_power_weight(self, power_weight, seed):
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            starts=5,
+                            iterations=1000,
+                            seed_method=SeedMethod.ANNEALING,
+                            seed=seed,
+                            power_weight=power_weight)
+        history = GameSeeder(['1', '2', '3', '4', '5', '6', '7'], iterations=0, seed=seed)
+        for p in range(21):
+            seeder.add_player(ascii_uppercase[p])
+            history.add_player(ascii_uppercase[p])
+        # Six rounds, so players have played most powers
+        for _ in range(6):
+            for g, _ in history.seed_games_and_powers():
+                history.add_played_game(g)
+                seeder.add_played_game(g)
+        r = seeder.seed_games_and_powers()
+        self.check_game_set([set(p for p, _ in g) for g, _ in r], 21)
+        pairing_fitness = seeder._set_fitness([set(p for p, _ in g) for g, _ in r])
+        power_fitness = sum([seeder._power_fitness(g) for g, _ in r])
+        # Pairing and powers should both be in the reported fitness
+        self.assertEqual(seeder.last_fitness, pairing_fitness + power_weight * power_fitness)
+        return power_fitness
+
+    def test_seed_games_and_powers_power_weight(self):
+        with_weight = 0
+        without_weight = 0
+        for seed in range(4):
+            with_weight += self.seed_with_power_weight(5, seed)
+            without_weight += self.seed_with_power_weight(0, seed)
+        # Fewer repeated powers when they're taken into account
+        self.assertLess(with_weight, without_weight)
+
+    def test_swap_search_fitness_with_powers(self):
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'], power_weight=3)
+        for p in range(21):
+            s.add_player(ascii_uppercase[p])
+        for _ in range(4):
+            for g, _ in s.seed_games_and_powers():
+                s.add_played_game(g)
+        games = [set(s._indices(g)) for g in s.seed_games()]
+        s._with_powers = True
+        search = _SwapSearch(s, games)
+        for _ in range(200):
+            swap = search.random_swap()
+            if swap is None:
+                continue
+            fitness = search.swap(*swap)
+            # Incremental fitness should match a full recalculation
+            self.assertEqual(fitness, s._seeding_fitness(games))
+            self.assertEqual(search.power_costs, [s._power_cost(g) for g in games])
+        games, fitness = search.best()
+        self.assertEqual(fitness, s._seeding_fitness(games))
+        self.assertEqual(search.power_costs, [s._power_cost(g) for g in games])
+
+    def plan_fitness(self, seeder, plan):
+        # Total fitness score of the rounds in plan, if played in order
+        s = copy.deepcopy(seeder)
+        s._with_powers = False
+        fitness = 0
+        for games in plan:
+            fitness += s._seeding_fitness(games)
+            for g in games:
+                for p1, p2 in itertools.permutations(g, 2):
+                    s.games_played_matrix[p1][p2] += 1
+        if seeder._with_powers:
+            fitness += seeder.power_weight * sum(seeder._power_cost(g) for g in plan[0])
+        return fitness
+
+    def check_plan_search(self, s):
+        plan = [[set(s._indices(g)) for g in s.seed_games()] for _ in range(3)]
+        search = _PlanSearch(s, plan)
+        self.assertEqual(search.fitness, self.plan_fitness(s, plan))
+        for _ in range(200):
+            swap = search.random_swap()
+            if swap is None:
+                continue
+            fitness = search.swap(*swap)
+            # Incremental fitness should match a full recalculation
+            self.assertEqual(fitness, self.plan_fitness(s, plan))
+        plan, fitness = search.best()
+        self.assertEqual(fitness, self.plan_fitness(s, plan))
+        for games in plan:
+            self.check_game_set([s._players(g) for g in games], 21)
+
+    def test_plan_search_fitness(self):
+        s = create_seeder(num_players=21)
+        s.add_bias('A', 'B')
+        for _ in range(2):
+            for g in s.seed_games():
+                s.add_played_game(with_powers(g))
+        self.check_plan_search(s)
+
+    def test_plan_search_fitness_with_powers(self):
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'], power_weight=3)
+        for p in range(21):
+            s.add_player(ascii_uppercase[p])
+        for _ in range(2):
+            for g, _ in s.seed_games_and_powers():
+                s.add_played_game(g)
+        s._with_powers = True
+        self.check_plan_search(s)
+
+    def test_seed_games_lookahead(self):
+        s = create_seeder(starts=2, iterations=100, num_players=21)
+        for g in s.seed_games(rounds=4):
+            s.add_played_game(with_powers(g))
+        matrix = [row.tolist() for row in s.games_played_matrix]
+        reports = []
+        r = s.seed_games(rounds=3, progress=lambda f, i: reports.append((f, i)))
+        self.check_game_set(r, 21)
+        # The seeder state shouldn't have changed
+        self.assertEqual([row.tolist() for row in s.games_played_matrix], matrix)
+        # Reported fitness should never get worse, and should end up as the best
+        for (f1, i1), (f2, i2) in zip(reports, reports[1:]):
+            self.assertLessEqual(f2, f1)
+            self.assertGreaterEqual(i2, i1)
+        self.assertEqual(reports[-1][0], s.last_fitness)
+        # This round's fitness can be no worse than that of the whole plan
+        self.assertLessEqual(s._set_fitness(r), s.last_fitness)
+
+    def test_seed_games_lookahead_with_dups_and_sitters(self):
+        s = create_seeder(starts=2, iterations=100, num_players=19)
+        for g in s.seed_games(set(['A', 'B', 'C', 'D', 'E'])):
+            s.add_played_game(with_powers(g))
+        r = s.seed_games(players_doubling_up=set(['G', 'H']), rounds=3)
+        self.check_game_set(r, 21, duplicates=set(['G', 'H']))
+        r = s.seed_games(omitting_players=set(['G', 'H', 'I', 'J', 'K']), rounds=2)
+        self.check_game_set(r, 14, omissions=set(['G', 'H', 'I', 'J', 'K']))
+
+    def test_seed_games_lookahead_annealing_deadline(self):
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                       iterations=100,
+                       seed_method=SeedMethod.ANNEALING)
+        for i in range(28):
+            s.add_player('%dp' % i)
+        for g in s.seed_games():
+            s.add_played_game(with_powers(g))
+        start = time.monotonic()
+        r = s.seed_games(deadline=0.5, rounds=4)
+        self.assertLess(time.monotonic() - start, 5)
+        self.check_game_set(r, 28)
+
+    def test_seed_games_lookahead_exhaustive(self):
+        # rounds is ignored
+        s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                       seed_method=SeedMethod.EXHAUSTIVE)
+        for i in range(14):
+            s.add_player('%dp' % i)
+        for g in s.seed_games():
+            s.add_played_game(with_powers(g))
+        r = s.seed_games(rounds=3)
+        self.check_game_set(r, 14)
+        self.assertEqual(s._set_fitness(r), s.last_fitness)
+
+    def test_seed_games_lookahead_better(self):
+        # Planning ahead should leave fewer repeat meetings by the end
+        totals = []
+        for rounds_left in (lambda r: 1, lambda r: 7 - r):
+            s = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                           starts=10,
+                           iterations=100,
+                           seed=1)
+            for i in range(49):
+                s.add_player('%dp' % i)
+            total = 0
+            for r in range(7):
+                games = s.seed_games(rounds=rounds_left(r))
+                total += s._set_fitness(games)
+                for g in games:
+                    s.add_played_game(with_powers(g))
+            totals.append(total)
+        self.assertLess(totals[1], totals[0])
+
     def test_seed_games_wrong_number_of_players(self):
         # Total player count not a multiple of 7
         s = create_seeder(num_players=22)
@@ -807,6 +1208,38 @@ class GameSeederSeedingTest(unittest.TestCase):
         self.check_no_games_played(s)
 
 
+    # _SwapSearch
+    def check_swap_search(self, seeder, games, include_these_games):
+        search = _SwapSearch(seeder, games, include_these_games)
+        for _ in range(200):
+            swap = search.random_swap()
+            if swap is None:
+                continue
+            fitness = search.swap(*swap)
+            # Incremental fitness should match a full recalculation
+            self.assertEqual(fitness, seeder._seeding_fitness(games, include_these_games))
+        best_fitness = search.best_fitness
+        games, fitness = search.best()
+        self.assertEqual(fitness, best_fitness)
+        self.assertEqual(fitness, seeder._seeding_fitness(games, include_these_games))
+
+    def test_swap_search_fitness(self):
+        s = create_seeder(num_players=21)
+        r = s.seed_games()
+        for g in r:
+            s.add_played_game(with_powers(g))
+        s.add_bias('A', 'B')
+        games = [set(s._indices(g)) for g in s.seed_games()]
+        self.check_swap_search(s, games, False)
+
+    def test_swap_search_fitness_with_dups(self):
+        s = create_seeder(num_players=18)
+        r = s.seed_games(players_doubling_up=set(['A', 'B', 'C']))
+        for g in r:
+            s.add_played_game(with_powers(g))
+        players = s._player_pool(set(), set(['A', 'B', 'C']))
+        self.check_swap_search(s, s._assign_players_wrapper(players), True)
+
 class ExhaustiveGameSeederTest(unittest.TestCase):
     """
     Validate an exhaustive GameSeeder seeding games
@@ -841,7 +1274,7 @@ class ExhaustiveGameSeederTest(unittest.TestCase):
         self.assertEqual(len(players), 7 * game_count, "One or more players is playing multiple games")
 
     def test_exhaustive_seeding(self):
-        players = [(7, 42), (14, 36)]
+        players = [(7, 42), (14, 36), (21, 30), (28, 24)]
         for count, fitness in players:
             with self.subTest(player_count=count):
                 seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
@@ -892,3 +1325,66 @@ class ExhaustiveGameSeederTest(unittest.TestCase):
         for i in range(13):
             seeder.add_player('%dp' %i)
         self.assertRaises(InvalidPlayerCount, seeder.seed_games)
+
+    def all_seedings(self, players):
+        # Generate every possible seeding the slow way
+        if not players:
+            yield []
+            return
+        for others in itertools.combinations(range(1, len(players)), 6):
+            game = set([players[0]] + [players[i] for i in others])
+            if len(game) < 7:
+                continue
+            left = [p for i, p in enumerate(players) if i and (i not in others)]
+            for seeding in self.all_seedings(left):
+                yield [game] + seeding
+
+    def check_exhaustive_is_best(self, players_doubling_up):
+        rng = random.Random(7)
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            seed_method=SeedMethod.EXHAUSTIVE)
+        for i in range(14):
+            seeder.add_player('%dp' % i)
+        # Play some random games
+        for _ in range(3):
+            players = ['%dp' % i for i in range(14)]
+            rng.shuffle(players)
+            seeder.add_played_game(with_powers(set(players[:7])))
+            seeder.add_played_game(with_powers(set(players[7:])))
+        seeder.add_bias('0p', '1p')
+        include_these_games = len(players_doubling_up) > 1
+        omitting = set(['%dp' % i for i in range(13, 13 - len(players_doubling_up), -1)])
+        r = seeder.seed_games(omitting, players_doubling_up)
+        self.assertEqual(len(r), 2)
+        for g in r:
+            self.check_game(g)
+        players = seeder._player_pool(omitting, players_doubling_up)
+        best = min(seeder._seeding_fitness(s, include_these_games)
+                   for s in self.all_seedings(sorted(players)))
+        self.assertEqual(seeder._set_fitness(r, include_these_games), best)
+
+    def test_exhaustive_is_best(self):
+        self.check_exhaustive_is_best(set())
+
+    def test_exhaustive_is_best_with_dups(self):
+        self.check_exhaustive_is_best(set(['2p', '3p']))
+
+    def test_exhaustive_deadline(self):
+        rng = random.Random(21)
+        seeder = GameSeeder(['1', '2', '3', '4', '5', '6', '7'],
+                            seed_method=SeedMethod.EXHAUSTIVE)
+        for i in range(21):
+            seeder.add_player('%dp' % i)
+        # Random games are hard to improve on (this takes a minute or so without a deadline)
+        for _ in range(3):
+            players = ['%dp' % i for i in range(21)]
+            rng.shuffle(players)
+            for n in range(0, 21, 7):
+                seeder.add_played_game(with_powers(set(players[n:n + 7])))
+        reports = []
+        start = time.monotonic()
+        r = seeder.seed_games(deadline=0.2,
+                              progress=lambda f, i: reports.append((f, i)))
+        self.assertLess(time.monotonic() - start, 5)
+        self.check_game_set(r, 21)
+        self.assertEqual(seeder._set_fitness(r), reports[-1][0])
@@ -26,16 +26,16 @@ from tournament.diplomacy.models.supply_centre import SupplyCentre
 from tournament.game_scoring import G_SCORING_SYSTEMS
 from tournament.models import Tournament, Round, Game, DrawProposal, GameImage
 from tournament.models import SupplyCentreOwnership, CentreCount, Preference
-from tournament.models import SeederBias
+from tournament.models import PowerBid, SeederBias
 from tournament.models import TournamentPlayer, RoundPlayer, GamePlayer
-from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS
+from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS, TScoringSum
 from tournament.models import SPRING
-from tournament.models import find_game_scoring_system
+from tournament.models import find_game_scoring_system, game_scores
 from tournament.models import find_round_scoring_system
 from tournament.models import find_tournament_scoring_system
 from tournament.models import validate_game_name, validate_sc_count, validate_vote_count
 from tournament.models import SCOwnershipsNotFound, InvalidScoringSystem, InvalidYear
-from tournament.models import InvalidPreferenceList
+from tournament.models import InvalidPreferenceList, PowerAlreadyAssigned
 from tournament.players import Player, MASK_ALL_BG
 
 from datetime import timedelta
@@ -555,6 +555,15 @@ class TournamentModelTests(TestCase):
             with self.subTest(player=p):
                 self.assertEqual(scores[p], s)
 
+        # The number of queries shouldn't depend on the number of players
+        system = t.round_scoring_system_obj()
+        gps = GamePlayer.objects.filter(game__the_round=r2)
+        non_players = RoundPlayer.objects.filter(the_round=r2, player__in=[self.p3, self.p6])
+        with self.assertNumQueries(5):
+            system.scores(gps, non_players)
+        with self.assertNumQueries(5):
+            system.scores(gps.filter(player=self.p1), non_players.filter(player=self.p3))
+
         # Clean up
         t.delete()
 
@@ -704,7 +713,26 @@ class TournamentModelTests(TestCase):
         t_str = str(t)
         self.assertIn('best 4', t_str)
 
-    # TODO TScoringSum.scores_detail()
+    # TScoringSum.scores_detail()
+    def test_tscoringsum_scores_detail(self):
+        t = Tournament.objects.get(name='t1')
+        r11, r12 = t.round_set.filter(roundplayer__isnull=False).distinct()
+        players = [self.p1, self.p2, self.p3, self.p4, self.p5, self.p6, self.p7, self.p8]
+        # Give each player a different pattern of round scores
+        round_scores = {r11: {p: float(n) for n, p in enumerate(players)},
+                        r12: {p: 10.0 - n for n, p in enumerate(players)}}
+        rps = RoundPlayer.objects.filter(the_round__tournament=t)
+        # Everything we need is in a single query, however many players there are
+        with self.assertNumQueries(1):
+            t_scores, r_scores = TScoringSum('Best 1', 1).scores_detail(rps, round_scores)
+        self.assertEqual(r_scores, round_scores)
+        for n, p in enumerate(players):
+            with self.subTest(player=p):
+                self.assertEqual(t_scores[p], max(float(n), 10.0 - n))
+        t_scores, _ = TScoringSum('Best 2', 2).scores_detail(rps, round_scores)
+        for p in players:
+            with self.subTest(player=p):
+                self.assertEqual(t_scores[p], 10.0)
 
     # find_scoring_system()
     # Mostly tested implicitly, but we do want to check the error case
@@ -717,6 +745,28 @@ class TournamentModelTests(TestCase):
     def test_find_t_scoring_system_invalid(self):
         self.assertEqual(None, find_tournament_scoring_system('Invalid System'))
 
+    # game_scores()
+    def test_game_scores(self):
+        games = Game.objects.all()
+        # Should include both finished and unfinished Games
+        self.assertTrue(games.filter(is_finished=True).exists())
+        self.assertTrue(games.filter(is_finished=False).exists())
+        for force in [False, True]:
+            with self.subTest(force_recalculation=force):
+                all_scores = game_scores(games, force)
+                self.assertEqual(len(all_scores), len(games))
+                for g in games:
+                    self.assertEqual(all_scores[g], g.scores(force))
+
+    def test_game_scores_queries(self):
+        games = list(Game.objects.all())
+        # Finished games' scores, Rounds, GreatPowers, draws and CentreCounts
+        with self.assertNumQueries(5):
+            game_scores(games)
+
+    def test_game_scores_none(self):
+        self.assertEqual(game_scores([]), {})
+
     # validate_sc_count()
     def test_validate_sc_count_negative(self):
         self.assertRaises(ValidationError, validate_sc_count, -1)
@@ -870,6 +920,62 @@ class TournamentModelTests(TestCase):
                 with self.subTest(k=k):
                     self.assertEqual(p_and_s[k][0], 1)
 
+    def test_tournament_positions_and_scores_match_scores_detail(self):
+        for name in ['t1', 't2', 't3']:
+            with self.subTest(tournament=name):
+                t = Tournament.objects.get(name=name)
+                t_scores, r_scores = t.scores_detail()
+                p_and_s, r_scores2 = t.positions_and_scores()
+                self.assertEqual({p: s for p, (_, s) in p_and_s.items()}, t_scores)
+                self.assertEqual(p_and_s, t._positions(t_scores))
+                self.assertEqual(r_scores2, {r: s for r, s in r_scores.items() if s})
+
+    # Tournament.update_standings()
+    def test_tournament_update_standings(self):
+        t = Tournament.objects.get(name='t1')
+        r1 = t.round_numbered(1)
+        g = r1.game_set.get(name='g11')
+        t.update_standings()
+        # Nothing has changed, so there's nothing to do
+        with self.assertNumQueries(1):
+            t.update_standings()
+        # Turkey (p8) soloes
+        cc = CentreCount.objects.create(power=self.turkey, game=g, year=1905, count=18)
+        # Only the one Round should need rescoring
+        self.assertEqual(list(t.round_set.filter(standings_stale=True)), [r1])
+        p_and_s = t.positions_and_scores()[0]
+        self.assertEqual(p_and_s[self.p8], (1, 100.0))
+        for k in p_and_s:
+            if k not in [self.p5, self.p8]:
+                with self.subTest(k=k):
+                    self.assertEqual(p_and_s[k][0], 2)
+        self.assertFalse(t.round_set.filter(standings_stale=True).exists())
+        # And back again
+        cc.delete()
+        self.assertEqual(list(t.round_set.filter(standings_stale=True)), [r1])
+        p_and_s = t.positions_and_scores()[0]
+        self.assertEqual(p_and_s[self.p8], (1, 0.0))
+        # Changing who played in a Round can change the scores of later Rounds
+        rp = r1.roundplayer_set.first()
+        rp.delete()
+        self.assertEqual(list(t.round_set.filter(standings_stale=True)), list(t.round_set.all()))
+        t.update_standings()
+        self.assertFalse(t.round_set.filter(standings_stale=True).exists())
+        gp = GamePlayer.objects.filter(game__the_round=t.round_numbered(2)).first()
+        gp.delete()
+        self.assertEqual(list(t.round_set.filter(standings_stale=True)), list(t.round_set.filter(ordinal__gte=2)))
+
+    def test_tournament_update_standings_unranked(self):
+        t = Tournament.objects.get(name='t1')
+        t.update_standings()
+        tp = t.tournamentplayer_set.get(player=self.p5)
+        tp.unranked = False
+        tp.save()
+        self.assertEqual(tp.position(), 1)
+        tp.unranked = True
+        tp.save()
+        self.assertEqual(tp.position(), Tournament.UNRANKED)
+
     # Tournament.store_scores()
     def test_tourney_store_scores(self):
         now = timezone.now()
@@ -949,6 +1055,12 @@ class TournamentModelTests(TestCase):
         t = Tournament.objects.get(name='t1')
         self.assertEqual(t.round_numbered(3).number(), 3)
 
+    def test_tourney_round_numbered_queries(self):
+        t = Tournament.objects.get(name='t1')
+        with self.assertNumQueries(1):
+            r = t.round_numbered(2)
+        self.assertEqual(r, t.round_set.all()[1])
+
     # Tournament.best_countries()
     def test_tournament_best_countries_with_games(self):
         t = Tournament.objects.get(name='t1')
@@ -959,6 +1071,34 @@ class TournamentModelTests(TestCase):
         t = Tournament.objects.get(name='t3')
         self.assertEqual({}, t.best_countries())
 
+    def test_tournament_best_countries_detail(self):
+        t = Tournament.objects.get(name='t1')
+        with self.assertNumQueries(8):
+            bcd = t.best_countries_detail(True)
+        bc = t.best_countries(True)
+        for power, tuples in bcd.items():
+            self.assertEqual([gp for gp, _, _, _ in tuples], bc[power])
+            for gp, score, dots, unranked in tuples:
+                with self.subTest(power=power, game=gp.game.name):
+                    self.assertEqual(score, gp.game.scores()[power])
+                    self.assertEqual(dots, gp.final_sc_count())
+                    self.assertEqual(unranked, gp.tournamentplayer().unranked)
+
+    def test_tournament_best_countries_detail_no_centre_counts(self):
+        t = Tournament.objects.get(name='t1')
+        g11 = Game.objects.get(name='g11')
+        # As if the Game was created without using Game.save()
+        g11.centrecount_set.all().delete()
+        bcd = t.best_countries_detail(True)
+        found = 0
+        for power, tuples in bcd.items():
+            for gp, score, dots, unranked in tuples:
+                if gp.game == g11:
+                    found += 1
+                    with self.subTest(power=power):
+                        self.assertEqual(dots, power.starting_centres)
+        self.assertEqual(found, 7)
+
     def test_tournament_best_countries_with_unranked(self):
         t = Tournament.objects.get(name='t1')
         bc = t.best_countries()
@@ -1148,6 +1288,72 @@ class TournamentModelTests(TestCase):
         # Clean-up
         t.delete()
 
+    # Tournament and Round states
+    def test_tourney_state_maintained(self):
+        t = Tournament.objects.create(name='Lifecycle',
+                                      start_date=timezone.now(),
+                                      end_date=timezone.now(),
+                                      round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                      tournament_scoring_system=T_SCORING_SYSTEMS[0].name)
+        r1 = Round.objects.create(tournament=t,
+                                  scoring_system=s1,
+                                  dias=True,
+                                  start=t.start_date)
+        r2 = Round.objects.create(tournament=t,
+                                  scoring_system=s1,
+                                  dias=True,
+                                  start=r1.start + HOURS_8)
+
+        def check(t_state, r1_state, r2_state):
+            # Use fresh objects, to check what's stored
+            t2 = Tournament.objects.get(pk=t.pk)
+            rds = list(t2.round_set.all())
+            # Everything should be known without any further queries
+            with self.assertNumQueries(0):
+                self.assertEqual((t2.is_finished(), t2.in_progress()), t_state)
+                self.assertEqual((rds[0].is_finished(), rds[0].in_progress()), r1_state)
+                self.assertEqual((rds[1].is_finished(), rds[1].in_progress()), r2_state)
+
+        check((False, False), (False, False), (False, False))
+        # Roll call for round 1
+        RoundPlayer.objects.create(player=self.p1, the_round=r1)
+        check((False, True), (False, True), (False, False))
+        g = Game.objects.create(name='Lifecycle', the_round=r1, the_set=self.set1)
+        check((False, True), (False, True), (False, False))
+        g.is_finished = True
+        g.save()
+        # Between rounds
+        check((False, True), (True, False), (False, False))
+        self.assertEqual(Tournament.objects.get(pk=t.pk).current_round(), r2)
+        g2 = Game.objects.create(name='Lifecycle2', the_round=r2, the_set=self.set1, is_finished=True)
+        check((True, False), (True, False), (True, False))
+        self.assertIsNone(Tournament.objects.get(pk=t.pk).current_round())
+        # Adding a new round means the tournament isn't finished after all
+        r3 = Round.objects.create(tournament=t,
+                                  scoring_system=s1,
+                                  dias=True,
+                                  start=r2.start + HOURS_8)
+        self.assertTrue(Tournament.objects.get(pk=t.pk).in_progress())
+        r3.delete()
+        self.assertTrue(Tournament.objects.get(pk=t.pk).is_finished())
+        # Removing the game means the round hasn't even started
+        g2.delete()
+        check((False, True), (True, False), (False, False))
+        # Changing a RoundPlayer can't change any state, so shouldn't look for changes
+        rp = RoundPlayer.objects.get(player=self.p1, the_round=r1)
+        rp.score = 7.0
+        with self.assertNumQueries(3):
+            rp.save()
+        # An instance loaded earlier should see a game finishing
+        stale = Tournament.objects.get(pk=t.pk)
+        g3 = Game.objects.create(name='Lifecycle3', the_round=r2, the_set=self.set1)
+        g3.is_finished = True
+        g3.save()
+        stale._scores_detail()
+        self.assertTrue(stale.is_finished())
+        # Clean-up
+        t.delete()
+
     # Tournament.wdd_url()
     def test_tournament_wdd_url(self):
         t = Tournament.objects.get(name='t3')
@@ -1577,6 +1783,158 @@ class TournamentModelTests(TestCase):
         r.delete()
         t.delete()
 
+    # Round.assign_powers_from_prefs()
+    def test_round_assign_powers_from_prefs(self):
+        now = timezone.now()
+        t = Tournament.objects.create(name='t5',
+                                      start_date=now,
+                                      end_date=now,
+                                      round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                      tournament_scoring_system=T_SCORING_SYSTEMS[0].name,
+                                      draw_secrecy=Tournament.SECRET)
+        players = [self.p1, self.p2, self.p3, self.p4, self.p5, self.p6, self.p7, self.p8]
+        tps = [TournamentPlayer.objects.create(tournament=t, player=p) for p in players]
+        # We need a previous round with a finished game
+        r1 = Round.objects.create(tournament=t,
+                                  scoring_system='Sum of Squares',
+                                  dias=True,
+                                  start=t.start_date)
+        Game.objects.create(name='newgame1',
+                            started_at=r1.start,
+                            the_round=r1,
+                            is_finished=True,
+                            the_set=self.set1)
+        # p1 has the highest score, p8 the lowest
+        for p, score in zip(players, [30.0, 25.0, 20.0, 10.0, 8.0, 6.0, 4.0, 2.0]):
+            RoundPlayer.objects.create(the_round=r1, player=p, score=score)
+        # Now the round we want to assign powers for, with two games
+        r2 = Round.objects.create(tournament=t,
+                                  scoring_system='Sum of Squares',
+                                  dias=True,
+                                  start=t.start_date + HOURS_8)
+        g2 = Game.objects.create(name='newgame2',
+                                 started_at=r2.start,
+                                 the_round=r2,
+                                 the_set=self.set1)
+        g3 = Game.objects.create(name='newgame3',
+                                 started_at=r2.start,
+                                 the_round=r2,
+                                 the_set=self.set1)
+        for p in players:
+            RoundPlayer.objects.create(the_round=r2, player=p)
+        for p in [self.p1, self.p3, self.p5, self.p7]:
+            GamePlayer.objects.create(game=g2, player=p)
+        for p in [self.p2, self.p4, self.p6, self.p8]:
+            GamePlayer.objects.create(game=g3, player=p)
+        # Everyone except p1 and p2 wants Austria, then England
+        for tp in tps[2:]:
+            Preference.objects.create(player=tp, power=self.austria, ranking=1)
+            Preference.objects.create(player=tp, power=self.england, ranking=2)
+        Preference.objects.create(player=tps[2], power=self.france, ranking=3)
+        r2.assign_powers_from_prefs()
+        # Lowest-ranked player in each game gets first choice
+        self.assertEqual(GamePlayer.objects.get(game=g2, player=self.p7).power, self.austria)
+        self.assertEqual(GamePlayer.objects.get(game=g3, player=self.p8).power, self.austria)
+        self.assertEqual(GamePlayer.objects.get(game=g2, player=self.p5).power, self.england)
+        self.assertEqual(GamePlayer.objects.get(game=g3, player=self.p6).power, self.england)
+        # Third preference
+        self.assertEqual(GamePlayer.objects.get(game=g2, player=self.p3).power, self.france)
+        # Preferences all gone, so a random free power
+        gp = GamePlayer.objects.get(game=g3, player=self.p4)
+        self.assertNotIn(gp.power, [None, self.austria, self.england])
+        # Everyone should have a different power in each game
+        for g in [g2, g3]:
+            with self.subTest(game=g.name):
+                powers = [gp.power for gp in g.gameplayer_set.all()]
+                self.assertNotIn(None, powers)
+                self.assertEqual(len(set(powers)), len(powers))
+        # Doing it again should fail
+        self.assertRaises(PowerAlreadyAssigned, r2.assign_powers_from_prefs)
+        # Clean up
+        # Note that this will also delete all Games, GamePlayers, RoundPlayers,
+        # TournamentPlayers and Preferences
+        t.delete()
+        self.assertEqual(Preference.objects.count(), 0)
+
+    # Round.assign_powers_from_bids()
+    def test_round_assign_powers_from_bids(self):
+        now = timezone.now()
+        t = Tournament.objects.create(name='t5',
+                                      start_date=now,
+                                      end_date=now,
+                                      round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                      tournament_scoring_system=T_SCORING_SYSTEMS[0].name,
+                                      draw_secrecy=Tournament.SECRET,
+                                      power_assignment=Tournament.AUCTION_PER_ROUND)
+        tp1 = TournamentPlayer.objects.create(tournament=t, player=self.p1)
+        tp2 = TournamentPlayer.objects.create(tournament=t, player=self.p2)
+        TournamentPlayer.objects.create(tournament=t, player=self.p3)
+        r = Round.objects.create(tournament=t,
+                                 scoring_system='Sum of Squares',
+                                 dias=True,
+                                 start=t.start_date)
+        g = Game.objects.create(name='newgame1',
+                                started_at=r.start,
+                                the_round=r,
+                                the_set=self.set1)
+        for p in [self.p1, self.p2, self.p3]:
+            GamePlayer.objects.create(game=g, player=p)
+        # p1 bids more for Austria than England, but the total is highest
+        # if p1 gets England and p2 gets Austria
+        PowerBid.objects.create(player=tp1, the_round=r, power=self.austria, bid=50)
+        PowerBid.objects.create(player=tp1, the_round=r, power=self.england, bid=40)
+        PowerBid.objects.create(player=tp2, the_round=r, power=self.austria, bid=60)
+        PowerBid.objects.create(player=tp2, the_round=r, power=self.england, bid=10)
+        r.assign_powers_from_bids()
+        self.assertEqual(GamePlayer.objects.get(game=g, player=self.p1).power, self.england)
+        self.assertEqual(GamePlayer.objects.get(game=g, player=self.p2).power, self.austria)
+        # p3 didn't bid, so gets one of the powers left
+        gp = GamePlayer.objects.get(game=g, player=self.p3)
+        self.assertNotIn(gp.power, [None, self.austria, self.england])
+        # Doing it again should fail
+        self.assertRaises(PowerAlreadyAssigned, r.assign_powers_from_bids)
+        # Clean up
+        # Note that this will also delete all Rounds, Games, GamePlayers,
+        # TournamentPlayers and PowerBids
+        t.delete()
+
+    def test_round_assign_powers_from_bids_total(self):
+        now = timezone.now()
+        t = Tournament.objects.create(name='t5',
+                                      start_date=now,
+                                      end_date=now,
+                                      round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                      tournament_scoring_system=T_SCORING_SYSTEMS[0].name,
+                                      draw_secrecy=Tournament.SECRET,
+                                      power_assignment=Tournament.AUCTION_TOTAL)
+        tp1 = TournamentPlayer.objects.create(tournament=t, player=self.p1)
+        tp2 = TournamentPlayer.objects.create(tournament=t, player=self.p2)
+        r1 = Round.objects.create(tournament=t,
+                                  scoring_system='Sum of Squares',
+                                  dias=True,
+                                  start=t.start_date)
+        r2 = Round.objects.create(tournament=t,
+                                  scoring_system='Sum of Squares',
+                                  dias=True,
+                                  start=t.start_date + HOURS_8)
+        # p1 spends 190 of their 200 in the first round
+        for power, bid in [(self.austria, 60), (self.england, 60), (self.france, 60), (self.germany, 10)]:
+            PowerBid.objects.create(player=tp1, the_round=r1, power=power, bid=bid)
+        g = Game.objects.create(name='newgame2',
+                                started_at=r2.start,
+                                the_round=r2,
+                                the_set=self.set1)
+        for p in [self.p1, self.p2]:
+            GamePlayer.objects.create(game=g, player=p)
+        # p1 only has 10 left, so their bid should be ignored
+        PowerBid.objects.create(player=tp1, the_round=r2, power=self.austria, bid=50)
+        PowerBid.objects.create(player=tp2, the_round=r2, power=self.austria, bid=5)
+        r2.assign_powers_from_bids()
+        self.assertEqual(GamePlayer.objects.get(game=g, player=self.p2).power, self.austria)
+        self.assertNotIn(GamePlayer.objects.get(game=g, player=self.p1).power, [None, self.austria])
+        # Clean up
+        t.delete()
+
     # Round.is_finished()
     def test_round_is_finished_no_games_over(self):
         t = Tournament.objects.get(name='t1')
@@ -1668,6 +2026,33 @@ class TournamentModelTests(TestCase):
         r22 = t.round_set.all()[1]
         self.assertEqual(r22.number(), 2)
 
+    def test_round_number_renumbered(self):
+        t = Tournament.objects.get(name='t1')
+        rounds = list(t.round_set.all())
+        # Add a Round before all the others
+        r = Round.objects.create(tournament=t,
+                                 scoring_system=G_SCORING_SYSTEMS[0].name,
+                                 dias=True,
+                                 start=rounds[0].start - HOURS_8)
+        self.assertEqual(r.number(), 1)
+        for n, r2 in enumerate(rounds, 2):
+            with self.subTest(round=n):
+                r2.refresh_from_db()
+                self.assertEqual(r2.number(), n)
+        # Move it to the end
+        r.start = rounds[-1].start + HOURS_8
+        r.save()
+        self.assertEqual(r.number(), len(rounds) + 1)
+        self.assertEqual(t.round_numbered(1), rounds[0])
+        # And remove it again
+        r.start = rounds[0].start - HOURS_8
+        r.save()
+        r.delete()
+        for n, r2 in enumerate(rounds, 1):
+            with self.subTest(round=n):
+                r2.refresh_from_db()
+                self.assertEqual(r2.number(), n)
+
     # Round.background()
     def test_round_background(self):
         t = Tournament.objects.get(name='t1')
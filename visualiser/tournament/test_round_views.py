@@ -18,18 +18,21 @@ from datetime import timedelta
 from urllib.parse import urlencode
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
 from tournament.diplomacy.models.game_set import GameSet
 from tournament.diplomacy.models.great_power import GreatPower
+from tournament.game_seeder import GameSeeder
 from tournament.game_scoring import G_SCORING_SYSTEMS
 from tournament.models import Tournament, TournamentPlayer
 from tournament.models import Round, RoundPlayer
 from tournament.models import Game, GamePlayer, SeederBias
 from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS
 from tournament.players import Player
+from tournament.round_views import _create_game_seeder
+from tournament.seeding_jobs import SeedingJob, get_job
 
 class RoundViewTests(TestCase):
     fixtures = ['game_sets.json']
@@ -790,6 +793,111 @@ class RoundViewTests(TestCase):
         # Clean up
         g.delete()
 
+    @override_settings(SEEDER_BACKGROUND=True)
+    def test_seed_games_background(self):
+        # Eight players, one sitting out, AUTO power assignment
+        self.assertEqual(self.r32.game_set.count(), 0)
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        response = self.client.get(reverse('seed_games', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('seeding_status', args=(self.t3.pk, 2)))
+        job = get_job((self.t3.pk, self.r32.pk))
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FINISHED)
+        response = self.client.get(reverse('seeding_status', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'<meta http-equiv="refresh"', response.content)
+        # No Games until the seeding is accepted
+        self.assertEqual(self.r32.game_set.count(), 0)
+        response = self.client.post(reverse('accept_seeding', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 200)
+        # A single Game should have been created
+        g_qs = self.r32.game_set
+        self.assertEqual(g_qs.count(), 1)
+        # with seven GamePlayers
+        g = g_qs.get()
+        self.assertEqual(g.gameplayer_set.count(), 7)
+        # and the job is gone
+        self.assertIsNone(get_job((self.t3.pk, self.r32.pk)))
+        # The seeding should have been recorded
+        sr = self.r32.seedingrecord_set.get()
+        self.assertEqual(sr.seed, job.seeder.seed)
+        self.assertEqual(sr.fitness, job.seeder.last_fitness)
+        # Accepting again (e.g. refreshing the page) should keep the Game
+        response = self.client.post(reverse('accept_seeding', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('game_index', args=(self.t3.pk, 2)))
+        self.assertEqual(g_qs.get(), g)
+        self.assertEqual(self.r32.seedingrecord_set.count(), 1)
+        # Clean up
+        sr.delete()
+        g.delete()
+
+    def test_seeding_status_no_job(self):
+        # The job may be in another server process
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        response = self.client.get(reverse('seeding_status', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'<meta http-equiv="refresh"', response.content)
+        self.assertContains(response, reverse('seed_games', args=(self.t3.pk, 2)))
+
+    def test_accept_seeding_no_job(self):
+        # Should not seed the round
+        self.assertEqual(self.r32.game_set.count(), 0)
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        response = self.client.post(reverse('accept_seeding', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('seeding_status', args=(self.t3.pk, 2)))
+        self.assertEqual(self.r32.game_set.count(), 0)
+        self.assertEqual(self.r32.seedingrecord_set.count(), 0)
+
+    @override_settings(SEEDER_SEED=1234)
+    def test_seed_games_recorded(self):
+        # Eight players, one sitting out, AUTO power assignment
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        seedings = []
+        for _ in range(2):
+            response = self.client.get(reverse('seed_games', args=(self.t3.pk, 2)))
+            self.assertEqual(response.status_code, 200)
+            sr = self.r32.seedingrecord_set.last()
+            self.assertEqual(sr.seed, 1234)
+            self.assertEqual(sr.seed_method, 'RANDOM')
+            self.assertIsNotNone(sr.fitness)
+            # One game of seven players
+            self.assertEqual(len(sr.seeding.splitlines()), 1)
+            self.assertEqual(len(sr.seeding.split(', ')), 7)
+            seedings.append(sr.seeding)
+        self.assertEqual(self.r32.seedingrecord_set.count(), 2)
+        # The same seed should give the same seeding
+        self.assertEqual(seedings[0], seedings[1])
+        # Clean up
+        self.r32.seedingrecord_set.all().delete()
+        self.r32.game_set.all().delete()
+
+    @override_settings(SEEDER_POWER_WEIGHT=2)
+    def test_seed_games_power_weight(self):
+        # Eight players, one sitting out, AUTO power assignment
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        response = self.client.get(reverse('seed_games', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 200)
+        sr = self.r32.seedingrecord_set.get()
+        self.assertEqual(sr.power_weight, 2)
+        # Clean up
+        sr.delete()
+        self.r32.game_set.all().delete()
+
+    @override_settings(SEEDER_LOOKAHEAD=True)
+    def test_seed_games_lookahead(self):
+        # Eight players, one sitting out, AUTO power assignment
+        self.client.login(username=self.USERNAME1, password=self.PWORD1)
+        response = self.client.get(reverse('seed_games', args=(self.t3.pk, 2)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.r32.game_set.count(), 1)
+        self.assertEqual(GamePlayer.objects.filter(game__the_round=self.r32).count(), 7)
+        # Clean up
+        self.r32.seedingrecord_set.all().delete()
+        self.r32.game_set.all().delete()
+
     def test_seed_games_auto_good_number_with_doublers(self):
         # 13 players, one playing two games, AUTO power assignment
         self.assertEqual(self.r11.game_set.count(), 0)
@@ -1211,6 +1319,28 @@ class RoundViewTests(TestCase):
                 else:
                     self.assertEqual(tp.score, tp.player.pk)
 
+    def test_create_game_seeder(self):
+        # Five queries, regardless of how many games have been played
+        with self.assertNumQueries(5):
+            seeder = _create_game_seeder(self.t3, 2)
+        tp1 = self.t3.tournamentplayer_set.get(player=self.p1)
+        tp4 = self.t3.tournamentplayer_set.get(player=self.p4)
+        tp9 = self.t3.tournamentplayer_set.get(player=self.p9)
+        # p1 and p4 played together in round 1
+        self.assertEqual(seeder.games_played_matrix[seeder._index(tp1)][seeder._index(tp4)], 1)
+        # p9 didn't play in round 1
+        self.assertEqual(seeder.games_played_matrix[seeder._index(tp1)][seeder._index(tp9)], 0)
+        # p1 played Turkey
+        self.assertEqual(seeder.powers_played[seeder._index(tp1)][seeder._power_index[self.turkey]], 1)
+        # The bias between tp2 and tp3
+        self.assertEqual(seeder.games_played_matrix[seeder._index(self.tp2)][seeder._index(self.tp3)],
+                         GameSeeder._BIAS_WEIGHT)
+
+    def test_create_game_seeder_first_round(self):
+        seeder = _create_game_seeder(self.t3, 1)
+        self.assertEqual(len(seeder.players), 9)
+        self.assertEqual(seeder.played_games, [])
+
     def test_game_index(self):
         response = self.client.get(reverse('game_index', args=(self.t1.pk, 1)))
         self.assertEqual(response.status_code, 200)
@@ -0,0 +1,177 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Test the score cache.
+"""
+
+import uuid
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from tournament import score_cache
+from tournament.diplomacy.models.game_set import GameSet
+from tournament.diplomacy.models.great_power import GreatPower
+from tournament.game_scoring import G_SCORING_SYSTEMS
+from tournament.models import Tournament, TournamentPlayer, Round, RoundPlayer
+from tournament.models import Game, GamePlayer, CentreCount, DrawProposal
+from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS, SPRING
+from tournament.players import Player
+from tournament.score_cache import LRUBackend
+
+
+class LRUBackendTests(SimpleTestCase):
+    def test_get_missing(self):
+        b = LRUBackend()
+        self.assertIsNone(b.get('a'))
+
+    def test_set_get(self):
+        b = LRUBackend()
+        b.set('a', 1)
+        b.set('b', 2)
+        self.assertEqual(b.get('a'), 1)
+        self.assertEqual(b.get('b'), 2)
+        b.set('a', 3)
+        self.assertEqual(b.get('a'), 3)
+
+    def test_least_recently_used_discarded(self):
+        b = LRUBackend(size=2)
+        b.set('a', 1)
+        b.set('b', 2)
+        # Use 'a', so 'b' is now the least recently used
+        b.get('a')
+        b.set('c', 3)
+        self.assertEqual(b.get('a'), 1)
+        self.assertIsNone(b.get('b'))
+        self.assertEqual(b.get('c'), 3)
+
+
+@override_settings(SCORE_CACHE_BACKEND='tournament.score_cache.LRUBackend',
+                   SCORE_CACHE_OPTIONS={'size': 10})
+class ScoreCacheTests(TransactionTestCase):
+    # Nothing is cached within a transaction, so TestCase can't be used
+    fixtures = ['game_sets.json']
+
+    def setUp(self):
+        self.calls = 0
+        now = timezone.now()
+        self.t1 = Tournament.objects.create(name='t1',
+                                            start_date=now,
+                                            end_date=now,
+                                            round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                            tournament_scoring_system=T_SCORING_SYSTEMS[0].name)
+        self.t2 = Tournament.objects.create(name='t2',
+                                            start_date=now,
+                                            end_date=now,
+                                            round_scoring_system=R_SCORING_SYSTEMS[0].name,
+                                            tournament_scoring_system=T_SCORING_SYSTEMS[0].name)
+        self.r = Round.objects.create(tournament=self.t1,
+                                      scoring_system=G_SCORING_SYSTEMS[0].name,
+                                      dias=True,
+                                      start=now)
+        self.g = Game.objects.create(name='g1',
+                                     started_at=now,
+                                     the_round=self.r,
+                                     the_set=GameSet.objects.get(name='Avalon Hill'))
+
+    def calculate(self):
+        self.calls += 1
+        return {'a': 1.0, 'b': 2.0}
+
+    def test_cached(self):
+        self.assertEqual(score_cache.cached(self.t1.pk, 'x', self.calculate), {'a': 1.0, 'b': 2.0})
+        self.assertEqual(score_cache.cached(self.t1.pk, 'x', self.calculate), {'a': 1.0, 'b': 2.0})
+        self.assertEqual(self.calls, 1)
+
+    def test_cached_different_keys(self):
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        score_cache.cached(self.t1.pk, 'y', self.calculate)
+        score_cache.cached(self.t2.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 3)
+
+    def test_cached_copy(self):
+        # Modifying what we get back shouldn't change what's cached
+        result = score_cache.cached(self.t1.pk, 'x', self.calculate)
+        result.pop('a')
+        self.assertEqual(score_cache.cached(self.t1.pk, 'x', self.calculate), {'a': 1.0, 'b': 2.0})
+
+    def test_invalidate(self):
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        score_cache.cached(self.t2.pk, 'x', self.calculate)
+        score_cache.invalidate(self.t1.pk)
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        # Only the one tournament should be affected
+        score_cache.cached(self.t2.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 3)
+
+    def test_invalidate_other_process(self):
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        # Another process changing the data changes the stored version
+        Tournament.objects.filter(pk=self.t1.pk).update(score_version=uuid.uuid4())
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 2)
+
+    def test_stale_tournament_saved(self):
+        # Saving an out of date Tournament instance mustn't bring back an old version
+        t = Tournament.objects.get(pk=self.t1.pk)
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        score_cache.invalidate(self.t1.pk)
+        t.save()
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 2)
+
+    def test_signals_invalidate(self):
+        self.p = Player.objects.create(first_name='Arthur', last_name='Amphlett')
+        rp = RoundPlayer(player=self.p, the_round=self.r)
+        cc = CentreCount(power=GreatPower.objects.first(), game=self.g, year=1901, count=4)
+        dp = DrawProposal(game=self.g, year=1901, season=SPRING, power_1=GreatPower.objects.first())
+        gp = GamePlayer(player=self.p, game=self.g)
+        tp = TournamentPlayer(player=self.p, tournament=self.t1)
+        for obj in [rp, cc, dp, gp, self.g, self.r, tp]:
+            for method in ['save', 'delete']:
+                with self.subTest(model=type(obj).__name__, method=method):
+                    score_cache.cached(self.t1.pk, 'x', self.calculate)
+                    score_cache.cached(self.t2.pk, 'x', self.calculate)
+                    self.calls = 0
+                    getattr(obj, method)()
+                    if method == 'delete':
+                        obj.pk = None
+                    score_cache.cached(self.t1.pk, 'x', self.calculate)
+                    score_cache.cached(self.t2.pk, 'x', self.calculate)
+                    self.assertEqual(self.calls, 1)
+
+    def test_missing_tournament(self):
+        score_cache.cached(0, 'x', self.calculate)
+        score_cache.cached(0, 'x', self.calculate)
+        self.assertEqual(self.calls, 2)
+
+    @override_settings(SCORE_CACHE_BACKEND=None)
+    def test_no_backend(self):
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 2)
+
+    @override_settings(SCORE_CACHE_BACKEND='tournament.score_cache.DjangoCacheBackend',
+                       SCORE_CACHE_OPTIONS={})
+    def test_django_cache_backend(self):
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 1)
+        score_cache.invalidate(self.t1.pk)
+        score_cache.cached(self.t1.pk, 'x', self.calculate)
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,112 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test comparing scoring systems.
+"""
+
+from datetime import timedelta
+import itertools
+
+from django.test import TestCase
+from django.utils import timezone
+
+from tournament.diplomacy.models.game_set import GameSet
+from tournament.diplomacy.models.great_power import GreatPower
+from tournament.game_scoring import G_SCORING_SYSTEMS
+from tournament.models import Tournament, Round, Game, CentreCount
+from tournament.models import TournamentPlayer, RoundPlayer, GamePlayer
+from tournament.models import R_SCORING_SYSTEMS, T_SCORING_SYSTEMS
+from tournament.models import find_game_scoring_system, positions_from_scores
+from tournament.players import Player
+from tournament.scoring_comparison import compare_scoring_systems
+
+
+class ScoringComparisonTests(TestCase):
+    fixtures = ['game_sets.json']
+
+    @classmethod
+    def setUpTestData(cls):
+        the_set = GameSet.objects.get(name='Avalon Hill')
+        powers = list(GreatPower.objects.all())
+        now = timezone.now()
+        # Sitters get points once only
+        cls.t = Tournament.objects.create(name='What If',
+                                          start_date=now,
+                                          end_date=now,
+                                          round_scoring_system=R_SCORING_SYSTEMS[2].name,
+                                          tournament_scoring_system=T_SCORING_SYSTEMS[0].name)
+        cls.players = [Player.objects.create(first_name='Player', last_name=str(n)) for n in range(8)]
+        for p in cls.players:
+            TournamentPlayer.objects.create(player=p, tournament=cls.t)
+        # One more player who is unranked and never turns up
+        cls.unranked = Player.objects.create(first_name='Absent', last_name='Player')
+        TournamentPlayer.objects.create(player=cls.unranked, tournament=cls.t, unranked=True)
+        # Two rounds, with a different player sitting out each one
+        for n in range(2):
+            r = Round.objects.create(tournament=cls.t,
+                                     scoring_system=G_SCORING_SYSTEMS[4].name,
+                                     dias=False,
+                                     start=now + timedelta(hours=8 * n))
+            g = Game.objects.create(name='g%d' % n, started_at=r.start, the_round=r, the_set=the_set)
+            sitter = cls.players[n]
+            for p in cls.players:
+                RoundPlayer.objects.create(player=p, the_round=r)
+            for p, power in zip([p for p in cls.players if p != sitter], powers):
+                GamePlayer.objects.create(player=p, game=g, power=power)
+            # Some centres change hands (different in each game)
+            counts = [5, 4, 3, 6, 2, 7, 7]
+            for power, count in zip(powers, counts[n:] + counts[:n]):
+                CentreCount.objects.create(power=power, game=g, year=1901, count=count)
+
+    def test_matches_tournament_scoring(self):
+        t_scores = self.t.calculated_scores()
+        expected = positions_from_scores(t_scores, [self.unranked])
+        g_system = find_game_scoring_system(G_SCORING_SYSTEMS[4].name)
+        results = compare_scoring_systems(self.t,
+                                          [(g_system,
+                                            self.t.round_scoring_system_obj(),
+                                            self.t.tournament_scoring_system_obj())])
+        self.assertEqual(list(results.keys()),
+                         [(g_system.name, R_SCORING_SYSTEMS[2].name, T_SCORING_SYSTEMS[0].name)])
+        self.assertEqual(list(results.values())[0], expected)
+
+    def test_all_combinations(self):
+        # Everything should be read just once, and nothing written
+        with self.assertNumQueries(9):
+            results = compare_scoring_systems(self.t)
+        self.assertEqual(len(results),
+                         len(G_SCORING_SYSTEMS) * len(R_SCORING_SYSTEMS) * len(T_SCORING_SYSTEMS))
+        for key, standings in results.items():
+            with self.subTest(systems=key):
+                self.assertEqual(set(standings.keys()), set(self.players + [self.unranked]))
+                self.assertEqual(standings[self.unranked], (Tournament.UNRANKED, 0.0))
+
+    def test_sitters_score(self):
+        results = compare_scoring_systems(self.t,
+                                          [(G_SCORING_SYSTEMS[0], R_SCORING_SYSTEMS[2], T_SCORING_SYSTEMS[0]),
+                                           (G_SCORING_SYSTEMS[0], R_SCORING_SYSTEMS[3], T_SCORING_SYSTEMS[0])])
+        # Sitting out is worth a lot with one system and nothing with the other
+        best = results[(G_SCORING_SYSTEMS[0].name, R_SCORING_SYSTEMS[2].name, T_SCORING_SYSTEMS[0].name)]
+        total = results[(G_SCORING_SYSTEMS[0].name, R_SCORING_SYSTEMS[3].name, T_SCORING_SYSTEMS[0].name)]
+        for p in self.players[:2]:
+            with self.subTest(player=p):
+                self.assertEqual(best[p][1] - total[p][1], R_SCORING_SYSTEMS[2].non_player_score)
+
+    def test_parallel(self):
+        combinations = list(itertools.product(G_SCORING_SYSTEMS[:3], R_SCORING_SYSTEMS, T_SCORING_SYSTEMS[:1]))
+        self.assertEqual(compare_scoring_systems(self.t, combinations, processes=2),
+                         compare_scoring_systems(self.t, combinations))
@@ -0,0 +1,111 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test the game seeder benchmark.
+"""
+
+import io
+import unittest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from tournament.game_seeder import SeedMethod
+from tournament.seeder_benchmark import DOUBLE, MIXED, SIT
+from tournament.seeder_benchmark import SyntheticTournament, repeat_pairings, run_benchmark
+
+
+class SyntheticTournamentTests(unittest.TestCase):
+    """
+    Test SyntheticTournament
+    """
+
+    def check_rounds(self, t, mode):
+        for sitters, doublers in t.rounds:
+            self.assertEqual((t.num_players - len(sitters) + len(doublers)) % 7, 0)
+            self.assertFalse(sitters & doublers)
+            if mode == SIT:
+                self.assertFalse(doublers)
+            elif mode == DOUBLE:
+                self.assertLess(len(sitters), 7)
+
+    def test_modes(self):
+        for mode in [SIT, DOUBLE, MIXED]:
+            with self.subTest(mode=mode):
+                t = SyntheticTournament(30, 7, mode, biases=3, absent=5)
+                self.assertEqual(len(t.rounds), 7)
+                self.assertEqual(len(t.bias_pairs), 3)
+                self.check_rounds(t, mode)
+
+    def test_bad_mode(self):
+        self.assertRaises(ValueError, SyntheticTournament, 20, 3, 'swap')
+
+    def test_reproducible(self):
+        t1 = SyntheticTournament(40, 4, biases=2, seed=3)
+        t2 = SyntheticTournament(40, 4, biases=2, seed=3)
+        self.assertEqual(t1.rounds, t2.rounds)
+        self.assertEqual(t1.bias_pairs, t2.bias_pairs)
+
+
+class BenchmarkTests(unittest.TestCase):
+    """
+    Test repeat_pairings() and run_benchmark()
+    """
+
+    def test_repeat_pairings(self):
+        games = [set(range(7)), set(range(7, 14)), set([0, 1, 7, 8, 9, 10, 11])]
+        # 0-1 and every pair of 7..11 have met before
+        self.assertEqual(repeat_pairings(games), 1 + 10)
+
+    def test_run_benchmark(self):
+        t = SyntheticTournament(13, 3, biases=2)
+        for method in SeedMethod:
+            with self.subTest(method=method):
+                result = run_benchmark(t, method, 2, 100)
+                self.assertGreaterEqual(result['time'], result['max_round_time'])
+                self.assertGreaterEqual(result['fitness'], 0)
+                self.assertGreaterEqual(result['repeats'], 0)
+                self.assertGreaterEqual(result['power_repeats'], 0)
+                self.assertGreaterEqual(result['bias_meetings'], 0)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('benchmark_seeder',
+                     '--players', '14', '22',
+                     '--rounds', '2',
+                     '--config', 'RANDOM:2:10',
+                     '--config', 'EXHAUSTIVE',
+                     '--exhaustive-limit', '14',
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        # Header, two player counts with RANDOM, one with EXHAUSTIVE
+        self.assertEqual(len(lines), 4)
+
+    def test_command_lookahead(self):
+        out = io.StringIO()
+        call_command('benchmark_seeder',
+                     '--players', '14',
+                     '--rounds', '3',
+                     '--config', 'RANDOM:2:10',
+                     '--lookahead',
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        # Header, then with and without lookahead
+        self.assertEqual(len(lines), 3)
+
+    def test_command_bad_config(self):
+        self.assertRaises(CommandError, call_command, 'benchmark_seeder', '--config', 'RANDOM:2')
@@ -0,0 +1,138 @@
+# Diplomacy Tournament Visualiser
+# Copyright (C) 2022 Chris Brand
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Test background seeding jobs.
+"""
+
+import time
+import unittest
+
+from string import ascii_uppercase
+
+from tournament.game_seeder import GameSeeder
+from tournament.seeding_jobs import SeedingJob, start_job, get_job, remove_job
+
+POWERS = ['1', '2', '3', '4', '5', '6', '7']
+
+
+def create_seeder(num_players, starts=1, iterations=10):
+    seeder = GameSeeder(POWERS, starts=starts, iterations=iterations)
+    for p in range(num_players):
+        seeder.add_player(ascii_uppercase[p])
+    # Play one round, so that there's something to improve on
+    for g in seeder.seed_games():
+        seeder.add_played_game(set(zip(g, POWERS)))
+    return seeder
+
+
+class SeedingJobTest(unittest.TestCase):
+    def test_job(self):
+        job = SeedingJob(create_seeder(21, starts=5))
+        job.start()
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FINISHED)
+        self.assertFalse(job.is_running())
+        self.assertIsNone(job.error)
+        games = job.best()
+        self.assertEqual(len(games), 3)
+        self.assertEqual(job.seeder._set_fitness(games), job.fitness)
+        self.assertGreater(job.iterations, 0)
+
+    def test_job_with_powers(self):
+        job = SeedingJob(create_seeder(14), omitting_players={'M'}, players_doubling_up={'A'}, with_powers=True)
+        job.start()
+        self.assertTrue(job.wait(10))
+        games = job.best()
+        self.assertEqual(len(games), 2)
+        for g, issues in games:
+            self.assertEqual(len(set(power for _, power in g)), 7)
+            self.assertNotIn('M', [p for p, _ in g])
+            self.assertIn('A', [p for p, _ in g])
+
+    def test_job_failed(self):
+        # Can't seed 20 players
+        job = SeedingJob(create_seeder(21), omitting_players={'A'})
+        job.start()
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FAILED)
+        self.assertIn('InvalidPlayerCount', job.error)
+        self.assertIsNone(job.best())
+
+    def test_job_stop(self):
+        # This would take a long time to finish
+        job = SeedingJob(create_seeder(21, starts=1000000))
+        job.start()
+        while job.best() is None:
+            time.sleep(0.01)
+        self.assertTrue(job.is_running())
+        # The best so far should be a valid seeding
+        self.assertEqual(len(job.best()), 3)
+        job.stop()
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FINISHED)
+        self.assertEqual(len(job.best()), 3)
+
+    def test_job_stop_with_powers(self):
+        job = SeedingJob(create_seeder(21, starts=1000000), with_powers=True)
+        job.start()
+        while job.fitness is None:
+            time.sleep(0.01)
+        # Powers can't be assigned while the job is still using the seeder
+        self.assertIsNone(job.best())
+        job.stop()
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FINISHED)
+        games = job.best()
+        self.assertEqual(len(games), 3)
+        for g, issues in games:
+            self.assertEqual(len(set(power for _, power in g)), 7)
+
+    def test_job_stop_parallel(self):
+        # Workers only report when they finish, so this would take a long time
+        seeder = GameSeeder(POWERS, starts=1000000, iterations=10, processes=2)
+        for p in range(21):
+            seeder.add_player(ascii_uppercase[p])
+        for g in seeder.seed_games():
+            seeder.add_played_game(set(zip(g, POWERS)))
+        job = SeedingJob(seeder, with_powers=True)
+        job.start()
+        time.sleep(0.5)
+        self.assertTrue(job.is_running())
+        job.stop()
+        # The worker processes should stop too
+        self.assertTrue(job.wait(10))
+        self.assertEqual(job.state, SeedingJob.FINISHED)
+        games = job.best()
+        self.assertEqual(len(games), 3)
+        for g, issues in games:
+            self.assertEqual(len(set(power for _, power in g)), 7)
+
+    def test_start_job_replaces(self):
+        key = ('test', 1)
+        job1 = SeedingJob(create_seeder(21, starts=1000000))
+        start_job(key, job1)
+        self.assertIs(get_job(key), job1)
+        job2 = SeedingJob(create_seeder(21))
+        start_job(key, job2)
+        self.assertIs(get_job(key), job2)
+        # The first job should have been stopped
+        self.assertTrue(job1.wait(10))
+        self.assertTrue(job2.wait(10))
+        self.assertIs(remove_job(key), job2)
+        self.assertIsNone(get_job(key))
+        self.assertIsNone(remove_job(key))
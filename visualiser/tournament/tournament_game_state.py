@@ -19,15 +19,22 @@ This module contains the interface between the game scoring code and the
 tournament database.
 """
 
+from array import array
+
 from tournament.diplomacy.values.diplomacy_values import FIRST_YEAR, WINNING_SCS
 from tournament.diplomacy.models.great_power import GreatPower
 from tournament.game_scoring import GameState
 from tournament.game_scoring import InvalidYear, DotCountUnknown
 
+# Stored in place of the count when we don't have one for a power and year
+_UNKNOWN = -1
+
 
 class TournamentGameState(GameState):
     """
     Abstraction of a single Game in a Tournament, for scoring purposes.
+    Everything is read from the database when the object is created,
+    so none of the methods need to access the database.
     """
 
     # TODO This version makes more sense, but the tests are currently written
@@ -40,13 +47,73 @@ class TournamentGameState(GameState):
     #    self.final_year = self.scs.order_by('-year')[0].year
     #    self.final_year_scs = return self.scs.filter(year=self.final_year).order_by('-count')
 
-    def __init__(self, scs):
-        """Create the object corresponding to the specific Game."""
-        self.scs = scs
-        self.game = scs.first().game
-        self.draw = self.game.passed_draw()
-        self.final_year = self.scs.order_by('-year')[0].year
-        self.final_year_scs = self.scs.filter(year=self.final_year).order_by('-count')
+    def __init__(self, scs, game=None):
+        """
+        Create the object corresponding to the specific Game.
+        scs is a QuerySet of the CentreCounts to use.
+        game is the Game, if the caller already has it.
+        """
+        if game is None:
+            game = scs.first().game
+        self._setup(game,
+                    game.passed_draw(),
+                    list(GreatPower.objects.all()),
+                    scs.values_list('year', 'power', 'count'))
+
+    @classmethod
+    def _from_data(cls, game, draw, powers, rows):
+        """
+        Create the object from data already read from the database.
+        Parameters are as for _setup().
+        """
+        tgs = cls.__new__(cls)
+        tgs._setup(game, draw, powers, rows)
+        return tgs
+
+    def _setup(self, game, draw, powers, rows):
+        """
+        game is the Game.
+        draw is the passed DrawProposal for the Game, or None.
+        powers is a list of all the GreatPowers.
+        rows is an iterable of (year, GreatPower pk, count) 3-tuples,
+        one for each CentreCount.
+        A Game with no CentreCounts at all is treated as being at the start,
+        with each power on its starting centres.
+        """
+        self.game = game
+        self.draw = draw
+        self._powers = powers
+        # Dict, keyed by GreatPower pk, of index into self._powers
+        self._power_index = {p.pk: i for i, p in enumerate(self._powers)}
+        rows = list(rows)
+        if not rows:
+            rows = [(FIRST_YEAR - 1, p.pk, p.starting_centres) for p in self._powers]
+        self.first_year = min(year for year, _, _ in rows)
+        self.final_year = max(year for year, _, _ in rows)
+        # Dot counts, indexed by year, then power, flattened
+        n = len(self._powers)
+        self._counts = array('b', [_UNKNOWN]) * (n * (self.final_year - self.first_year + 1))
+        for year, power_id, count in rows:
+            self._counts[(year - self.first_year) * n + self._power_index[power_id]] = count
+        # List of (power, count) 2-tuples for the final year, most dots first
+        final = self._year_counts(self.final_year)
+        self._final_year_counts = sorted([(p, c) for p, c in zip(self._powers, final) if c != _UNKNOWN],
+                                         key=lambda pc: pc[1],
+                                         reverse=True)
+        # Powers in the passed draw, if any
+        self._draw_powers = None
+        if self.draw is not None:
+            self._draw_powers = []
+            for i in range(1, n + 1):
+                power_id = getattr(self.draw, 'power_%d_id' % i, None)
+                if power_id:
+                    self._draw_powers.append(self._powers[self._power_index[power_id]])
+
+    def _year_counts(self, year):
+        """Returns the dot counts for year, in self._powers order."""
+        n = len(self._powers)
+        start = (year - self.first_year) * n
+        return self._counts[start:start + n]
 
     def _validate_year(self, year):
         """Check that the year is reasonable. Raise InvalidYear if it isn't."""
@@ -56,23 +123,22 @@ class TournamentGameState(GameState):
 
     def all_powers(self):
         """Returns an iterable of all the powers."""
-        return GreatPower.objects.all()
+        return self._powers
 
     def soloer(self):
         """Returns the power that soloed the game or was conceded to, or None."""
-        if self.final_year_scs[0].count >= WINNING_SCS:
-            return self.final_year_scs[0].power
-        if self.draw is not None:
-            draw_powers = self.draw.powers()
-            if len(draw_powers) == 1:
-                return draw_powers[0]
+        if self._final_year_counts[0][1] >= WINNING_SCS:
+            return self._final_year_counts[0][0]
+        if self._draw_powers is not None:
+            if len(self._draw_powers) == 1:
+                return self._draw_powers[0]
         return None
 
     def survivors(self):
         """
         Returns an iterable of the subset of powers that are still alive.
         """
-        return [sc.power for sc in self.final_year_scs.filter(count__gt=0)]
+        return [p for p, c in self._final_year_counts if c > 0]
 
     def powers_in_draw(self):
         """
@@ -80,43 +146,77 @@ class TournamentGameState(GameState):
         For a concession, return an iterable containing just the power conceded to.
         If there is no passed draw vote or concession, returns survivors().
         """
-        if self.draw is not None:
-            return self.draw.powers()
+        if self._draw_powers is not None:
+            return list(self._draw_powers)
         return self.survivors()
 
     def solo_year(self):
         """Returns the year in which a solo occurred, or None."""
-        top = self.final_year_scs[0]
-        if top.count >= WINNING_SCS:
-            return top.year
+        if self._final_year_counts[0][1] >= WINNING_SCS:
+            return self.final_year
         return None
 
     def num_powers_with(self, centres):
         """
         Returns the number of powers that own the specified number of supply centres.
         """
-        return self.final_year_scs.filter(count=centres).count()
+        return len([c for _, c in self._final_year_counts if c == centres])
 
     def highest_dot_count(self):
         """Returns the number of supply centres owned by the strongest power(s)."""
-        return self.final_year_scs[0].count
+        return self._final_year_counts[0][1]
 
     def dot_count(self, power, year=None):
         """Returns the number of supply centres owned by the specified power."""
-        if year is not None:
+        if year is None:
+            year = self.final_year
+        else:
             self._validate_year(year)
-            try:
-                return self.scs.filter(year=year).get(power=power).count
-            # We can't import CentreCount here
-            except BaseException as e:
-                raise DotCountUnknown from e
-        return self.final_year_scs.get(power=power).count
+        count = _UNKNOWN
+        if year >= self.first_year:
+            count = self._year_counts(year)[self._power_index[power.pk]]
+        if count == _UNKNOWN:
+            raise DotCountUnknown
+        return count
 
     def year_eliminated(self, power):
         """Returns the year in which the specified power was eliminated, or None."""
-        # TODO Need to add an exception handler to return None
-        return self.scs.filter(power=power).filter(count=0).order_by('year').first().year
+        n = len(self._powers)
+        i = self._power_index[power.pk]
+        for offset, count in enumerate(self._counts[i::n]):
+            if count == 0:
+                return self.first_year + offset
+        return None
 
     def last_full_year(self):
         """Returns the last year for which SCs have been entered."""
         return self.final_year
+
+
+def game_states(games):
+    """
+    Returns a dict, keyed by Game, of TournamentGameStates for all the Games.
+    Equivalent to creating TournamentGameState(g.centrecount_set.all(), g)
+    for each Game, but reads all the CentreCounts with one query and
+    all the draws with another, rather than several queries per Game.
+    """
+    # models imports this module, so we can't import this at the top
+    from tournament.models import CentreCount, DrawProposal
+
+    games = list(games)
+    if not games:
+        return {}
+    powers = list(GreatPower.objects.all())
+    # Dict, keyed by Game pk, of passed DrawProposal
+    draws = {d.game_id: d for d in DrawProposal.objects.filter(game__in=games, passed=True)}
+    # Dict, keyed by Game pk, of lists of (year, GreatPower pk, count) 3-tuples
+    rows = {}
+    for game_id, year, power_id, count in CentreCount.objects.filter(game__in=games).values_list('game',
+                                                                                                 'year',
+                                                                                                 'power',
+                                                                                                 'count'):
+        rows.setdefault(game_id, []).append((year, power_id, count))
+    retval = {}
+    for g in games:
+        retval[g] = TournamentGameState._from_data(g, draws.get(g.pk), powers, rows.get(g.pk, []))
+    return retval
@@ -40,7 +40,7 @@ from tournament.forms import PrefsForm
 from tournament.forms import SeederBiasForm
 
 from tournament.diplomacy.models.game_set import GameSet
-from tournament.models import Tournament, Game, SeederBias
+from tournament.models import Tournament, SeederBias
 from tournament.models import TournamentPlayer, RoundPlayer, GamePlayer
 from tournament.models import InvalidPreferenceList
 from tournament.news import news
@@ -223,15 +223,11 @@ def tournament_best_countries(request,
                               redirect_url_name='tournament_best_countries_refresh'):
     """Display best countries of a tournament"""
     t = get_visible_tournament_or_404(tournament_id, request.user)
-    # We're going to need all the scores and URLs for every game in the tournament
-    # Best to avoid deriving this information seven times for each game
-    all_games = Game.objects.filter(the_round__tournament=t)
-    all_urls_and_scores = {}
-    for g in all_games:
-        all_urls_and_scores[g] = (g.get_absolute_url(), g.name, g.scores())
-    # gps is a dict, keyed by power, of lists of all gameplayers,
+    # gps is a dict, keyed by power, of lists of (GamePlayer, score, dots, unranked) 4-tuples,
     # sorted by best country criterion
-    gps = t.best_countries(True)
+    gps = t.best_countries_detail(True)
+    # Dict, keyed by Player pk, of TournamentPlayer
+    tps = {tp.player_id: tp for tp in t.tournamentplayer_set.all()}
     # We have to just pick a set here. Avalon Hill is most common in North America
     set_powers = GameSet.objects.get(name='Avalon Hill').setpower_set.order_by('power')
     # TODO Sort set_powers alphabetically by translated power.name
@@ -242,17 +238,17 @@ def tournament_best_countries(request,
         row = []
         for p in set_powers:
             try:
-                gp = gps[p.power].pop(0)
+                gp, score, dots, unranked = gps[p.power].pop(0)
             except IndexError:
                 continue
-            cell = '<a href="%s">%s</a><br/><a href="%s">%s</a><br/>%.2f' % (gp.tournamentplayer().get_absolute_url(),
+            cell = '<a href="%s">%s</a><br/><a href="%s">%s</a><br/>%.2f' % (tps[gp.player_id].get_absolute_url(),
                                                                              gp.player,
-                                                                             all_urls_and_scores[gp.game][0],  # URL
-                                                                             all_urls_and_scores[gp.game][1],  # name
-                                                                             all_urls_and_scores[gp.game][2][gp.power])  # score
-            if gp.tournamentplayer().unranked:
+                                                                             gp.game.get_absolute_url(),
+                                                                             gp.game.name,
+                                                                             score)
+            if unranked:
                 cell += '*'
-            cell += '<br/>%d %s' % (gp.final_sc_count(),  # dots
+            cell += '<br/>%d %s' % (dots,
                                     _('centre(s)'))
             row.append(cell)
         rows.append(row)
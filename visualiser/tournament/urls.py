@@ -28,6 +28,8 @@ round_patterns = [
     url(r'^roll_call/$', round_views.roll_call, name='round_roll_call'),
     url(r'^get_seven/$', round_views.get_seven, name='get_seven'),
     url(r'^seed_games/$', round_views.seed_games, name='seed_games'),
+    url(r'^seeding_status/$', round_views.seeding_status, name='seeding_status'),
+    url(r'^accept_seeding/$', round_views.accept_seeding, name='accept_seeding'),
     url(r'^create_games/$', round_views.create_games, name='create_games'),
     url(r'^game_scores/$', round_views.game_scores, name='game_scores'),
     url(r'^games/$', round_views.game_index, name='game_index'),
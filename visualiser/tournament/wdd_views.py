@@ -49,7 +49,7 @@ def view_classification_csv(request, tournament_id):
     # Grab the tournament scores and positions, "if it ended now"
     t_positions_and_scores = t.positions_and_scores()[0]
     # Grab the best country rankings
-    best_countries = t.best_countries()
+    best_countries = t.best_countries_detail()
     # Grab the top board, if any
     try:
         top_board = Game.objects.get(is_top_board=True,
@@ -116,12 +116,12 @@ def view_classification_csv(request, tournament_id):
         # Add best country fields if any
         for power, bc in best_countries.items():
             # Did this player win best country with this power?
-            for gp in bc:
-                if gp.player == p:
+            for gp, _, dots, _ in bc:
+                if gp.player_id == p.pk:
                     wdd_pwr = _power_name_to_wdd(power.name)
                     row_dict['RK_%s' % wdd_pwr] = 1
                     row_dict['PT_%s' % wdd_pwr] = gp.score
-                    row_dict['CT_%s' % wdd_pwr] = gp.game.centrecount_set.filter(power=power).last().count
+                    row_dict['CT_%s' % wdd_pwr] = dots
                     row_dict['HEAT_%s' % wdd_pwr] = gp.game.the_round.number()
                     # We store boards as names, not numbers
                     # g.id is globally-unique. What we really want is number within the round
@@ -130,3 +130,31 @@ STATIC_URL = '/static/'
 # Testing
 TEST_RUNNER = 'django_slowtests.testrunner.DiscoverSlowestTestsRunner'
 NUM_SLOW_TESTS = 10
+
+# Game seeding
+# Number of processes to spread the search for a good seeding between
+SEEDER_PROCESSES = 1
+# Time limit in seconds for seeding, or None to use a fixed amount of searching
+SEEDER_DEADLINE = None
+# Whether to plan the seeding of all the remaining rounds when seeding a round
+SEEDER_LOOKAHEAD = False
+# Whether to seed games in a background thread, with a page showing progress.
+# Jobs are only visible to the server process that started them, so only
+# use this with a single server process. Otherwise a request that reaches a
+# different process finds no seeding to accept, and the round must be seeded again
+SEEDER_BACKGROUND = False
+# Seed for the game seeder's random number generator, or None to pick one
+# each time. Every seeding is recorded with the seed that was used
+SEEDER_SEED = None
+# How much players playing a power again counts against a seeding, compared to
+# players meeting again, when powers are assigned automatically.
+# Zero to choose the games first, then assign powers
+SEEDER_POWER_WEIGHT = 0
+
+# Score caching
+# Class to cache "if it ended now" scores in, or None to not cache them.
+# tournament.score_cache.DjangoCacheBackend uses CACHES, so can be shared
+# between server processes
+SCORE_CACHE_BACKEND = 'tournament.score_cache.LRUBackend'
+# Keyword arguments to create SCORE_CACHE_BACKEND with
+SCORE_CACHE_OPTIONS = {}